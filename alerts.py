@@ -0,0 +1,101 @@
+"""Сводки об ошибках вместо уведомления на каждую ошибку.
+
+Первая ошибка уходит в чат сразу, остальные копятся по типам и
+отправляются одной сводкой не раньше, чем через ALERT_WINDOW секунд после
+предыдущего уведомления в этот чат. Сводка уходит, только если за время
+сбоя появился новый тип ошибки: о затянувшемся сбое с той же ошибкой
+сообщается один раз. Когда опрос снова проходит успешно, в чат уходит
+сообщение о восстановлении со всеми ошибками, не попавшими в сводки.
+"""
+import time
+from typing import Callable, Dict, Hashable, Optional, Set
+
+from settings import ALERT_WINDOW
+
+
+class ErrorGroup:
+    """Ошибки одного типа с последнего уведомления."""
+
+    __slots__ = ('count', 'first_seen', 'last_seen', 'last_message')
+
+    def __init__(self, now: float, message: str) -> None:
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.last_message = message
+
+    def add(self, now: float, message: str) -> None:
+        """Учет очередной ошибки."""
+        self.count += 1
+        self.last_seen = now
+        self.last_message = message
+
+
+def _clock_time(timestamp: float) -> str:
+    return time.strftime('%H:%M:%S', time.localtime(timestamp))
+
+
+class ErrorAggregator:
+    """Ограничение уведомлений об ошибках для каждого чата."""
+
+    def __init__(
+        self, window: float = ALERT_WINDOW, clock: Callable = time.time
+    ) -> None:
+        self.window = window
+        self.clock = clock
+        self.groups: Dict[Hashable, Dict[str, ErrorGroup]] = {}
+        self.failures: Dict[Hashable, int] = {}
+        self.alerted: Dict[Hashable, bool] = {}
+        self.last_alert: Dict[Hashable, float] = {}
+        # Типы ошибок, о которых уже сообщали в чат за время сбоя
+        self.reported: Dict[Hashable, Set[str]] = {}
+
+    def record_failure(
+        self, chat_id: Hashable, error: Exception
+    ) -> Optional[str]:
+        """Учет ошибки, возвращает текст уведомления или None."""
+        now = self.clock()
+        message = f'Сбой в работе программы: {error}'
+        groups = self.groups.setdefault(chat_id, {})
+        name = type(error).__name__
+        if name not in groups:
+            groups[name] = ErrorGroup(now, message)
+        groups[name].add(now, message)
+        self.failures[chat_id] = self.failures.get(chat_id, 0) + 1
+
+        last = self.last_alert.get(chat_id)
+        if last is not None and now - last < self.window:
+            return None
+        reported = self.reported.setdefault(chat_id, set())
+        if reported.issuperset(groups):
+            # Ничего нового: ошибки попадут в сообщение о восстановлении
+            return None
+        reported.update(groups)
+        self.last_alert[chat_id] = now
+        self.alerted[chat_id] = True
+        groups = self.groups.pop(chat_id)
+        if len(groups) == 1 and groups[name].count == 1:
+            return message
+        return self._summary(groups)
+
+    def record_success(self, chat_id: Hashable) -> Optional[str]:
+        """Текст о восстановлении, если о сбое сообщали в чат."""
+        failures = self.failures.pop(chat_id, 0)
+        self.reported.pop(chat_id, None)
+        if not self.alerted.pop(chat_id, False):
+            return None
+        text = f'Работа восстановлена, ошибок подряд: {failures}'
+        groups = self.groups.pop(chat_id, None)
+        if groups:
+            text += '\n' + self._summary(groups)
+        return text
+
+    def _summary(self, groups: Dict[str, ErrorGroup]) -> str:
+        lines = ['Ошибки с последнего уведомления:']
+        for name, group in groups.items():
+            lines.append(
+                f'{name}: {group.count} раз с {_clock_time(group.first_seen)} '
+                f'по {_clock_time(group.last_seen)}, последняя: '
+                f'{group.last_message}'
+            )
+        return '\n'.join(lines)
@@ -0,0 +1,307 @@
+"""Догрузка статусов за прошедший период окнами по времени.
+
+После долгого простоя или при подключении нового студента период
+[since, until) делится на окна по BACKFILL_WINDOW секунд. У API есть
+только from_date, и запрос с начала окна вернул бы и все следующие окна,
+поэтому для студента делается один запрос с начала первого незагруженного
+окна, а ответ делится на окна по date_updated. Студенты загружаются
+параллельно, не больше BACKFILL_CONCURRENCY запросов одновременно.
+
+Работы студента объединяются и сортируются по date_updated до
+parse_status, так что уведомления приходят в порядке изменения статусов.
+Загруженные окна отмечаются в базе состояния: после сбоя повторный
+запуск запрашивает только оставшиеся. Отпечатки из dedup.py не дают
+отправить статус второй раз, даже если бот работает одновременно.
+
+    python backfill.py --since 2022-01-01 --until 2022-03-01
+"""
+import argparse
+import bisect
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from breaker import (CircuitBreaker, create_api_breaker,
+                     create_telegram_breaker)
+from checkpoint import CheckpointStore, connect
+from dedup import DeliveryIndex
+from delivery import Delivery
+from history import HistoryStore, parse_date, parse_time
+from homework import (check_response, create_bot, deliver, fetch_api_answer,
+                      parse_status)
+from logs import setup_logging
+from metrics import record_error
+from settings import (BACKFILL_CONCURRENCY, BACKFILL_DRAIN_TIMEOUT,
+                      BACKFILL_WINDOW, RETRY_TIME, SPOOL_PATH, STATE_DB_PATH,
+                      TELEGRAM_TOKEN, TENANTS_FILE)
+from spool import Spool
+from tenants import Tenant, load_tenants
+
+logger = logging.getLogger(__name__)
+
+Window = Tuple[int, int]
+
+
+def split_windows(since: int, until: int, window: int) -> List[Window]:
+    """Период [since, until) окнами по window секунд."""
+    if window <= 0:
+        raise ValueError('Размер окна должен быть больше нуля')
+    return [
+        (start, min(start + window, until))
+        for start in range(since, until, window)
+    ]
+
+
+class BackfillProgress:
+    """Загруженные окна студентов в базе состояния."""
+
+    def __init__(self, path: str = STATE_DB_PATH) -> None:
+        self._connection = connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS backfill ('
+            'tenant TEXT NOT NULL, '
+            'started INTEGER NOT NULL, '
+            'finished INTEGER NOT NULL, '
+            'PRIMARY KEY (tenant, started, finished)) WITHOUT ROWID'
+        )
+        self._connection.commit()
+
+    def done(self, tenant: str) -> Set[Window]:
+        """Окна студента, статусы из которых уже обработаны."""
+        return set(self._connection.execute(
+            'SELECT started, finished FROM backfill WHERE tenant = ?',
+            (tenant,)
+        ))
+
+    def mark(self, tenant: str, windows: Iterable[Window]) -> None:
+        """Отмечаем окна обработанными одной транзакцией."""
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO backfill (tenant, started, finished) '
+                'VALUES (?, ?, ?)',
+                ((tenant, start, end) for start, end in windows)
+            )
+
+    def close(self) -> None:
+        """Закрытие соединения."""
+        self._connection.close()
+
+
+class Backfill:
+    """Параллельная загрузка студентов и отправка статусов по порядку.
+
+    fetch(current_timestamp, headers) -> dict и send(chat_id, message)
+    блокирующие функции, как и у Engine.
+    """
+
+    def __init__(
+        self,
+        tenants: Iterable[Tenant],
+        send: Callable,
+        fetch: Callable = fetch_api_answer,
+        window: int = BACKFILL_WINDOW,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        progress: Optional[BackfillProgress] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        delivered: Optional[DeliveryIndex] = None,
+        history: Optional[HistoryStore] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.tenants = list(tenants)
+        self.send = send
+        self.fetch = fetch
+        self.window = window
+        self.concurrency = concurrency
+        self.progress = progress
+        self.checkpoints = checkpoints
+        self.delivered = delivered
+        self.history = history
+        self.breaker = breaker
+
+    def fetch_windows(
+        self, tenant: Tenant, windows: List[Window], since: int
+    ) -> list:
+        """Работы студента, статус которых менялся в одном из окон.
+
+        Окна идут по порядку, запрос один - с начала первого окна.
+        Работа без date_updated попадает в первое окно периода.
+        """
+        if self.breaker is None:
+            response = self.fetch(windows[0][0], tenant.headers)
+        else:
+            response = self.breaker.call(
+                self.fetch, windows[0][0], tenant.headers
+            )
+        starts = [start for start, _ in windows]
+        homeworks = []
+        for homework in check_response(response):
+            updated = parse_date(homework.get('date_updated'), since)
+            index = bisect.bisect_right(starts, updated) - 1
+            # Окна, загруженные раньше, и время после периода пропускаем
+            if index >= 0 and updated < windows[index][1]:
+                homeworks.append(homework)
+        return homeworks
+
+    def run(self, since: int, until: Optional[int] = None) -> dict:
+        """Догрузка периода для всех студентов, возвращает счетчики.
+
+        Если запрос студента не удался, его окна остаются незагруженными
+        и будут запрошены при следующем запуске.
+        """
+        until = until or int(time.time())
+        windows = split_windows(since, until, self.window)
+        summary = {'windows': 0, 'skipped': 0, 'pending': 0, 'sent': 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = []
+            for tenant in self.tenants:
+                done = self.progress.done(tenant.key) if self.progress else ()
+                remaining = [
+                    window for window in windows if window not in done
+                ]
+                summary['skipped'] += len(windows) - len(remaining)
+                future = None
+                if remaining:
+                    future = executor.submit(
+                        self.fetch_windows, tenant, remaining, since
+                    )
+                pending.append((tenant, remaining, future))
+            for tenant, remaining, future in pending:
+                self._process(tenant, remaining, future, since, until, summary)
+        return summary
+
+    def _process(
+        self, tenant: Tenant, remaining: List[Window], future, since: int,
+        until: int, summary: dict
+    ) -> None:
+        homeworks = []
+        if future is not None:
+            try:
+                homeworks = future.result()
+            except Exception as error:
+                logger.error(
+                    '%s: Не удалось загрузить статусы с %s: %s', tenant.key,
+                    remaining[0][0], error, extra={'tenant': tenant.key}
+                )
+                record_error(error)
+                summary['pending'] += len(remaining)
+                return
+        summary['windows'] += len(remaining)
+
+        # Строки date_updated в одном формате сортируются как даты
+        homeworks.sort(key=lambda homework: homework.get('date_updated', ''))
+        for homework in homeworks:
+            summary['sent'] += self._notify(tenant, homework)
+
+        if self.progress is not None:
+            self.progress.mark(tenant.key, remaining)
+        if self.checkpoints is not None:
+            saved = self.checkpoints.load(tenant.key)
+            # Опрос продолжится с конца периода, если он не оставит пробела
+            if saved is None or since <= saved < until:
+                self.checkpoints.save(tenant.key, until)
+
+    def _notify(self, tenant: Tenant, homework) -> bool:
+        try:
+            message = parse_status(homework)
+        except KeyError as error:
+            record_error(error)
+            logger.error(
+                '%s: Пропущена работа: %s', tenant.key, error, extra={
+                    'tenant': tenant.key,
+                    'homework': homework.get('homework_name'),
+                }
+            )
+            return False
+        if self.delivered is not None and not self.delivered.check_and_mark(
+            tenant.key, homework
+        ):
+            return False
+        self.send(tenant.chat_id, message)
+        if self.history is not None:
+            self.history.record(tenant.key, homework)
+        return True
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--since', type=parse_time, required=True)
+    parser.add_argument('--until', type=parse_time,
+                        help='по умолчанию - текущее время')
+    parser.add_argument('--window', type=int, default=BACKFILL_WINDOW,
+                        help='размер окна в секундах')
+    parser.add_argument('--concurrency', type=int,
+                        default=BACKFILL_CONCURRENCY)
+    parser.add_argument('--tenant', action='append',
+                        help='ключ студента (tenant_key), можно несколько')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    """Догрузка статусов из командной строки."""
+    args = parse_args(argv)
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        raise SystemExit('Нужно установить переменную TELEGRAM_TOKEN')
+    tenants = [
+        tenant for tenant in load_tenants(TENANTS_FILE)
+        if not args.tenant or tenant.key in args.tenant
+    ]
+    if not tenants:
+        raise SystemExit(f'Список студентов пуст: {TENANTS_FILE}')
+
+    # Свой журнал рядом с журналом бота: неотправленное доотправит
+    # следующий запуск backfill
+    root, extension = os.path.splitext(SPOOL_PATH)
+    spool_path = f'{root}-backfill{extension}'
+    delivery = Delivery(
+        send=functools.partial(deliver, create_bot()),
+        spool=Spool(spool_path),
+        breaker=create_telegram_breaker()
+    )
+    delivery.start()
+    checkpoints = CheckpointStore()
+    history = HistoryStore()
+    backfill = Backfill(
+        tenants,
+        send=delivery.submit,
+        window=args.window,
+        concurrency=args.concurrency,
+        progress=BackfillProgress(),
+        checkpoints=checkpoints,
+        delivered=DeliveryIndex(),
+        history=history,
+        breaker=create_api_breaker(),
+    )
+    start = time.monotonic()
+    drained = False
+    try:
+        summary = backfill.run(args.since, args.until)
+        # Статусы уже отмечены в DeliveryIndex, и бот их не отправит:
+        # выходим только после отправки очереди
+        drained = delivery.drain(BACKFILL_DRAIN_TIMEOUT)
+    finally:
+        checkpoints.flush()
+        history.close()
+        delivery.stop(timeout=RETRY_TIME)
+    logger.info(
+        'Загружено окон: %s, загружено раньше: %s, осталось: %s, '
+        'отправлено статусов: %s за %.1f с',
+        summary['windows'], summary['skipped'], summary['pending'],
+        summary['sent'], time.monotonic() - start
+    )
+    if not drained:
+        logger.error(
+            'Не отправлено строк: %s, они останутся в журнале %s до '
+            'следующего запуска', delivery.stats()['queued_lines'],
+            spool_path
+        )
+    if summary['pending'] or not drained:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
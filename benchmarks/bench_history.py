@@ -0,0 +1,107 @@
+"""Бенчмарк истории статусов: запись пачками и запросы из history.py.
+
+Заполняет временную базу --rows статусами (по умолчанию миллион) и
+измеряет время запросов командной строки:
+
+    python benchmarks/bench_history.py --rows 1000000
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history import HistoryStore, format_date, write_rows  # noqa: E402
+
+# Статусы одной работы: две попытки, первая отклонена
+LIFECYCLE = (
+    ('reviewing', 0),
+    ('rejected', 1),
+    ('reviewing', 2),
+    ('approved', 3),
+)
+START = 1600000000
+
+
+def fill(store: HistoryStore, rows: int, homeworks: int) -> float:
+    """Запись rows статусов через record(), возвращает строк в секунду."""
+    rand = random.Random(1)
+    started = time.perf_counter()
+    written = 0
+    tenant = 0
+    while written < rows:
+        for number in range(homeworks):
+            updated = START + rand.randrange(10 ** 7)
+            for status, step in LIFECYCLE:
+                updated += step * rand.randrange(600, 86400)
+                store.record(f'tenant-{tenant:06}', {
+                    'id': number,
+                    'homework_name': f'hw{number:02}',
+                    'status': status,
+                    'date_updated': format_date(updated),
+                })
+                written += 1
+        tenant += 1
+    store.flush()
+    return written / (time.perf_counter() - started)
+
+
+def timed(func, repeat: int = 5) -> float:
+    """Лучшее из repeat время вызова в миллисекундах."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--homeworks', type=int, default=20,
+                        help='работ у одного студента')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        store = HistoryStore(os.path.join(state_dir, 'history.sqlite3'),
+                             batch_size=5000)
+        rate = fill(store, args.rows, args.homeworks)
+        print(f'Запись: {args.rows} строк, {rate:.0f} строк/с')
+
+        tenant = 'tenant-000042'
+        queries = {
+            'range: студент за все время': lambda: list(
+                store.query(tenant=tenant)
+            ),
+            'range: сутки по всем': lambda: list(
+                store.query(since=START + 10 ** 6,
+                            until=START + 10 ** 6 + 86400)
+            ),
+            'reviews: одна работа студента': lambda: store.review_stats(
+                tenant=tenant, homework='hw01'
+            ),
+            'reviews: неделя по всем': lambda: store.review_stats(
+                since=START + 10 ** 6, until=START + 10 ** 6 + 7 * 86400
+            ),
+            'reviews: все время': lambda: store.review_stats(),
+            'rejected: студент': lambda: store.rejected(1, tenant),
+            'export jsonl: сутки': lambda: write_rows(
+                store.query(since=START + 10 ** 6,
+                            until=START + 10 ** 6 + 86400),
+                io.StringIO(), 'jsonl'
+            ),
+        }
+        for name, query in queries.items():
+            print(f'{name:36} {timed(query):10.2f} мс')
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""Бенчмарк цепочки опрос - разбор - отправка.
+
+Все внешние вызовы заменены локальными заглушками, поэтому результаты
+воспроизводимы без сети. Запуск из корня проекта:
+
+    python benchmarks/bench_pipeline.py                # вывести результаты
+    python benchmarks/bench_pipeline.py --save         # сохранить базовую линию
+    python benchmarks/bench_pipeline.py --compare      # сравнить с ней
+
+При --compare процесс завершается с кодом 1, если какой-то сценарий
+стал медленнее базовой линии больше чем на --tolerance (30%).
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from http import HTTPStatus
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests  # noqa: E402
+import telegram  # noqa: E402
+
+import homework  # noqa: E402
+from checkpoint import CheckpointStore  # noqa: E402
+from dedup import DeliveryIndex  # noqa: E402
+from engine import Engine  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from records import HOMEWORK_SCHEMA  # noqa: E402
+from spool import Spool  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+PAYLOAD_SIZES = (0, 10, 100, 1000)
+TENANT_COUNTS = (10, 100, 1000)
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_payload(size: int, current_date: int = 1000198991) -> dict:
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'status': STATUSES[number % len(STATUSES)],
+                'homework_name': f'student__hw{number:04}.zip',
+                'reviewer_comment': 'Всё нравится' * 5,
+                'date_updated': '2020-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for number in range(size)
+        ],
+        'current_date': current_date,
+    }
+
+
+class FakeResponse:
+    """Ответ requests с готовым телом."""
+
+    def __init__(self, body: bytes) -> None:
+        self.content = body
+        self.status_code = HTTPStatus.OK
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeBot:
+
+    def __init__(self, *args, **kwargs):
+        self.sent = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent += 1
+
+
+class StopLoop(Exception):
+    pass
+
+
+def measure(func, iterations: int) -> dict:
+    """ops/s, перцентили задержки и пик выделенной памяти на операцию."""
+    func()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        latencies.append(time.perf_counter_ns() - start)
+    latencies.sort()
+
+    # Пиковый прирост памяти за одну операцию
+    tracemalloc.start()
+    peaks = []
+    for _ in range(max(iterations // 10, 1)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    def percentile(share):
+        return latencies[min(int(len(latencies) * share), len(latencies) - 1)]
+
+    # ops/s по медиане устойчивее к случайным паузам, чем по сумме
+    return {
+        'ops_per_sec': 1e9 / max(percentile(0.50), 1),
+        'p50_us': percentile(0.50) / 1000,
+        'p99_us': percentile(0.99) / 1000,
+        'peak_alloc_bytes': sum(peaks) / len(peaks),
+    }
+
+
+def retained_per_homework(body: bytes, size: int) -> float:
+    """Память, которую занимают работы после разбора ответа."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    homeworks = homework.check_response(json.loads(body))
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del homeworks
+    return retained / size
+
+
+def check_dicts(response: dict) -> list:
+    """Та же проверка типов полей, но циклом по схеме и без записей.
+
+    Точка сравнения для check_response: во сколько обходится проверка
+    без собранного из схемы кода и компактных записей.
+    """
+    if type(response) is not dict:
+        raise TypeError('Ответ API не словарь')
+    homeworks = response['homeworks']
+    if type(homeworks) is not list:
+        raise TypeError('В ответе API ключ homeworks - не список!')
+    for item in homeworks:
+        if type(item) is not dict:
+            raise TypeError('Работа в ответе API не словарь')
+        for name, types in HOMEWORK_SCHEMA.items():
+            if name in item and type(item[name]) not in types:
+                raise TypeError(f'В ответе API поле {name} работы')
+    return homeworks
+
+
+def iterations_for(size: int) -> int:
+    return max(20, 20000 // (size + 1))
+
+
+def bench_functions(results: dict) -> None:
+    bot = FakeBot()
+    for size in PAYLOAD_SIZES:
+        payload = make_payload(size)
+        body = json.dumps(payload).encode()
+        iterations = iterations_for(size)
+
+        def get_api_answer():
+            return homework.get_api_answer(1000198000)
+
+        with mock.patch.object(
+            requests, 'get', lambda *a, **k: FakeResponse(body)
+        ):
+            results[f'get_api_answer[{size}]'] = measure(
+                get_api_answer, iterations
+            )
+        results[f'check_response[{size}]'] = measure(
+            lambda: homework.check_response(payload), iterations
+        )
+        results[f'check_dicts[{size}]'] = measure(
+            lambda: check_dicts(payload), iterations
+        )
+        results[f'decode_check[{size}]'] = measure(
+            lambda: homework.check_response(json.loads(body)), iterations
+        )
+        if size:
+            results[f'decode_check[{size}]'][
+                'retained_bytes_per_homework'
+            ] = retained_per_homework(body, size)
+
+        def parse_all():
+            for record in payload['homeworks']:
+                homework.parse_status(record)
+
+        results[f'parse_status[{size}]'] = measure(parse_all, iterations)
+
+    # Студент и три дополнительных получателя: отправка идет параллельно
+    with mock.patch.multiple(
+        homework, TELEGRAM_CHAT_ID=1, TELEGRAM_CHAT_IDS=[2, 3, 4]
+    ):
+        results['send_message'] = measure(
+            lambda: homework.send_message(bot, 'Изменился статус'), 20000
+        )
+
+
+def bench_main(results: dict, state_dir: str) -> None:
+    """Итерации main() с подмененными sleep, API и Telegram."""
+    for size in PAYLOAD_SIZES:
+        iterations = iterations_for(size)
+        counter = {'date': 0}
+
+        def fake_get(*args, **kwargs):
+            # Как и настоящее API, каждый раз отдаем новый current_date
+            counter['date'] += 1
+            return FakeResponse(
+                json.dumps(make_payload(size, counter['date'])).encode()
+            )
+
+        timings = []
+
+        def fake_sleep(delay):
+            timings.append(time.perf_counter_ns())
+            if len(timings) > iterations:
+                raise StopLoop
+
+        path = os.path.join(state_dir, f'main-{size}.sqlite3')
+        with mock.patch.multiple(
+            homework,
+            PRACTICUM_TOKEN='token',
+            TELEGRAM_TOKEN='1234:abcdefg',
+            TELEGRAM_CHAT_ID=1,
+            CheckpointStore=functools.partial(CheckpointStore, path),
+            DeliveryIndex=functools.partial(DeliveryIndex, path),
+            Spool=functools.partial(Spool, path + '.spool'),
+            HistoryStore=functools.partial(
+                HistoryStore, path + '.history'
+            ),
+        ), mock.patch.object(telegram, 'Bot', FakeBot), \
+                mock.patch.object(requests, 'get', fake_get), \
+                mock.patch.object(homework.time, 'sleep', fake_sleep):
+            try:
+                homework.main()
+            except StopLoop:
+                pass
+
+        latencies = sorted(
+            after - before for before, after in zip(timings, timings[1:])
+        )
+        results[f'main_iteration[{size}]'] = {
+            'ops_per_sec': 1e9 / max(latencies[len(latencies) // 2], 1),
+            'p50_us': latencies[len(latencies) // 2] / 1000,
+            'p99_us': latencies[int(len(latencies) * 0.99)] / 1000,
+        }
+
+
+def bench_engine(results: dict) -> None:
+    """Один проход движка по всем студентам."""
+    payload = make_payload(1)
+
+    def fetch(current_timestamp, headers):
+        return payload
+
+    for count in TENANT_COUNTS:
+        tenants = [Tenant(f'token-{number}', number) for number in range(count)]
+        engine = Engine(tenants, send=lambda chat_id, message: None,
+                        fetch=fetch)
+
+        async def poll_all():
+            await asyncio.gather(*(engine.poll_once(t) for t in tenants))
+
+        loop = asyncio.new_event_loop()
+        result = measure(lambda: loop.run_until_complete(poll_all()), 20)
+        loop.close()
+        result['tenants_per_sec'] = result['ops_per_sec'] * count
+        results[f'engine_poll_all[{count}]'] = result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = result['ops_per_sec'] / reference['ops_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def print_results(results: dict, baseline: dict) -> None:
+    print(f'{"сценарий":32} {"ops/s":>12} {"p50, мкс":>10} '
+          f'{"p99, мкс":>10} {"пик, байт":>10} {"к базе":>8}')
+    for name, result in results.items():
+        reference = baseline.get(name)
+        ratio = (
+            f'{result["ops_per_sec"] / reference["ops_per_sec"]:.2f}x'
+            if reference else '-'
+        )
+        alloc = result.get('peak_alloc_bytes')
+        print(
+            f'{name:32} {result["ops_per_sec"]:12.1f} '
+            f'{result["p50_us"]:10.1f} {result["p99_us"]:10.1f} '
+            f'{"-" if alloc is None else f"{alloc:.0f}":>10} {ratio:>8}'
+        )
+    for name, result in results.items():
+        if 'retained_bytes_per_homework' in result:
+            reference = baseline.get(name, {}).get(
+                'retained_bytes_per_homework'
+            )
+            print(
+                f'{name}: {result["retained_bytes_per_homework"]:.0f} байт '
+                'на работу после разбора'
+                + (f' (база: {reference:.0f})' if reference else '')
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', action='store_true',
+                        help='сохранить результаты как базовую линию')
+    parser.add_argument('--compare', action='store_true',
+                        help='завершиться с ошибкой при регрессии')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='допустимое замедление, доля (0.3 = 30%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    # Измеряем сам конвейер, а не вывод логов в консоль
+    logging.disable(logging.CRITICAL)
+    results = {}
+    bench_functions(results)
+    with tempfile.TemporaryDirectory() as state_dir:
+        bench_main(results, state_dir)
+    bench_engine(results)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f'Базовая линия сохранена: {args.baseline}')
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, ratio in regressions:
+            print(f'Регрессия {name}: {ratio:.2f}x от базовой линии')
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""Длительный прогон main() на виртуальных часах.
+
+main() работает с VirtualClock: ожидание между запросами не занимает
+времени, и миллион итераций - годы работы бота - проходят за минуты.
+API и Telegram заменены сценарием по номеру запроса: изменения статусов,
+серии ответов 500 (автомат отключения размыкается), тела не в формате
+json, ответы без homeworks и сетевые ошибки Telegram. Запуск из корня
+проекта:
+
+    python benchmarks/soak.py --iterations 1000000
+
+Процесс завершается с кодом 1, если после прогрева (первые 20%
+итераций) выросло число блоков памяти Python, p99 времени итерации
+превысило --max-p99 или выросло к концу прогона, from_date запроса
+разошелся с current_date последнего корректного ответа или на итерацию
+приходится больше --max-log-records записей лога.
+"""
+import argparse
+import functools
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from array import array
+from collections import Counter
+from http import HTTPStatus
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests  # noqa: E402
+import telegram  # noqa: E402
+
+import homework  # noqa: E402
+from checkpoint import CheckpointStore  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from dedup import DeliveryIndex  # noqa: E402
+from delivery import Delivery  # noqa: E402
+from history import HistoryStore, format_date  # noqa: E402
+from spool import Spool  # noqa: E402
+
+WARMUP = 0.2
+# Смена статусов одной работы: ревью, замечания, снова ревью, принята
+STATUS_CYCLE = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+class StopSoak(Exception):
+    """Заданное число итераций пройдено."""
+
+
+class FakeResponse:
+    """Ответ requests с готовым телом и кодом."""
+
+    def __init__(self, body: bytes, status_code: int = HTTPStatus.OK):
+        self.content = body
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ScriptedAPI:
+    """requests.get по сценарию, проверяет from_date каждого запроса."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        self.clock = clock
+        self.calls = 0
+        self.statuses = 0
+        # main() начинает с текущего времени, пустая база состояния
+        self.expected = int(clock.time())
+        self.mismatches = []
+
+    def __call__(self, url, headers=None, params=None, **kwargs):
+        call, now = self.calls, int(self.clock.time())
+        self.calls += 1
+        from_date = params['from_date']
+        if from_date != self.expected and len(self.mismatches) < 10:
+            self.mismatches.append((call, from_date, self.expected))
+
+        if call >= 1000 and call % 1000 < 8:
+            return FakeResponse(b'{}', HTTPStatus.INTERNAL_SERVER_ERROR)
+        if call % 777 == 776:
+            return FakeResponse(b'<html>Bad Gateway</html>')
+        if call % 333 == 332:
+            return FakeResponse(json.dumps({'current_date': now}).encode())
+
+        homeworks = []
+        if call % 50 == 0:
+            self.statuses += 1
+            homeworks.append({
+                'id': call // 200,
+                'homework_name': f'student__hw{call // 200}.zip',
+                'status': STATUS_CYCLE[call // 50 % len(STATUS_CYCLE)],
+                'date_updated': format_date(now),
+                'reviewer_comment': None,
+            })
+        self.expected = now
+        return FakeResponse(json.dumps(
+            {'homeworks': homeworks, 'current_date': now}
+        ).encode())
+
+
+class ScriptedBot:
+    """Telegram: каждая сотая отправка - сетевая ошибка."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.sent = 0
+        self.alerts = 0
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.calls += 1
+        if self.calls % 100 == 0:
+            raise telegram.error.NetworkError('Сценарий: сеть недоступна')
+        self.sent += 1
+        self.alerts += text.startswith(('Сбой', 'Ошибки'))
+
+
+class CountingHandler(logging.Handler):
+    """Счетчик записей лога по уровням без их форматирования."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.levels = Counter()
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+        self.levels[record.levelname] += 1
+
+
+class SoakClock(VirtualClock):
+    """Виртуальные часы, которые измеряют итерации между вызовами sleep.
+
+    Раз в window итераций сохраняется строка отчета: число блоков
+    памяти после сборки мусора, p50, p99 и максимум времени итерации,
+    число записей лога.
+    """
+
+    def __init__(self, iterations: int, window: int, logs: CountingHandler):
+        super().__init__()
+        self.iterations = iterations
+        self.window = window
+        self.logs = logs
+        self.count = 0
+        self.durations = array('d', bytes(8 * window))
+        self.windows = []
+        self._logged = 0
+        self._last = time.perf_counter()
+
+    def sleep(self, seconds: float) -> None:
+        self.durations[self.count % self.window] = (
+            time.perf_counter() - self._last
+        )
+        self.count += 1
+        if self.count % self.window == 0:
+            self._sample()
+        if self.count >= self.iterations:
+            raise StopSoak
+        super().sleep(seconds)
+        self._last = time.perf_counter()
+
+    def _sample(self) -> None:
+        gc.collect()
+        durations = sorted(self.durations)
+        self.windows.append({
+            'iteration': self.count,
+            'days': (self.now - 1600000000.0) / 86400,
+            'blocks': sys.getallocatedblocks(),
+            'p50_us': durations[len(durations) // 2] * 1e6,
+            'p99_us': durations[int(len(durations) * 0.99)] * 1e6,
+            'max_us': durations[-1] * 1e6,
+            'log_records': self.logs.count - self._logged,
+        })
+        self._logged = self.logs.count
+
+
+def capture(factory, created: list):
+    """Фабрика, которая запоминает созданные объекты."""
+    def create(*args, **kwargs):
+        instance = factory(*args, **kwargs)
+        created.append(instance)
+        return instance
+    return create
+
+
+def soak(iterations: int, window: int, state_dir: str) -> dict:
+    """Прогон main() и сырые результаты для проверки."""
+    logs = CountingHandler()
+    root = logging.getLogger()
+    level = root.level
+    root.addHandler(logs)
+    root.setLevel(logging.DEBUG)
+    clock = SoakClock(iterations, window, logs)
+    api, bot, deliveries = ScriptedAPI(clock), ScriptedBot(), []
+    path = os.path.join(state_dir, 'soak.sqlite3')
+    start = time.perf_counter()
+    try:
+        with mock.patch.multiple(
+            homework,
+            PRACTICUM_TOKEN='token',
+            TELEGRAM_TOKEN='1234:abcdefg',
+            TELEGRAM_CHAT_ID=1,
+            setup_logging=lambda: None,
+            CheckpointStore=functools.partial(CheckpointStore, path),
+            DeliveryIndex=functools.partial(DeliveryIndex, path),
+            Spool=functools.partial(Spool, path + '.spool', fsync=False),
+            HistoryStore=functools.partial(HistoryStore, path + '.history'),
+            Delivery=capture(Delivery, deliveries),
+        ), mock.patch.object(telegram, 'Bot', lambda *args, **kwargs: bot), \
+                mock.patch.object(requests, 'get', api):
+            try:
+                homework.main(clock)
+            except StopSoak:
+                pass
+    finally:
+        for delivery in deliveries:
+            delivery.stop(timeout=5)
+        root.removeHandler(logs)
+        root.setLevel(level)
+    return {
+        'iterations': clock.count,
+        'seconds': time.perf_counter() - start,
+        'days': (clock.now - 1600000000.0) / 86400,
+        'windows': clock.windows,
+        'api_calls': api.calls,
+        'statuses': api.statuses,
+        'mismatches': api.mismatches,
+        'sent': bot.sent,
+        'alerts': bot.alerts,
+        'queued_lines': sum(
+            delivery.stats()['queued_lines'] for delivery in deliveries
+        ),
+        'log_levels': dict(logs.levels),
+    }
+
+
+def check(
+    result: dict,
+    memory_growth: float,
+    max_p99_us: float,
+    max_log_records: float,
+) -> list:
+    """Нарушенные условия прогона, пустой список - все в порядке."""
+    failures = []
+    windows = result['windows']
+    if len(windows) < 5:
+        return ['Слишком мало окон: увеличьте --iterations']
+    warm = windows[int(len(windows) * WARMUP):]
+    growth = warm[-1]['blocks'] / warm[0]['blocks'] - 1
+    if growth > memory_growth:
+        failures.append(
+            f'Память выросла на {growth:.1%} после прогрева: '
+            f'{warm[0]["blocks"]} -> {warm[-1]["blocks"]} блоков'
+        )
+    slowest = max(warm, key=lambda row: row['p99_us'])
+    if slowest['p99_us'] > max_p99_us:
+        failures.append(
+            f'p99 итерации {slowest["p99_us"]:.0f} мкс на итерации '
+            f'{slowest["iteration"]} больше {max_p99_us:.0f} мкс'
+        )
+    quarter = max(len(warm) // 4, 1)
+    first = sorted(row['p99_us'] for row in warm[:quarter])[quarter // 2]
+    last = sorted(row['p99_us'] for row in warm[-quarter:])[quarter // 2]
+    if last > 2 * first:
+        failures.append(
+            f'p99 итерации вырос к концу прогона: {first:.0f} -> '
+            f'{last:.0f} мкс'
+        )
+    if result['mismatches'] or not result['api_calls']:
+        failures.append(
+            'from_date не равен current_date последнего корректного '
+            f'ответа (запрос, from_date, ожидался): {result["mismatches"]}'
+        )
+    per_iteration = max(row['log_records'] for row in warm) / (
+        warm[1]['iteration'] - warm[0]['iteration']
+    )
+    if per_iteration > max_log_records:
+        failures.append(
+            f'{per_iteration:.1f} записей лога на итерацию, '
+            f'допустимо {max_log_records}'
+        )
+    return failures
+
+
+def print_result(result: dict) -> None:
+    print(
+        f'{result["iterations"]} итераций, {result["days"]:.0f} дней '
+        f'виртуального времени за {result["seconds"]:.0f} с'
+    )
+    print(
+        f'Запросов к API: {result["api_calls"]}, новых статусов: '
+        f'{result["statuses"]}, сообщений: {result["sent"]} '
+        f'(уведомлений об ошибках: {result["alerts"]}), '
+        f'в очереди: {result["queued_lines"]}'
+    )
+    print(f'Записи лога: {result["log_levels"]}')
+    print(f'{"итерация":>10} {"дни":>7} {"блоки":>9} {"p50, мкс":>9} '
+          f'{"p99, мкс":>9} {"max, мкс":>9} {"лог":>7}')
+    for row in result['windows']:
+        print(
+            f'{row["iteration"]:>10} {row["days"]:>7.0f} '
+            f'{row["blocks"]:>9} {row["p50_us"]:>9.0f} '
+            f'{row["p99_us"]:>9.0f} {row["max_us"]:>9.0f} '
+            f'{row["log_records"]:>7}'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000000)
+    parser.add_argument('--window', type=int,
+                        help='итераций в строке отчета, по умолчанию 1/20')
+    parser.add_argument('--memory-growth', type=float, default=0.02,
+                        help='допустимый рост памяти после прогрева')
+    parser.add_argument('--max-p99', type=float, default=5000,
+                        help='допустимый p99 итерации, мкс')
+    parser.add_argument('--max-log-records', type=float, default=4)
+    args = parser.parse_args()
+
+    window = args.window or max(args.iterations // 20, 100)
+    with tempfile.TemporaryDirectory() as state_dir:
+        result = soak(args.iterations, window, state_dir)
+    print_result(result)
+    failures = check(
+        result, args.memory_growth, args.max_p99, args.max_log_records
+    )
+    for failure in failures:
+        print(f'ОШИБКА: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
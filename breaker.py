@@ -0,0 +1,177 @@
+"""Автоматы отключения для API Практикума и Telegram.
+
+Пока зависимость отвечает, автомат замкнут (closed). После threshold
+ошибок подряд он размыкается (open) и вызовы сразу завершаются
+CircuitOpenError, не дожидаясь таймаута. Через reset_timeout секунд
+автомат пропускает один пробный вызов (half_open): успех замыкает его,
+ошибка снова размыкает.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+
+from exceptions import APIResponseError, CircuitOpenError
+from metrics import registry
+from settings import (API_BREAKER_RESET, API_BREAKER_THRESHOLD,
+                      TELEGRAM_BREAKER_RESET, TELEGRAM_BREAKER_THRESHOLD)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = registry.gauge(
+    'homework_circuit_state',
+    'Состояние автомата: 0 - замкнут, 1 - пробный вызов, 2 - разомкнут',
+    ('name',)
+)
+CIRCUIT_REJECTED = registry.counter(
+    'homework_circuit_rejected_total',
+    'Вызовы, отклоненные разомкнутым автоматом', ('name',)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Автомат отключения вокруг блокирующего вызова.
+
+    is_failure(error) решает, говорит ли исключение о недоступности
+    зависимости; остальные исключения автомат считает ответом.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int,
+        reset_timeout: float,
+        is_failure: Callable = lambda error: True,
+        clock: Callable = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(name).set(STATE_CODES[CLOSED])
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Вызов func через автомат."""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            self._after_call(error)
+            raise
+        except BaseException:
+            # KeyboardInterrupt и подобные ничего не говорят о зависимости,
+            # но пробный вызов нужно освободить
+            self._release_probe()
+            raise
+        self._after_call(None)
+        return result
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # Следующий вызов сразу станет пробным
+                self.opened_at = self.clock() - self.reset_timeout
+                self._set_state(OPEN)
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset_timeout - self.clock()
+            if self.state == OPEN and retry_in <= 0:
+                self._set_state(HALF_OPEN)
+                return
+            # Пока идет пробный вызов, остальные ждут его результата
+            self.rejected += 1
+            CIRCUIT_REJECTED.labels(self.name).inc()
+            raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def _after_call(self, error) -> None:
+        with self._lock:
+            if error is not None and self.is_failure(error):
+                self.failures += 1
+                if self.state == HALF_OPEN or self.failures >= self.threshold:
+                    if self.state != OPEN:
+                        logger.warning(
+                            'Автомат %s разомкнут после %s ошибок подряд',
+                            self.name, self.failures
+                        )
+                    self.opened_at = self.clock()
+                    self._set_state(OPEN)
+                return
+            if self.state != CLOSED:
+                logger.info('Автомат %s замкнут', self.name)
+            self.failures = 0
+            self._set_state(CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(STATE_CODES[state])
+
+    def snapshot(self) -> dict:
+        """Текущее состояние автомата."""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(
+                    self.opened_at + self.reset_timeout - self.clock(), 0.0
+                )
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_in': retry_in,
+                'rejected': self.rejected,
+            }
+
+
+def api_failure(error: Exception) -> bool:
+    """Недоступность API: сеть, 5xx или тело не в формате json.
+
+    Ответы 4xx относятся к токену конкретного студента, а не к API.
+    """
+    if isinstance(error, APIResponseError) and error.status_code:
+        return error.status_code >= 500
+    return True
+
+
+def telegram_failure(error: Exception) -> bool:
+    """Недоступность Telegram: таймауты и сетевые ошибки.
+
+    BadRequest в python-telegram-bot - наследник NetworkError, но говорит
+    об ошибке в самом сообщении.
+    """
+    import telegram
+
+    return (
+        isinstance(error, telegram.error.NetworkError)
+        and not isinstance(error, telegram.error.BadRequest)
+    )
+
+
+def create_api_breaker(clock: Callable = time.monotonic) -> CircuitBreaker:
+    """Автомат для запросов к API Практикума."""
+    return CircuitBreaker(
+        'practicum', API_BREAKER_THRESHOLD, API_BREAKER_RESET, api_failure,
+        clock
+    )
+
+
+def create_telegram_breaker(
+    clock: Callable = time.monotonic
+) -> CircuitBreaker:
+    """Автомат для отправки сообщений в Telegram."""
+    return CircuitBreaker(
+        'telegram', TELEGRAM_BREAKER_THRESHOLD, TELEGRAM_BREAKER_RESET,
+        telegram_failure, clock
+    )
@@ -0,0 +1,96 @@
+"""Хранилище current_date студентов в SQLite (WAL).
+
+Записи копятся в памяти и сбрасываются одной транзакцией не чаще раза
+в CHECKPOINT_FLUSH_INTERVAL секунд, поэтому в цикле опроса save() почти
+ничего не стоит. При падении теряется не больше одного интервала -
+такие статусы просто будут запрошены повторно.
+"""
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from settings import CHECKPOINT_FLUSH_INTERVAL, STATE_DB_PATH
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Соединение с базой состояния в режиме WAL."""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class CheckpointStore:
+    """Последний current_date для каждого студента (tenant).
+
+    В таблице хранится под именем from_date: current_date - ключевое
+    слово SQLite.
+    """
+
+    def __init__(
+        self,
+        path: str = STATE_DB_PATH,
+        flush_interval: float = CHECKPOINT_FLUSH_INTERVAL,
+        clock: Callable = time.monotonic,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._connection = connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            'tenant TEXT PRIMARY KEY, '
+            'from_date INTEGER NOT NULL)'
+        )
+        self._connection.commit()
+        self._buffer: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_flush = clock()
+
+    def load(self, tenant: str) -> Optional[int]:
+        """Сохраненный current_date студента или None."""
+        with self._lock:
+            if tenant in self._buffer:
+                return self._buffer[tenant]
+            row = self._connection.execute(
+                'SELECT from_date FROM checkpoints WHERE tenant = ?',
+                (tenant,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_all(self) -> Dict[str, int]:
+        """Все сохраненные current_date одним запросом."""
+        with self._lock:
+            result = dict(self._connection.execute(
+                'SELECT tenant, from_date FROM checkpoints'
+            ))
+            result.update(self._buffer)
+        return result
+
+    def save(self, tenant: str, current_date: int) -> None:
+        """Запоминаем current_date, на диск - пачкой раз в интервал."""
+        with self._lock:
+            self._buffer[tenant] = int(current_date)
+            due = self.clock() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Запись накопленных current_date одной транзакцией."""
+        with self._lock:
+            self._last_flush = self.clock()
+            if not self._buffer:
+                return
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT INTO checkpoints (tenant, from_date) '
+                    'VALUES (?, ?) ON CONFLICT(tenant) '
+                    'DO UPDATE SET from_date = excluded.from_date',
+                    self._buffer.items()
+                )
+            self._buffer.clear()
+
+    def close(self) -> None:
+        """Сброс буфера и закрытие соединения."""
+        self.flush()
+        self._connection.close()
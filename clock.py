@@ -0,0 +1,49 @@
+"""Часы и ожидание цикла main().
+
+По умолчанию main() работает с системными часами. VirtualClock не ждет
+в sleep, а сдвигает время вперед: с ним месяц работы бота проходит за
+минуты (benchmarks/soak.py).
+"""
+import time
+
+
+class SystemClock:
+    """Системные часы.
+
+    Функции модуля time ищутся при каждом вызове, поэтому их подмена
+    в тестах продолжает работать.
+    """
+
+    def time(self) -> float:
+        """Время epoch в секундах."""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Монотонное время для интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """Ожидание."""
+        time.sleep(seconds)
+
+
+class VirtualClock(SystemClock):
+    """Часы, время которых идет только в sleep."""
+
+    def __init__(self, start: float = 1600000000.0) -> None:
+        self.now = float(start)
+
+    def time(self) -> float:
+        """Виртуальное время epoch."""
+        return self.now
+
+    def monotonic(self) -> float:
+        """То же виртуальное время: оно тоже не идет назад."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Мгновенный сдвиг времени вперед."""
+        self.now += max(seconds, 0)
+
+
+system_clock = SystemClock()
@@ -0,0 +1,110 @@
+"""Индекс отправленных статусов, чтобы не присылать один статус дважды.
+
+Ключ - 64-битный отпечаток (студент, id работы, статус, date_updated).
+Последние ключи держим в LRU в памяти, все - в таблице SQLite без rowid,
+размер которой ограничен DEDUP_MAX_ROWS.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from checkpoint import connect
+from settings import DEDUP_CACHE_SIZE, DEDUP_MAX_ROWS, STATE_DB_PATH
+
+PRUNE_EVERY = 1000
+
+
+def fingerprint(tenant: str, homework: dict) -> int:
+    """64-битный отпечаток статуса работы."""
+    homework_id = homework.get('id', homework.get('homework_name'))
+    raw = (
+        f'{tenant}\0{homework_id}\0{homework.get("status")}'
+        f'\0{homework.get("date_updated")}'
+    )
+    digest = hashlib.blake2b(raw.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class DeliveryIndex:
+    """LRU в памяти поверх таблицы delivered в базе состояния."""
+
+    def __init__(
+        self,
+        path: str = STATE_DB_PATH,
+        cache_size: int = DEDUP_CACHE_SIZE,
+        max_rows: int = DEDUP_MAX_ROWS,
+    ) -> None:
+        self.cache_size = cache_size
+        self.max_rows = max_rows
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._connection = connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS delivered ('
+            'key INTEGER PRIMARY KEY, added INTEGER NOT NULL) WITHOUT ROWID'
+        )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS delivered_added ON delivered (added)'
+        )
+        self._connection.commit()
+
+    def _remember(self, key: int) -> None:
+        self._cache[key] = None
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def seen(self, tenant: str, homework: dict) -> bool:
+        """Отправляли ли уже этот статус."""
+        key = fingerprint(tenant, homework)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return True
+            row = self._connection.execute(
+                'SELECT 1 FROM delivered WHERE key = ?', (key,)
+            ).fetchone()
+            if row:
+                self._remember(key)
+            return row is not None
+
+    def check_and_mark(self, tenant: str, homework: dict) -> bool:
+        """Отмечаем статус отправленным, False - если он уже был."""
+        key = fingerprint(tenant, homework)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return False
+            with self._connection:
+                cursor = self._connection.execute(
+                    'INSERT OR IGNORE INTO delivered (key, added) '
+                    'VALUES (?, ?)', (key, int(time.time()))
+                )
+            self._remember(key)
+            if cursor.rowcount == 0:
+                return False
+            self._inserts += 1
+            if self._inserts % PRUNE_EVERY == 0:
+                self._prune()
+        return True
+
+    def _prune(self) -> None:
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM delivered WHERE key IN ('
+                'SELECT key FROM delivered ORDER BY added LIMIT max('
+                '(SELECT count(*) FROM delivered) - ?, 0))',
+                (self.max_rows,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                'SELECT count(*) FROM delivered'
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """Закрытие соединения с базой."""
+        self._connection.close()
@@ -0,0 +1,368 @@
+"""Очередь отправки сообщений в Telegram с ограничением скорости.
+
+Строки статусов, накопившиеся для одного чата, склеиваются в одно
+сообщение, а частота отправки ограничивается token bucket для каждого
+чата и для бота в целом. Отправка идет в отдельном потоке, поэтому
+медленный Telegram не задерживает опрос API; с журналом (spool.py)
+очередь переживает перезапуск. С workers > 1 сообщения в разные чаты
+отправляются одновременно.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from breaker import CircuitBreaker
+from exceptions import CircuitOpenError
+from metrics import record_error, registry
+from settings import (TELEGRAM_CHAT_BURST, TELEGRAM_CHAT_RATE,
+                      TELEGRAM_GLOBAL_BURST, TELEGRAM_GLOBAL_RATE,
+                      TELEGRAM_MESSAGE_LIMIT)
+from spool import Spool
+
+logger = logging.getLogger(__name__)
+
+DELIVERED_LINES = registry.counter(
+    'homework_delivery_lines_total',
+    'Строки сообщений по чатам: sent - отправлены, failed - отброшены',
+    ('chat_id', 'result')
+)
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'clock')
+
+    def __init__(
+        self, rate: float, capacity: int, clock: Callable = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Сколько секунд ждать до появления токена, 0 - токен есть."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Забрать токен, предварительно проверив wait_time."""
+        self._refill()
+        self.tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        """Запрет отправки на seconds секунд (ответ Telegram RetryAfter)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class Delivery:
+    """Отправка сообщений из очереди фоновым потоком.
+
+    send(chat_id, text) - блокирующая функция, например
+    functools.partial(homework.deliver, bot).
+    """
+
+    def __init__(
+        self,
+        send: Callable,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: int = TELEGRAM_CHAT_BURST,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        global_burst: int = TELEGRAM_GLOBAL_BURST,
+        max_length: int = TELEGRAM_MESSAGE_LIMIT,
+        clock: Callable = time.monotonic,
+        spool: Optional[Spool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        workers: int = 1,
+    ) -> None:
+        self.send = send
+        self.spool = spool
+        self.breaker = breaker
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_length = max_length
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self.chat_buckets: Dict = {}
+        self._pending: Dict = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._started = clock()
+        # Строки, которые забраны из очереди и сейчас отправляются, и чаты,
+        # в которые идет отправка при workers > 1
+        self._inflight = 0
+        self._busy: set = set()
+        self._executor = None
+        if workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='delivery'
+            )
+        self.sent_messages = 0
+        self.sent_lines = 0
+        self.failed_lines = 0
+        # Отправленные и отброшенные строки по чатам
+        self.chat_lines: Dict = {}
+        if spool is not None:
+            for entry_id, chat_id, message in spool.pending():
+                self._enqueue(chat_id, entry_id, message)
+
+    def _enqueue(self, chat_id, entry_id: Optional[int], message: str) -> None:
+        with self._condition:
+            self._pending.setdefault(chat_id, deque()).append(
+                (entry_id, message)
+            )
+            self._condition.notify_all()
+
+    def submit(self, chat_id, message: str) -> None:
+        """Постановка строки в очередь чата, не ждет отправки.
+
+        Со spool строка сначала дописывается в журнал на диске.
+        """
+        entry_id = None
+        if self.spool is not None:
+            entry_id = self.spool.append(chat_id, message)
+        self._enqueue(chat_id, entry_id, message)
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst, self.clock)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _take_batch(self, lines: deque) -> list:
+        """Забираем из очереди столько строк, сколько влезет в сообщение."""
+        batch = [lines.popleft()]
+        length = len(batch[0][1])
+        while lines and length + 1 + len(lines[0][1]) <= self.max_length:
+            length += 1 + len(lines[0][1])
+            batch.append(lines.popleft())
+        return batch
+
+    def flush_once(self) -> Optional[float]:
+        """Отправка всего, что разрешают лимиты.
+
+        Возвращает время ожидания до следующей возможной отправки
+        или None, если очередь пуста. С workers > 1 не ждет отправки:
+        в каждый чат одновременно идет не больше одного сообщения, а
+        завершение отправки будит поток очереди.
+        """
+        next_wait, ready = None, []
+        # Снимок ключей под блокировкой: submit и _requeue из других
+        # потоков меняют очередь
+        with self._condition:
+            chat_ids = list(self._pending)
+        for chat_id in chat_ids:
+            with self._condition:
+                if chat_id in self._busy:
+                    continue
+                lines = self._pending.get(chat_id)
+                if not lines:
+                    self._pending.pop(chat_id, None)
+                    continue
+                bucket = self._bucket(chat_id)
+                wait = max(bucket.wait_time(), self.global_bucket.wait_time())
+                if wait > 0:
+                    next_wait = wait if next_wait is None else min(
+                        next_wait, wait
+                    )
+                    continue
+                bucket.take()
+                self.global_bucket.take()
+                batch = self._take_batch(lines)
+                self._inflight += len(batch)
+                ready.append((chat_id, batch))
+                if self._executor is not None:
+                    self._busy.add(chat_id)
+
+        if self._executor is not None:
+            # Чаты независимы: медленный чат не задерживает остальные
+            for chat_id, batch in ready:
+                self._executor.submit(
+                    self._send_batch, chat_id, batch
+                ).add_done_callback(
+                    functools.partial(self._release, chat_id, batch)
+                )
+            return next_wait
+        for chat_id, batch in ready:
+            self._send_batch(chat_id, batch)
+            self._release(chat_id, batch)
+        return 0.0 if ready else next_wait
+
+    def _release(self, chat_id, batch: list, future=None) -> None:
+        with self._condition:
+            self._busy.discard(chat_id)
+            self._inflight -= len(batch)
+            self._condition.notify_all()
+
+    def _ack(self, batch: list) -> None:
+        if self.spool is not None:
+            self.spool.ack(entry_id for entry_id, _ in batch)
+
+    def _send_batch(self, chat_id, batch: list) -> None:
+        # python-telegram-bot загружается при первой отправке
+        import telegram
+
+        text = '\n'.join(message for _, message in batch)
+        start = time.perf_counter()
+        try:
+            if self.breaker is None:
+                self.send(chat_id, text)
+            else:
+                self.breaker.call(self.send, chat_id, text)
+        except CircuitOpenError as error:
+            # Telegram недоступен: не тратим время на заведомо неудачный вызов
+            logger.debug('%s', error, extra={'chat_id': chat_id})
+            self._requeue(
+                chat_id, batch, max(error.retry_in, 1 / self.chat_rate)
+            )
+        except telegram.error.RetryAfter as error:
+            record_error(error)
+            logger.warning(
+                'Превышен лимит Telegram для чата %s, повтор через %s с',
+                chat_id, error.retry_after, extra={'chat_id': chat_id}
+            )
+            self._requeue(chat_id, batch, error.retry_after)
+        except telegram.error.BadRequest as error:
+            # BadRequest - наследник NetworkError, но при повторе не исчезнет
+            self._drop(chat_id, batch, text, error)
+        except (telegram.error.TimedOut, telegram.error.NetworkError) as error:
+            record_error(error)
+            logger.warning(
+                'Сетевая ошибка Telegram, повтор: %s', text,
+                extra={'chat_id': chat_id}
+            )
+            self._requeue(chat_id, batch, 1 / self.chat_rate)
+        except telegram.error.TelegramError as error:
+            self._drop(chat_id, batch, text, error)
+        except Exception as error:
+            # Поток отправки не должен падать из-за непредвиденной ошибки
+            record_error(error)
+            logger.error(
+                'Сбой при отправке в Telegram, повтор: %s', error,
+                extra={'chat_id': chat_id}
+            )
+            self._requeue(chat_id, batch, 1 / self.chat_rate)
+        else:
+            latency = round(time.perf_counter() - start, 4)
+            self._ack(batch)
+            with self._condition:
+                self.sent_messages += 1
+                self.sent_lines += len(batch)
+                self._count(chat_id, 'sent', len(batch))
+            logger.info(
+                'Бот отправил сообщение: %s', text,
+                extra={'chat_id': chat_id, 'latency': latency}
+            )
+
+    def _drop(self, chat_id, batch: list, text: str, error) -> None:
+        record_error(error)
+        self._ack(batch)
+        with self._condition:
+            self.failed_lines += len(batch)
+            self._count(chat_id, 'failed', len(batch))
+        logger.error(
+            'Не удалось отправить сообщение в Telegram: %s', text,
+            extra={'chat_id': chat_id}
+        )
+
+    def _count(self, chat_id, result: str, lines: int) -> None:
+        counts = self.chat_lines.setdefault(
+            chat_id, {'sent': 0, 'failed': 0}
+        )
+        counts[result] += lines
+        DELIVERED_LINES.labels(chat_id, result).inc(lines)
+
+    def _requeue(self, chat_id, batch: list, delay: float) -> None:
+        with self._condition:
+            lines = self._pending.setdefault(chat_id, deque())
+            lines.extendleft(reversed(batch))
+            self._bucket(chat_id).block(delay)
+
+    def stats(self) -> dict:
+        """Пропускная способность, глубина очереди и итоги по чатам.
+
+        chats - {chat_id: {'sent': строк, 'failed': строк}}.
+        """
+        with self._condition:
+            queued = sum(len(lines) for lines in self._pending.values())
+            chats = sum(1 for lines in self._pending.values() if lines)
+            per_chat = {
+                chat_id: dict(counts)
+                for chat_id, counts in self.chat_lines.items()
+            }
+        elapsed = max(self.clock() - self._started, 1e-9)
+        return {
+            'queued_lines': queued,
+            'queued_chats': chats,
+            'sent_messages': self.sent_messages,
+            'sent_lines': self.sent_lines,
+            'failed_lines': self.failed_lines,
+            'messages_per_second': self.sent_messages / elapsed,
+            'chats': per_chat,
+        }
+
+    def _run(self) -> None:
+        while self._running:
+            wait = self.flush_once()
+            if wait == 0:
+                continue
+            with self._condition:
+                if not self._running:
+                    break
+                if wait is None and any(
+                    lines for chat_id, lines in self._pending.items()
+                    if chat_id not in self._busy
+                ):
+                    continue
+                self._condition.wait(timeout=wait)
+
+    def start(self) -> None:
+        """Запуск фонового потока отправки."""
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name='delivery', daemon=True
+        )
+        self._thread.start()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание отправки всей очереди работающим потоком.
+
+        Возвращает False, если за timeout секунд очередь не опустела.
+        Таймаут считается по системным часам, а не по clock.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._inflight or any(self._pending.values()):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка потока отправки."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,288 @@
+"""Многопользовательский режим: опрос API для всех студентов в одном цикле.
+
+Синхронные requests и python-telegram-bot выполняются в пуле потоков,
+а одновременное число запросов ограничено семафором ENGINE_CONCURRENCY.
+"""
+import asyncio
+import functools
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from alerts import ErrorAggregator
+from breaker import (CircuitBreaker, create_api_breaker,
+                     create_telegram_breaker)
+from checkpoint import CheckpointStore
+from dedup import DeliveryIndex
+from delivery import Delivery
+from history import HistoryStore
+from homework import (check_response, create_bot, deliver, fetch_api_answer,
+                      parse_status, start_webhook)
+from logs import setup_logging
+from metrics import LOOP_LAG, record_error, registry, serve
+from scheduler import FixedScheduler, create_scheduler
+from settings import (ENGINE_CONCURRENCY, LEASE_TTL, RETRY_TIME, SPOOL_PATH,
+                      TELEGRAM_GLOBAL_RATE, TELEGRAM_POOL_SIZE, TELEGRAM_TOKEN,
+                      TENANTS_FILE, WEBHOOK_RECONCILE_TIME)
+from sharding import LeaseStore, Ownership
+from spool import Spool
+from tenants import Tenant, load_tenants
+
+logger = logging.getLogger(__name__)
+
+
+class Engine:
+    """Асинхронный опрос API Практикума для списка студентов.
+
+    fetch(current_timestamp, headers) -> dict и send(chat_id, message)
+    блокирующие функции, по умолчанию - из homework.py.
+    """
+
+    def __init__(
+        self,
+        tenants: Iterable[Tenant],
+        send: Callable,
+        fetch: Callable = fetch_api_answer,
+        concurrency: int = ENGINE_CONCURRENCY,
+        retry_time: int = RETRY_TIME,
+        checkpoints: Optional[CheckpointStore] = None,
+        delivered: Optional[DeliveryIndex] = None,
+        scheduler: Optional[FixedScheduler] = None,
+        alerts: Optional[ErrorAggregator] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        owns: Optional[Callable] = None,
+        history: Optional[HistoryStore] = None,
+    ) -> None:
+        self.tenants = list(tenants)
+        self.send = send
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.retry_time = retry_time
+        self.checkpoints = checkpoints
+        self.delivered = delivered
+        self.scheduler = scheduler or FixedScheduler(retry_time)
+        self.timestamps: Dict[str, int] = (
+            checkpoints.load_all() if checkpoints else {}
+        )
+        self.alerts = alerts or ErrorAggregator()
+        # Один автомат на всех студентов: API у них общий
+        self.breaker = breaker
+        # owns(tenant_key) - опрашивает ли студента этот процесс (sharding.py)
+        self.owns = owns
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = None
+        self._loop = None
+
+    async def _call(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    async def poll_once(self, tenant: Tenant) -> float:
+        """Одна итерация main() для одного студента.
+
+        Возвращает время до следующего опроса от планировщика.
+        """
+        # Семафор привязан к циклу событий, в котором его впервые ждали
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        current_timestamp = self.timestamps.get(tenant.key, int(time.time()))
+        async with self._semaphore:
+            try:
+                response = await self._call(
+                    self._fetch, current_timestamp, tenant.headers
+                )
+                homeworks = check_response(response)
+                if len(homeworks) == 0:
+                    logger.debug(
+                        '%s: Отсутствуют новые статусы в ответе API',
+                        tenant.key, extra={'tenant': tenant.key}
+                    )
+                for homework in homeworks:
+                    await self._notify(tenant, homework)
+
+                current_timestamp = response.get(
+                    'current_date', int(time.time()) - self.retry_time
+                )
+                self.timestamps[tenant.key] = current_timestamp
+                if self.checkpoints is not None:
+                    self.checkpoints.save(tenant.key, current_timestamp)
+                recovered = self.alerts.record_success(tenant.chat_id)
+                if recovered:
+                    await self._send(tenant, recovered)
+                return self.scheduler.record_success(tenant.key, homeworks)
+            except Exception as error:
+                logger.error(
+                    '%s: Сбой в работе программы: %s', tenant.key, error,
+                    extra={'tenant': tenant.key}
+                )
+                record_error(error)
+                alert = self.alerts.record_failure(tenant.chat_id, error)
+                if alert:
+                    await self._send(tenant, alert)
+                return self.scheduler.record_failure(tenant.key, error)
+
+    def _fetch(self, current_timestamp: int, headers: dict) -> dict:
+        if self.breaker is None:
+            return self.fetch(current_timestamp, headers)
+        return self.breaker.call(self.fetch, current_timestamp, headers)
+
+    async def _notify(self, tenant: Tenant, homework) -> None:
+        try:
+            message = parse_status(homework)
+        except KeyError as error:
+            record_error(error)
+            logger.error(
+                '%s: Пропущена работа: %s', tenant.key, error, extra={
+                    'tenant': tenant.key,
+                    'homework': homework.get('homework_name'),
+                }
+            )
+            return
+        if not self._is_new(tenant, homework):
+            return
+        await self._send(tenant, message)
+        if self.history is not None:
+            self.history.record(tenant.key, homework)
+
+    def _is_new(self, tenant: Tenant, homework: dict) -> bool:
+        if self.delivered is None:
+            return True
+        return self.delivered.check_and_mark(tenant.key, homework)
+
+    async def _send(self, tenant: Tenant, message: str) -> None:
+        import telegram
+
+        try:
+            await self._call(self.send, tenant.chat_id, message)
+        except telegram.error.TelegramError:
+            logger.error(
+                '%s: Не удалось отправить сообщение в Telegram: %s',
+                tenant.key, message,
+                extra={'tenant': tenant.key, 'chat_id': tenant.chat_id}
+            )
+        else:
+            logger.debug(
+                '%s: Сообщение передано: %s', tenant.key, message,
+                extra={'tenant': tenant.key, 'chat_id': tenant.chat_id}
+            )
+
+    def _take_over(self, tenant: Tenant) -> None:
+        # current_date последнего владельца студента из базы состояния
+        if self.checkpoints is not None:
+            saved = self.checkpoints.load(tenant.key)
+            if saved is not None:
+                self.timestamps[tenant.key] = saved
+
+    async def _poll_forever(self, tenant: Tenant) -> None:
+        # Разносим студентов по интервалу, чтобы не опрашивать всех разом
+        await asyncio.sleep(random.uniform(0, self.retry_time))
+        owned = True
+        while True:
+            if self.owns is not None:
+                if not self.owns(tenant.key):
+                    owned = False
+                    await asyncio.sleep(LEASE_TTL / 3)
+                    continue
+                if not owned:
+                    self._take_over(tenant)
+                    owned = True
+            delay = await self.poll_once(tenant)
+            planned = time.monotonic() + delay
+            await asyncio.sleep(delay)
+            LOOP_LAG.set(max(time.monotonic() - planned, 0))
+
+    async def run(self) -> None:
+        """Запуск бесконечного опроса всех студентов."""
+        logger.info('Запуск опроса для %s студентов', len(self.tenants))
+        try:
+            await asyncio.gather(
+                *(self._poll_forever(tenant) for tenant in self.tenants)
+            )
+        finally:
+            if self.checkpoints is not None:
+                self.checkpoints.flush()
+            if self.history is not None:
+                self.history.flush()
+            self._executor.shutdown(wait=False)
+
+
+def main() -> None:
+    """Запуск многопользовательского бота."""
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        raise SystemExit('Нужно установить переменную TELEGRAM_TOKEN')
+
+    tenants = load_tenants(TENANTS_FILE)
+    if not tenants:
+        raise SystemExit(f'Список студентов пуст: {TENANTS_FILE}')
+
+    run(tenants)
+
+
+def run(
+    tenants: list,
+    spool_path: str = SPOOL_PATH,
+    worker: Optional[str] = None,
+    workers: int = 1,
+) -> None:
+    """Опрос студентов до остановки процесса.
+
+    worker - имя процесса supervisor.py из workers: тогда процесс опрашивает
+    только арендованных студентов, а лимит Telegram на бота делится между
+    процессами. Метрики и прием событий в этом режиме не запускаются:
+    процессам пришлось бы делить один порт.
+    """
+    delivery = Delivery(
+        send=functools.partial(deliver, create_bot()), spool=Spool(spool_path),
+        global_rate=TELEGRAM_GLOBAL_RATE / workers,
+        workers=TELEGRAM_POOL_SIZE,
+        breaker=create_telegram_breaker()
+    )
+    delivery.start()
+    delivered = DeliveryIndex()
+    checkpoints = CheckpointStore()
+    history = HistoryStore()
+    scheduler = create_scheduler()
+    ownership = None
+    if worker is None:
+        registry.callback(
+            'homework_delivery_queue_lines', 'Строки в очереди отправки',
+            lambda: delivery.stats()['queued_lines']
+        )
+        serve()
+        if start_webhook(tenants, delivery, delivered, history):
+            scheduler = FixedScheduler(WEBHOOK_RECONCILE_TIME)
+    else:
+        ownership = Ownership(
+            worker, (tenant.key for tenant in tenants), LeaseStore(),
+            on_release=checkpoints.flush
+        )
+        ownership.start()
+    engine = Engine(
+        tenants,
+        send=delivery.submit,
+        checkpoints=checkpoints,
+        delivered=delivered,
+        scheduler=scheduler,
+        breaker=create_api_breaker(),
+        owns=ownership.owns if ownership is not None else None,
+        history=history,
+    )
+    try:
+        asyncio.run(engine.run())
+    finally:
+        if ownership is not None:
+            ownership.stop()
+        delivery.stop(timeout=RETRY_TIME)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,16 @@
 class APIResponseError(Exception):
-    pass
+
+    def __init__(self, message: str = '', status_code=None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(Exception):
+    """Вызов не выполнен: автомат разомкнут после серии ошибок."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(
+            f'{name} недоступен, повтор через {retry_in:.0f} с'
+        )
+        self.name = name
+        self.retry_in = retry_in
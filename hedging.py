@@ -0,0 +1,145 @@
+"""Повторный запрос к API, если первый отвечает дольше обычного.
+
+Если ответа на запрос нет дольше наблюдаемого p95 времени ответа,
+отправляется второй такой же запрос и используется тот ответ, что пришел
+первым. Повторы расходуют бюджет: не больше HEDGE_BUDGET от всех
+запросов, поэтому при общей деградации API нагрузка на него почти не
+растет. Пока времен ответа накоплено меньше HEDGE_MIN_SAMPLES, повторов
+нет и запрос выполняется в вызывающем потоке.
+"""
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from metrics import registry
+from settings import (HEDGE_BUDGET, HEDGE_MIN_SAMPLES, HEDGE_QUANTILE,
+                      HEDGE_WINDOW, HEDGE_WORKERS)
+
+# Неизрасходованный бюджет копится не больше чем на столько повторов
+MAX_CREDIT = 10.0
+
+HEDGES_SENT = registry.counter(
+    'homework_api_hedges_total', 'Повторные запросы к API'
+)
+HEDGES_WON = registry.counter(
+    'homework_api_hedges_won_total',
+    'Повторные запросы, ответ на которые пришел раньше первого'
+)
+HEDGE_DELAY = registry.gauge(
+    'homework_api_hedge_delay_seconds',
+    'Время ожидания ответа до повторного запроса'
+)
+
+
+def _discard(discard: Callable, future) -> None:
+    if future.exception() is None:
+        discard(future.result())
+
+
+class Hedger:
+    """Запуск блокирующего запроса с повтором по p95 времени ответа."""
+
+    def __init__(
+        self,
+        budget: float = HEDGE_BUDGET,
+        quantile: float = HEDGE_QUANTILE,
+        window: int = HEDGE_WINDOW,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_workers: int = HEDGE_WORKERS,
+        clock: Callable = time.perf_counter,
+    ) -> None:
+        self.budget = budget
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.clock = clock
+        self.requests = 0
+        self.hedges = 0
+        self.won = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._credit = 0.0
+        self._lock = threading.Lock()
+        # Потоки создаются по мере надобности
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='hedge'
+        )
+
+    def delay(self) -> Optional[float]:
+        """Время ожидания до повтора или None, если данных мало."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[int(len(latencies) * self.quantile)]
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            self.hedges += 1
+        HEDGES_SENT.inc()
+        return True
+
+    def call(self, func: Callable, *args, discard: Optional[Callable] = None):
+        """Результат func(*args) от первого завершившегося запроса.
+
+        Ошибка первого запроса, полученная до повтора, не повторяется:
+        повтор нужен против медленных ответов, а не против отказов.
+        Неиспользованный ответ передается в discard, например чтобы
+        закрыть потоковый ответ и вернуть соединение в пул.
+        """
+        with self._lock:
+            self.requests += 1
+            self._credit = min(self._credit + self.budget, MAX_CREDIT)
+        start = self.clock()
+        result = self._call(func, args, discard)
+        # Время ответа с точки зрения вызывающего: опоздавший запрос,
+        # на который уже пришел повтор, не поднимает порог повтора
+        with self._lock:
+            self._latencies.append(self.clock() - start)
+        return result
+
+    def _call(self, func: Callable, args: tuple, discard: Optional[Callable]):
+        delay = self.delay()
+        if delay is None:
+            return func(*args)
+
+        HEDGE_DELAY.set(delay)
+        primary = self._executor.submit(func, *args)
+        done, _ = wait((primary,), timeout=delay)
+        if done or not self._take_credit():
+            return primary.result()
+
+        hedge = self._executor.submit(func, *args)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Если оба ответа уже готовы, предпочитаем первый запрос
+            for future in sorted(done, key=lambda item: item is hedge):
+                if future.exception() is None:
+                    if discard is not None:
+                        loser = primary if future is hedge else hedge
+                        loser.add_done_callback(
+                            functools.partial(_discard, discard)
+                        )
+                    if future is hedge:
+                        with self._lock:
+                            self.won += 1
+                        HEDGES_WON.inc()
+                    return future.result()
+        return primary.result()
+
+    def stats(self) -> dict:
+        """Счетчики запросов и повторов."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'won': self.won,
+            }
+
+
+hedger = Hedger()
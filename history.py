@@ -0,0 +1,361 @@
+"""История смены статусов работ и запросы к ней из командной строки.
+
+Каждый новый статус, прошедший parse_status, дописывается строкой в
+таблицу history (SQLite, WAL). Записи копятся в памяти и пишутся пачкой,
+как и current_date в checkpoint.py. При записи статуса approved или
+rejected сразу же сохраняется и ревью в таблицу reviews - время от
+предыдущего статуса reviewing, - поэтому сводки по времени ревью не
+требуют прохода по всей истории.
+
+    python history.py range --tenant 1a2b3c4d5e6f --since 2022-01-01
+    python history.py reviews --homework 'username__hw05_final.zip'
+    python history.py rejected --min 2
+    python history.py export --format csv --output history.csv
+"""
+import argparse
+import calendar
+import csv
+import json
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Iterator, List, Mapping, Optional
+
+from checkpoint import connect
+from settings import (HISTORY_BATCH_SIZE, HISTORY_DB_PATH,
+                      HISTORY_FLUSH_INTERVAL)
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+VERDICTS = ('approved', 'rejected')
+COLUMNS = ('tenant', 'homework_id', 'homework_name', 'status', 'updated',
+           'observed')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS history ('
+    'id INTEGER PRIMARY KEY, '
+    'tenant TEXT NOT NULL, '
+    'homework_id INTEGER, '
+    'homework_name TEXT NOT NULL, '
+    'status TEXT NOT NULL, '
+    'updated INTEGER NOT NULL, '
+    'observed INTEGER NOT NULL)',
+    # Повторно полученный статус не дублируется
+    'CREATE UNIQUE INDEX IF NOT EXISTS history_homework '
+    'ON history (tenant, homework_name, updated, status)',
+    'CREATE INDEX IF NOT EXISTS history_updated ON history (updated)',
+    "CREATE INDEX IF NOT EXISTS history_rejected "
+    "ON history (tenant, homework_name) WHERE status = 'rejected'",
+    'CREATE TABLE IF NOT EXISTS reviews ('
+    'tenant TEXT NOT NULL, '
+    'homework_name TEXT NOT NULL, '
+    'started INTEGER NOT NULL, '
+    'finished INTEGER NOT NULL, '
+    'verdict TEXT NOT NULL, '
+    'duration INTEGER NOT NULL, '
+    'PRIMARY KEY (tenant, homework_name, started)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS reviews_finished '
+    'ON reviews (finished, verdict, duration)',
+    # Сводка и медиана за все время - только по индексу, без сортировки
+    'CREATE INDEX IF NOT EXISTS reviews_duration '
+    'ON reviews (verdict, duration)',
+)
+
+INSERT_ROW = (
+    'INSERT OR IGNORE INTO history (' + ', '.join(COLUMNS) + ') VALUES ('
+    + ', '.join(f':{column}' for column in COLUMNS) + ')'
+)
+# Ревью, закончившееся этой записью: ближайший более ранний статус
+# работы - reviewing
+REVIEW_BEFORE = (
+    'INSERT OR IGNORE INTO reviews '
+    'SELECT tenant, homework_name, updated, :updated, :status, '
+    ':updated - updated FROM ('
+    'SELECT tenant, homework_name, updated, status FROM history '
+    'WHERE tenant = :tenant AND homework_name = :homework_name '
+    'AND updated < :updated ORDER BY updated DESC LIMIT 1) '
+    "WHERE status = 'reviewing'"
+)
+# Ревью, начатое этой записью, если вердикт уже записан раньше нее
+REVIEW_AFTER = (
+    'INSERT OR IGNORE INTO reviews '
+    'SELECT tenant, homework_name, :updated, updated, status, '
+    'updated - :updated FROM ('
+    'SELECT tenant, homework_name, updated, status FROM history '
+    'WHERE tenant = :tenant AND homework_name = :homework_name '
+    'AND updated > :updated ORDER BY updated LIMIT 1) '
+    "WHERE status IN ('approved', 'rejected')"
+)
+
+
+def parse_date(value, default: int) -> int:
+    """date_updated из ответа API в секундах epoch."""
+    try:
+        return calendar.timegm(time.strptime(value, DATE_FORMAT))
+    except (TypeError, ValueError):
+        return default
+
+
+def _where(
+    filters: dict,
+    time_column: str = 'updated',
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    conditions: tuple = (),
+):
+    """Условие WHERE и параметры для заданных фильтров и периода."""
+    conditions, params = list(conditions), []
+    for column, value in filters.items():
+        if value is not None:
+            conditions.append(f'{column} = ?')
+            params.append(value)
+    if since is not None:
+        conditions.append(f'{time_column} >= ?')
+        params.append(since)
+    if until is not None:
+        conditions.append(f'{time_column} < ?')
+        params.append(until)
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    return where, params
+
+
+def format_date(timestamp: int) -> str:
+    """Секунды epoch в формате date_updated."""
+    return time.strftime(DATE_FORMAT, time.gmtime(timestamp))
+
+
+class HistoryStore:
+    """Только дописываемая история статусов с пакетной записью."""
+
+    def __init__(
+        self,
+        path: str = HISTORY_DB_PATH,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        clock: Callable = time.monotonic,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.clock = clock
+        self._connection = connect(path)
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        self._connection.commit()
+        self._connection.row_factory = sqlite3.Row
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._last_flush = clock()
+
+    def record(self, tenant: str, homework: Mapping) -> None:
+        """Запоминаем новый статус работы, на диск - пачкой."""
+        observed = int(time.time())
+        row = {
+            'tenant': tenant,
+            'homework_id': homework.get('id'),
+            'homework_name': homework.get('homework_name'),
+            'status': homework.get('status'),
+            'updated': parse_date(homework.get('date_updated'), observed),
+            'observed': observed,
+        }
+        with self._lock:
+            self._buffer.append(row)
+            due = (
+                len(self._buffer) >= self.batch_size
+                or self.clock() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Запись накопленных статусов одной транзакцией."""
+        with self._lock:
+            self._last_flush = self.clock()
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return
+            with self._connection:
+                self._connection.executemany(INSERT_ROW, rows)
+                # Ревью по date_updated, даже если статусы одной работы
+                # пришли не по порядку
+                self._connection.executemany(REVIEW_BEFORE, (
+                    row for row in rows if row['status'] in VERDICTS
+                ))
+                self._connection.executemany(REVIEW_AFTER, (
+                    row for row in rows if row['status'] == 'reviewing'
+                ))
+
+    def query(
+        self,
+        tenant: Optional[str] = None,
+        homework: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Iterator[dict]:
+        """Статусы за период [since, until) по порядку date_updated."""
+        where, params = _where(
+            {'tenant': tenant, 'homework_name': homework, 'status': status},
+            'updated', since, until
+        )
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT {", ".join(COLUMNS)} FROM history{where} '
+                'ORDER BY updated, id', params
+            )
+        for row in rows:
+            yield dict(row)
+
+    def review_stats(
+        self,
+        tenant: Optional[str] = None,
+        homework: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[dict]:
+        """Число ревью и их длительность в секундах по вердиктам."""
+        where, params = _where(
+            {'tenant': tenant, 'homework_name': homework},
+            'finished', since, until
+        )
+        # С фильтрами выгоднее индексы по студенту и времени, а индекс
+        # по длительности нужен только для сводки за все время: унарный
+        # плюс не дает SQLite выбрать его
+        plus = '+' if where else ''
+        verdict_where = (
+            f'{where} AND +verdict = ?' if where else ' WHERE verdict = ?'
+        )
+        with self._lock:
+            stats = [dict(row) for row in self._connection.execute(
+                'SELECT verdict, count(*) AS reviews, '
+                'avg(duration) AS average, '
+                'min(duration) AS fastest, '
+                'max(duration) AS slowest '
+                f'FROM reviews{where} GROUP BY {plus}verdict ORDER BY verdict',
+                params
+            )]
+            for item in stats:
+                item['median'] = self._connection.execute(
+                    f'SELECT duration FROM reviews{verdict_where} '
+                    f'ORDER BY {plus}duration LIMIT 1 OFFSET ?',
+                    params + [item['verdict'], item['reviews'] // 2]
+                ).fetchone()[0]
+        return stats
+
+    def rejected(
+        self, min_count: int = 2, tenant: Optional[str] = None
+    ) -> List[dict]:
+        """Работы, отклоненные не меньше min_count раз."""
+        # Условие на статус - литералом, чтобы работал частичный индекс
+        where, params = _where(
+            {'tenant': tenant}, conditions=("status = 'rejected'",)
+        )
+        with self._lock:
+            return [dict(row) for row in self._connection.execute(
+                'SELECT tenant, homework_name, count(*) AS rejected '
+                f'FROM history{where} GROUP BY tenant, homework_name '
+                'HAVING count(*) >= ? ORDER BY rejected DESC, tenant, '
+                'homework_name', params + [min_count]
+            )]
+
+    def close(self) -> None:
+        """Сброс буфера и закрытие соединения."""
+        self.flush()
+        self._connection.close()
+
+
+def parse_time(value: str) -> int:
+    """Аргумент командной строки: epoch, дата или дата и время UTC."""
+    if value.isdigit():
+        return int(value)
+    for date_format in ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', DATE_FORMAT):
+        try:
+            return calendar.timegm(time.strptime(value, date_format))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f'Некорректное время: {value}')
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=HISTORY_DB_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def period(command):
+        command.add_argument('--tenant', help='ключ студента (tenant_key)')
+        command.add_argument('--homework', help='homework_name')
+        command.add_argument('--since', type=parse_time)
+        command.add_argument('--until', type=parse_time)
+        return command
+
+    period(commands.add_parser('range', help='статусы за период')) \
+        .add_argument('--status')
+    period(commands.add_parser('reviews', help='время ревью'))
+    rejected = commands.add_parser('rejected', help='повторные отказы')
+    rejected.add_argument('--tenant')
+    rejected.add_argument('--min', type=int, default=2, dest='min_count')
+    export = period(commands.add_parser('export', help='выгрузка'))
+    export.add_argument('--status')
+    export.add_argument('--format', choices=('jsonl', 'csv'),
+                        default='jsonl')
+    export.add_argument('--output', help='файл, по умолчанию stdout')
+    return parser.parse_args(argv)
+
+
+def write_rows(rows, output, export_format: str) -> int:
+    """Выгрузка строк истории в JSONL или CSV, возвращает их число."""
+    count = 0
+    if export_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=COLUMNS)
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, 1):
+            output.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return count
+
+
+def main(argv=None) -> None:
+    """Запросы к истории из командной строки."""
+    args = parse_args(argv)
+    store = HistoryStore(args.db)
+    try:
+        if args.command == 'range':
+            for row in store.query(args.tenant, args.homework, args.status,
+                                   args.since, args.until):
+                print(
+                    f'{format_date(row["updated"])} {row["tenant"]} '
+                    f'{row["homework_name"]} {row["status"]}'
+                )
+        elif args.command == 'reviews':
+            for item in store.review_stats(args.tenant, args.homework,
+                                           args.since, args.until):
+                print(
+                    f'{item["verdict"]}: {item["reviews"]} ревью, '
+                    f'в среднем {item["average"] / 3600:.1f} ч, '
+                    f'медиана {item["median"] / 3600:.1f} ч, '
+                    f'от {item["fastest"] / 3600:.1f} '
+                    f'до {item["slowest"] / 3600:.1f} ч'
+                )
+        elif args.command == 'rejected':
+            for item in store.rejected(args.min_count, args.tenant):
+                print(
+                    f'{item["tenant"]} {item["homework_name"]}: '
+                    f'{item["rejected"]}'
+                )
+        else:
+            rows = store.query(args.tenant, args.homework, args.status,
+                               args.since, args.until)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8',
+                          newline='') as output:
+                    write_rows(rows, output, args.format)
+            else:
+                write_rows(rows, sys.stdout, args.format)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,159 @@
+import functools
+import itertools
+import json
 import logging
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from typing import Optional
-
-import requests
-import telegram
-
+from typing import TYPE_CHECKING, Callable, Optional
+
+from alerts import ErrorAggregator
+from breaker import (CircuitBreaker, create_api_breaker,
+                     create_telegram_breaker)
+from checkpoint import CheckpointStore
+from clock import SystemClock, system_clock
+from dedup import DeliveryIndex
+from delivery import Delivery
 from exceptions import APIResponseError
+from hedging import hedger
+from history import HistoryStore
+from logs import setup_logging
+from metrics import (API_LATENCY, LOOP_LAG, SEND_LATENCY, record_error,
+                     registry, serve)
+from payloads import payload_cache
+from profiling import LoopProfiler, install_signal
+from records import read_homework
+from scheduler import FixedScheduler, create_scheduler
 from settings import (ENDPOINT, ENDPOINT_TIMEOUT, ENVLIST, HEADERS,
-                      HOMEWORK_STATUSES, PRACTICUM_TOKEN, RETRY_TIME,
-                      TELEGRAM_CHAT_ID, TELEGRAM_TOKEN)
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    handlers=[logging.StreamHandler(stream=sys.stdout)],
-    format='%(asctime)s %(levelname)s %(message)s'
-)
+                      HEDGE_ENABLED, HOMEWORK_STATUSES, HTTP_POOL_ENABLED,
+                      PAYLOAD_CACHE_ENABLED, PRACTICUM_TOKEN, PROFILE,
+                      RETRY_TIME, STREAM_CHUNK_SIZE, STREAM_HOMEWORKS,
+                      TELEGRAM_BASE_URL, TELEGRAM_CHAT_ID, TELEGRAM_CHAT_IDS,
+                      TELEGRAM_POOL_SIZE, TELEGRAM_SEND_RETRIES,
+                      TELEGRAM_TOKEN, WEBHOOK_PORT, WEBHOOK_RECONCILE_TIME)
+from spool import Spool
+from streaming import HomeworkStream
+from tenants import Tenant, tenant_key
+
+# requests и python-telegram-bot импортируются при первом использовании:
+# их загрузка занимает большую часть времени запуска
+if TYPE_CHECKING:
+    import telegram
+
 logger = logging.getLogger(__name__)
 
+# Пул send_message создается при первой отправке в несколько чатов
+_send_executor: Optional[ThreadPoolExecutor] = None
+_send_executor_lock = threading.Lock()
 
-def send_message(bot: telegram.Bot, message: str) -> None:
-    """Отправка Telegram сообщения.
 
-    Пробуем отправить сообщение ботом, в случае исключения - логируем его,
-    если получится - записываем в лог.INFO строку сообщения
+def _get_send_executor() -> ThreadPoolExecutor:
+    global _send_executor
+    with _send_executor_lock:
+        if _send_executor is None:
+            _send_executor = ThreadPoolExecutor(
+                max_workers=TELEGRAM_POOL_SIZE, thread_name_prefix='send'
+            )
+    return _send_executor
+
+
+def deliver(bot: 'telegram.Bot', chat_id, message: str) -> None:
+    """Отправка Telegram сообщения в указанный чат без обработки ошибок."""
+    start = time.perf_counter()
+    try:
+        bot.send_message(chat_id=chat_id, text=message)
+    finally:
+        SEND_LATENCY.observe(time.perf_counter() - start)
+
+
+def create_bot() -> 'telegram.Bot':
+    """Бот с пулом из TELEGRAM_POOL_SIZE соединений к Bot API.
+
+    Пул общий для всех потоков: одновременные отправки в разные чаты идут
+    по уже открытым соединениям.
     """
+    import telegram
+    from telegram.utils.request import Request
+
+    return telegram.Bot(
+        token=str(TELEGRAM_TOKEN), base_url=TELEGRAM_BASE_URL,
+        request=Request(con_pool_size=TELEGRAM_POOL_SIZE)
+    )
+
+
+def recipients() -> list:
+    """Чаты для сообщений бота: TELEGRAM_CHAT_ID и TELEGRAM_CHAT_IDS."""
+    chats = [TELEGRAM_CHAT_ID, *TELEGRAM_CHAT_IDS]
+    return list(dict.fromkeys(chat_id for chat_id in chats if chat_id))
+
+
+def _try_deliver(bot: 'telegram.Bot', chat_id, message: str):
+    import telegram
+
     try:
-        bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
-            text=message
-        )
-    except telegram.error.TelegramError:
-        logger.error(f'Не удалось отправить сообщение в Telegram: {message}')
-    else:
-        logger.info(f'Бот отправил сообщение: {message}')
+        deliver(bot, chat_id, message)
+    except telegram.error.TelegramError as error:
+        return error
+    return None
+
+
+def send_message(bot: 'telegram.Bot', message: str) -> dict:
+    """Отправка Telegram сообщения.
+
+    Сообщение уходит во все чаты recipients() одновременно. Если в
+    какой-то чат не удалось отправить из-за сети, повторяем отправку
+    только в такие чаты, не больше TELEGRAM_SEND_RETRIES раз. Ошибки
+    логируем, удачные отправки записываем в лог.INFO.
+    Возвращает результат по каждому чату: True - сообщение доставлено.
+    """
+    import telegram
+
+    results = {}
+    pending = recipients()
+    for attempt in range(TELEGRAM_SEND_RETRIES + 1):
+        if len(pending) == 1:
+            errors = [_try_deliver(bot, pending[0], message)]
+        else:
+            errors = list(_get_send_executor().map(
+                functools.partial(_try_deliver, bot),
+                pending, itertools.repeat(message)
+            ))
+        retry = []
+        for chat_id, error in zip(pending, errors):
+            results[chat_id] = error is None
+            if error is None:
+                logger.info(
+                    'Бот отправил сообщение: %s', message,
+                    extra={'chat_id': chat_id}
+                )
+            elif (
+                isinstance(error, telegram.error.NetworkError)
+                and not isinstance(error, telegram.error.BadRequest)
+                and attempt < TELEGRAM_SEND_RETRIES
+            ):
+                retry.append(chat_id)
+            else:
+                record_error(error)
+                logger.error(
+                    'Не удалось отправить сообщение в Telegram: %s', message,
+                    extra={'chat_id': chat_id}
+                )
+        if not retry:
+            break
+        pending = retry
+    return results
+
+
+def broadcast(delivery: Delivery, message: str) -> None:
+    """Постановка сообщения в очередь отправки каждого чата recipients().
+
+    Очереди чатов независимы: сбой отправки в один чат повторяется
+    только для него.
+    """
+    for chat_id in recipients():
+        delivery.submit(chat_id, message)
 
 
 def get_api_answer(current_timestamp: Optional[int] = None) -> dict:
@@ -45,35 +164,115 @@ def get_api_answer(current_timestamp: Optional[int] = None) -> dict:
     В случае недоступности - кидаем исключение
     По заданию если ответ эндпоинта не 200 - тоже кидаем исключение
     """
+    return fetch_api_answer(current_timestamp, HEADERS)
+
+
+def fetch_api_answer(current_timestamp: Optional[int], headers: dict) -> dict:
+    """Запрос к API с произвольными заголовками авторизации.
+
+    Общая часть get_api_answer, которую также использует многопользовательский
+    движок (engine.py): у каждого студента свой токен Практикума.
+    С HEDGE_ENABLED медленный запрос дублируется (hedging.py).
+    """
+    if HEDGE_ENABLED:
+        response = hedger.call(request_api, current_timestamp, headers)
+    else:
+        response = request_api(current_timestamp, headers)
+
+    # Тестовые заглушки ответа могут не иметь тела в байтах
+    body = getattr(response, 'content', None)
+    if PAYLOAD_CACHE_ENABLED and isinstance(body, bytes):
+        cached = payload_cache.lookup(body)
+        if cached is not None:
+            return cached
+    else:
+        body = None
+
+    try:
+        result = response.json()
+    except ValueError as error:
+        # В requests 2.26 нет requests.exceptions.JSONDecodeError,
+        # json() бросает наследника ValueError из json или simplejson
+        logger.error('Ошибка в формате json')
+        raise json.JSONDecodeError(
+            'Ошибка в формате json',
+            getattr(error, 'doc', ''),
+            getattr(error, 'pos', 0)
+        )
+
+    if body is not None:
+        payload_cache.learn(body, result)
+
+    return result
+
+
+def request_api(
+    current_timestamp: Optional[int], headers: dict, stream: bool = False
+):
+    """HTTP-запрос к эндпоинту и проверка кода ответа."""
+    import requests
+
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    if HTTP_POOL_ENABLED:
+        from http_pool import get_session
+        client = get_session()
+    else:
+        client = requests
 
+    start = time.perf_counter()
     try:
-        response = requests.get(
+        response = client.get(
             ENDPOINT,
-            headers=HEADERS,
+            headers=headers,
             params=params,
-            timeout=ENDPOINT_TIMEOUT
+            timeout=ENDPOINT_TIMEOUT,
+            stream=stream
         )
     except Exception as error:
         raise Exception(f'Эндпоинт не доступен: {error}')
     else:
         if response.status_code != HTTPStatus.OK:
             raise APIResponseError(
-                f'Ошибка доступа к эндпоинту, HTTP: {response.status_code}'
+                f'Ошибка доступа к эндпоинту, HTTP: {response.status_code}',
+                response.status_code
             )
+    finally:
+        API_LATENCY.observe(time.perf_counter() - start)
 
-    try:
-        result = response.json()
-    except requests.exceptions.JSONDecodeError:
-        logger.error('Ошибка в формате json')
-        raise requests.exceptions.JSONDecodeError('Ошибка в формате json')
+    return response
 
-    return result
+
+def _close_response(response) -> None:
+    response.close()
+
+
+def stream_api_answer(
+    current_timestamp: Optional[int], headers: dict
+) -> HomeworkStream:
+    """Потоковый вариант fetch_api_answer и check_response.
+
+    Работы отдаются по одной по мере чтения ответа, current_date
+    доступен через get() после того, как итератор исчерпан.
+    С HEDGE_ENABLED дублируется ожидание заголовков ответа, опоздавший
+    ответ закрывается.
+    """
+    if HEDGE_ENABLED:
+        response = hedger.call(
+            request_api, current_timestamp, headers, True,
+            discard=_close_response
+        )
+    else:
+        response = request_api(current_timestamp, headers, stream=True)
+    return HomeworkStream(response.iter_content(STREAM_CHUNK_SIZE))
 
 
 def check_response(response: dict) -> list:
-    """Проверяем ответ на наличие необходимых ключей и типов данных."""
+    """Проверяем ответ на наличие необходимых ключей и типов данных.
+
+    Работы возвращаются компактными записями Homework (records.py),
+    работа с полем неверного типа пропускается.
+    """
     if type(response) is not dict:
         raise TypeError('Ответ API не словарь')
 
@@ -87,7 +286,11 @@ def check_response(response: dict) -> list:
             'В ответе API ключ homeworks - не список!'
         )
 
-    return homeworks
+    # Некорректная работа пропускается, остальные обрабатываются
+    return [
+        record for record in map(read_homework, homeworks)
+        if record is not None
+    ]
 
 
 def parse_status(homework: dict) -> str:
@@ -115,45 +318,182 @@ def check_tokens() -> bool:
     for env in ENVLIST:
         if not globals()[env]:
             logger.critical(
-                f'Отсутствует обязательная переменная окружения: {env}'
+                'Отсутствует обязательная переменная окружения: %s', env
             )
 
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
-def main() -> None:
-    """Основная логика работы бота."""
-    if not check_tokens():
-        raise SystemExit('Нужно установить все переменные окружения')
+def poll_homeworks(
+    current_timestamp: int, breaker: Optional[CircuitBreaker] = None
+):
+    """Ответ API и работы из него: списком или потоком (STREAM_HOMEWORKS).
 
-    bot = telegram.Bot(token=str(TELEGRAM_TOKEN))
-    current_timestamp = int(time.time())
-    last_exception_msg = ""
+    В потоковом режиме ответ и работы - один и тот же HomeworkStream,
+    current_date в нем появляется после перебора работ. Пока автомат
+    breaker разомкнут, запрос к API не выполняется.
+    """
+    call = breaker.call if breaker is not None else _direct_call
+    if STREAM_HOMEWORKS:
+        stream = call(stream_api_answer, current_timestamp, HEADERS)
+        return stream, stream
 
-    while True:
-        try:
-            response = get_api_answer(current_timestamp=current_timestamp)
+    response = call(get_api_answer, current_timestamp=current_timestamp)
+    return response, check_response(response)
 
-            homeworks = check_response(response)
 
-            if len(homeworks) == 0:
-                logger.debug('Отсутствуют новые статусы в ответе API')
-            else:
-                for homework in homeworks:
-                    send_message(bot=bot, message=parse_status(homework))
+def _direct_call(func, *args, **kwargs):
+    return func(*args, **kwargs)
 
-            current_timestamp = response.get(
-                'current_date', int(time.time()) - RETRY_TIME
+
+def start_webhook(
+    tenants: list,
+    delivery: Delivery,
+    delivered: DeliveryIndex,
+    history: Optional[HistoryStore] = None,
+    recipients: Optional[Callable] = None,
+) -> bool:
+    """Запуск приема событий, если задан WEBHOOK_PORT.
+
+    Тогда опрос API нужен только как редкая сверка. recipients(tenant) -
+    чаты для статусов студента, по умолчанию его chat_id.
+    """
+    if not WEBHOOK_PORT:
+        return False
+
+    # webhook сам импортирует homework, поэтому импорт здесь
+    from webhook import WebhookReceiver
+    from webhook import serve as serve_webhook
+
+    serve_webhook(
+        WebhookReceiver(
+            tenants, delivery, delivered, history=history,
+            recipients=recipients
+        )
+    )
+    return True
+
+
+def notify_homeworks(
+    homeworks,
+    tenant: str,
+    delivery: Delivery,
+    delivered: DeliveryIndex,
+    history: Optional[HistoryStore] = None,
+) -> list:
+    """Отправка новых статусов работ и запись их в историю.
+
+    Возвращает работы для планировщика: в потоковом режиме они
+    не хранятся в самом ответе.
+    """
+    statuses = []
+    for homework in homeworks:
+        try:
+            message = parse_status(homework)
+        except KeyError as error:
+            # Работа с неизвестным статусом не должна задерживать остальные
+            record_error(error)
+            logger.error(
+                'Пропущена работа: %s', error, extra={
+                    'tenant': tenant,
+                    'homework': homework.get('homework_name'),
+                }
             )
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            if last_exception_msg != message:
-                send_message(bot=bot, message=message)
-                last_exception_msg = message
-        finally:
-            time.sleep(RETRY_TIME)
+            continue
+        statuses.append(homework)
+        if delivered.check_and_mark(tenant, homework):
+            broadcast(delivery, message)
+            if history is not None:
+                history.record(tenant, homework)
+    return statuses
+
+
+def main(clock: SystemClock = system_clock) -> None:
+    """Основная логика работы бота.
+
+    Время и ожидание между запросами берутся из clock: с VirtualClock
+    цикл не ждет (benchmarks/soak.py).
+    """
+    setup_logging()
+    if not check_tokens():
+        raise SystemExit('Нужно установить все переменные окружения')
+
+    delivery = Delivery(
+        send=functools.partial(deliver, create_bot()), spool=Spool(),
+        clock=clock.monotonic, workers=TELEGRAM_POOL_SIZE,
+        breaker=create_telegram_breaker(clock.monotonic)
+    )
+    delivery.start()
+    registry.callback(
+        'homework_delivery_queue_lines', 'Строки в очереди отправки',
+        lambda: delivery.stats()['queued_lines']
+    )
+    serve()
+    checkpoints = CheckpointStore(clock=clock.monotonic)
+    delivered = DeliveryIndex()
+    history = HistoryStore(clock=clock.monotonic)
+    scheduler = create_scheduler(clock=clock.time)
+    if start_webhook(
+        [Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)], delivery, delivered,
+        history, recipients=lambda tenant: recipients()
+    ):
+        scheduler = FixedScheduler(WEBHOOK_RECONCILE_TIME)
+    tenant = tenant_key(PRACTICUM_TOKEN)
+    current_timestamp = checkpoints.load(tenant) or int(clock.time())
+    alerts = ErrorAggregator(clock=clock.time)
+    api_breaker = create_api_breaker(clock.monotonic)
+    profiler = LoopProfiler((
+        get_api_answer, check_response, parse_status, send_message, deliver
+    ))
+    if PROFILE:
+        profiler.request()
+    install_signal(profiler)
+    planned = clock.monotonic()
+
+    while True:
+        LOOP_LAG.set(max(clock.monotonic() - planned, 0))
+        with profiler.iteration():
+            try:
+                response, homeworks = poll_homeworks(
+                    current_timestamp, api_breaker
+                )
+
+                statuses = notify_homeworks(
+                    homeworks, tenant, delivery, delivered, history
+                )
+                if len(statuses) == 0:
+                    logger.debug(
+                        'Отсутствуют новые статусы в ответе API',
+                        extra={'tenant': tenant}
+                    )
+
+                current_timestamp = response.get(
+                    'current_date', int(clock.time()) - RETRY_TIME
+                )
+                checkpoints.save(tenant, current_timestamp)
+                recovered = alerts.record_success(TELEGRAM_CHAT_ID)
+                if recovered:
+                    broadcast(delivery, recovered)
+                delay = scheduler.record_success(tenant, statuses)
+            except Exception as error:
+                logger.error(
+                    'Сбой в работе программы: %s', error,
+                    extra={'tenant': tenant}
+                )
+                record_error(error)
+                alert = alerts.record_failure(TELEGRAM_CHAT_ID, error)
+                if alert:
+                    broadcast(delivery, alert)
+                delay = scheduler.record_failure(tenant, error)
+
+        logger.debug('Следующий запрос к API через %.0f с', delay)
+        planned = clock.monotonic() + delay
+        clock.sleep(delay)
 
 
 if __name__ == '__main__':
+    # Проверка окружения без запуска бота и загрузки python-telegram-bot
+    if '--check' in sys.argv[1:]:
+        setup_logging()
+        sys.exit(0 if check_tokens() else 1)
     main()
@@ -0,0 +1,123 @@
+"""Долгоживущая requests.Session с пулом keep-alive соединений.
+
+Каждый вызов requests.get открывает новое TCP+TLS соединение, сессия же
+переиспользует соединения к ENDPOINT между опросами.
+"""
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from metrics import registry
+from settings import (HTTP_KEEP_ALIVE, HTTP_POOL_BLOCK, HTTP_POOL_CONNECTIONS,
+                      HTTP_POOL_MAXSIZE)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+_stats = {'requests': 0, 'new_connections': 0}
+
+
+def _increment(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _increment('new_connections')
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _increment('new_connections')
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter, считающий запросы и реально открытые сокеты."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Подменяем классы пулов urllib3 на считающие соединения."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, *args, **kwargs):
+        """Отправка запроса с учетом в счетчике."""
+        _increment('requests')
+        return super().send(*args, **kwargs)
+
+
+def create_session(
+    pool_connections: int = HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    pool_block: bool = HTTP_POOL_BLOCK,
+    keep_alive: bool = HTTP_KEEP_ALIVE,
+) -> requests.Session:
+    """Создание сессии с настроенным пулом соединений."""
+    session = requests.Session()
+    adapter = CountingAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    return session
+
+
+def get_session() -> requests.Session:
+    """Общая для всех потоков сессия, создается при первом обращении."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Закрытие общей сессии и всех ее соединений."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def pool_stats() -> dict:
+    """Счетчики соединений: сколько открыто новых и сколько переиспользовано.
+
+    Учитываются все сессии, созданные через create_session.
+    """
+    with _lock:
+        stats = dict(_stats)
+    stats['reused_connections'] = max(
+        stats['requests'] - stats['new_connections'], 0
+    )
+    return stats
+
+
+registry.callback(
+    'homework_http_requests_total', 'Запросы через пул соединений',
+    lambda: pool_stats()['requests'], kind='counter'
+)
+registry.callback(
+    'homework_http_new_connections_total', 'Открытые пулом соединения',
+    lambda: pool_stats()['new_connections'], kind='counter'
+)
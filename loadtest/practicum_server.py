@@ -0,0 +1,196 @@
+"""Локальная заглушка API статусов домашних работ Практикума.
+
+Для каждого токена генерируется детерминированная история: раз в
+--event-interval секунд (со сдвигом, зависящим от токена) одна из
+--homeworks работ студента меняет статус. Ответ содержит работы, статус
+которых менялся начиная с from_date, как у настоящего API.
+
+    python -m loadtest.practicum_server --port 8081 --latency 0.05 \\
+        --error-rate 0.01 --rate-limit-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUS_CYCLE = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+class PracticumConfig:
+    """Параметры поведения заглушки."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        event_interval: float = 3600.0,
+        homeworks: int = 5,
+        comment_size: int = 40,
+        max_homeworks: int = 1000,
+        started: float = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.event_interval = event_interval
+        self.homeworks = homeworks
+        self.comment_size = comment_size
+        self.max_homeworks = max_homeworks
+        self.started = time.time() if started is None else started
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _seed(token: str) -> int:
+    return int.from_bytes(hashlib.sha1(token.encode()).digest()[:4], 'big')
+
+
+def build_response(
+    config: PracticumConfig, token: str, from_date: int, now: float
+) -> dict:
+    """Ответ API: изменения статусов студента в [from_date, now)."""
+    seed = _seed(token)
+    interval = config.event_interval
+    offset = (seed % 1000) / 1000 * interval
+    origin = config.started + offset
+    first = max(int((from_date - origin) // interval), 0)
+    if origin + first * interval < from_date:
+        first += 1
+
+    latest = {}
+    number = first
+    while origin + number * interval < now:
+        homework_id = (seed + number) % config.homeworks
+        latest[homework_id] = (
+            number, STATUS_CYCLE[number % len(STATUS_CYCLE)]
+        )
+        number += 1
+
+    homeworks = []
+    for homework_id, (number, status) in sorted(
+        latest.items(), key=lambda item: -item[1][0]
+    )[:config.max_homeworks]:
+        updated = time.gmtime(origin + number * interval)
+        homeworks.append({
+            'id': seed * 100 + homework_id,
+            'status': status,
+            'homework_name': f'student{seed}__hw{homework_id:02}.zip',
+            'reviewer_comment': 'x' * config.comment_size,
+            'date_updated': time.strftime('%Y-%m-%dT%H:%M:%SZ', updated),
+            'lesson_name': f'Спринт {homework_id}',
+        })
+    return {'homeworks': homeworks, 'current_date': int(now)}
+
+
+class PracticumHandler(BaseHTTPRequestHandler):
+    """GET /api/user_api/homework_statuses/?from_date=..."""
+
+    protocol_version = 'HTTP/1.1'
+    config: PracticumConfig = PracticumConfig()
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Ответ со статусами работ или сымитированная ошибка."""
+        config = self.config
+        with config.lock:
+            config.requests += 1
+        delay = config.latency + random.uniform(0, config.jitter)
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        if not url.path.startswith('/api/user_api/homework_statuses'):
+            self._reply(HTTPStatus.NOT_FOUND, {'code': 'not_found'})
+            return
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth '):
+            self._reply(HTTPStatus.UNAUTHORIZED, {'code': 'not_authenticated'})
+            return
+
+        roll = random.random()
+        if roll < config.error_rate:
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {'code': 'error'})
+            return
+        if roll < config.error_rate + config.rate_limit_rate:
+            self._reply(HTTPStatus.TOO_MANY_REQUESTS, {'code': 'throttled'})
+            return
+
+        try:
+            from_date = int(parse_qs(url.query)['from_date'][0])
+        except (KeyError, ValueError):
+            self._reply(HTTPStatus.BAD_REQUEST, {
+                'code': 'UnknownError',
+                'error': {'error': 'Wrong from_date format'},
+            })
+            return
+
+        token = authorization[len('OAuth '):]
+        self._reply(
+            HTTPStatus.OK,
+            build_response(config, token, from_date, time.time())
+        )
+
+    def log_message(self, *args):
+        """Не пишем каждый запрос в консоль."""
+
+
+def make_server(
+    config: PracticumConfig, host: str = '127.0.0.1', port: int = 0
+) -> ThreadingHTTPServer:
+    """Сервер заглушки, port=0 - любой свободный порт."""
+    handler = type('Handler', (PracticumHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def endpoint(server: ThreadingHTTPServer) -> str:
+    """Адрес для PRACTICUM_ENDPOINT."""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}/api/user_api/homework_statuses/'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--event-interval', type=float, default=3600.0)
+    parser.add_argument('--homeworks', type=int, default=5)
+    parser.add_argument('--comment-size', type=int, default=40)
+    args = parser.parse_args()
+
+    config = PracticumConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        event_interval=args.event_interval,
+        homeworks=args.homeworks,
+        comment_size=args.comment_size,
+    )
+    server = make_server(config, args.host, args.port)
+    print(f'PRACTICUM_ENDPOINT={endpoint(server)}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
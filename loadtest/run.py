@@ -0,0 +1,143 @@
+"""Нагрузочный прогон движка против локальных заглушек без сети.
+
+Запускает заглушки Практикума и Telegram в фоновых потоках, направляет
+на них бота через PRACTICUM_ENDPOINT и TELEGRAM_BASE_URL и опрашивает
+--tenants студентов в течение --duration секунд:
+
+    python -m loadtest.run --tenants 10000 --duration 60 --retry-time 30
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--retry-time', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.01)
+    parser.add_argument('--event-interval', type=float, default=120)
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def main() -> None:
+    args = parse_args()
+    state_dir = tempfile.mkdtemp(prefix='homework-loadtest-')
+    tenants_file = os.path.join(state_dir, 'tenants.json')
+    with open(tenants_file, 'w', encoding='utf-8') as file:
+        json.dump([
+            {'practicum_token': f'loadtest-{number}', 'chat_id': number}
+            for number in range(args.tenants)
+        ], file)
+
+    # settings читает окружение при импорте, поэтому модули бота
+    # (и заглушки, которые их используют) импортируются только после
+    # настройки переменных
+    practicum_port, telegram_port = free_port(), free_port()
+    os.environ.update({
+        'PRACTICUM_ENDPOINT': (
+            f'http://127.0.0.1:{practicum_port}'
+            '/api/user_api/homework_statuses/'
+        ),
+        'TELEGRAM_BASE_URL': f'http://127.0.0.1:{telegram_port}/bot',
+        'TELEGRAM_TOKEN': '1234:loadtest',
+        'TENANTS_FILE': tenants_file,
+        'STATE_DB_PATH': os.path.join(state_dir, 'state.sqlite3'),
+        'RETRY_TIME': str(args.retry_time),
+        'REVIEWING_RETRY_TIME': str(max(args.retry_time // 4, 1)),
+        'ENGINE_CONCURRENCY': str(args.concurrency),
+        'HTTP_POOL_ENABLED': '1',
+    })
+    from loadtest import practicum_server, telegram_server
+
+    practicum_config = practicum_server.PracticumConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        event_interval=args.event_interval,
+        started=time.time() - args.event_interval * 10,
+    )
+    practicum = practicum_server.make_server(
+        practicum_config, port=practicum_port
+    )
+    telegram_config = telegram_server.TelegramConfig()
+    telegram = telegram_server.make_server(
+        telegram_config, port=telegram_port
+    )
+    start(practicum)
+    start(telegram)
+
+    import telegram as ptb
+
+    import engine
+    import homework
+    from delivery import Delivery
+    from http_pool import pool_stats
+    from tenants import load_tenants
+
+    # Сымитированные ошибки API ожидаемы, в консоль - только итоги
+    logging.disable(logging.CRITICAL)
+    bot = ptb.Bot(
+        token=os.environ['TELEGRAM_TOKEN'],
+        base_url=os.environ['TELEGRAM_BASE_URL'],
+        request=ptb.utils.request.Request(con_pool_size=8),
+    )
+    delivery = Delivery(send=functools.partial(homework.deliver, bot))
+    delivery.start()
+    runner = engine.Engine(
+        load_tenants(tenants_file),
+        send=delivery.submit,
+        concurrency=args.concurrency,
+        retry_time=args.retry_time,
+    )
+
+    started = time.monotonic()
+    try:
+        asyncio.run(asyncio.wait_for(runner.run(), args.duration))
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.monotonic() - started
+    delivery.stop(timeout=1)
+
+    print(f'Студентов: {args.tenants}, длительность: {elapsed:.1f} с')
+    print(
+        f'Запросов к API: {practicum_config.requests} '
+        f'({practicum_config.requests / elapsed:.1f}/с)'
+    )
+    print(f'Принято Telegram: {sum(telegram_config.delivered.values())}, '
+          f'отказов по лимиту: {telegram_config.throttled}')
+    stats = delivery.stats()
+    chats = stats.pop('chats')
+    print(f'Очередь отправки: {stats}')
+    print('Чатов с отброшенными строками: '
+          f'{sum(1 for counts in chats.values() if counts["failed"])}')
+    print(f'Пул соединений: {pool_stats()}')
+    practicum.shutdown()
+    telegram.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Локальная заглушка Telegram Bot API (sendMessage).
+
+Лимиты как у Telegram: не больше --chat-rate сообщений в секунду в
+один чат и --global-rate всего, сверх - ответ 429 с retry_after.
+
+    python -m loadtest.telegram_server --port 8082
+    TELEGRAM_BASE_URL=http://127.0.0.1:8082/bot
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from delivery import TokenBucket
+
+
+class TelegramConfig:
+    """Лимиты заглушки и счетчики принятых сообщений."""
+
+    def __init__(
+        self,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        global_rate: float = 30.0,
+        global_burst: int = 30,
+        latency: float = 0.0,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.latency = latency
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_buckets = {}
+        self.delivered = Counter()
+        self.throttled = 0
+        self.message_id = 0
+        self.lock = threading.Lock()
+
+    def admit(self, chat_id) -> float:
+        """0 - сообщение принято, иначе через сколько секунд повторить."""
+        with self.lock:
+            bucket = self.chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+                self.chat_buckets[chat_id] = bucket
+            wait = max(bucket.wait_time(), self.global_bucket.wait_time())
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            bucket.take()
+            self.global_bucket.take()
+            self.delivered[chat_id] += 1
+            self.message_id += 1
+            return 0.0
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    """POST /bot<token>/sendMessage."""
+
+    protocol_version = 'HTTP/1.1'
+    config: TelegramConfig = TelegramConfig()
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Прием сообщения или отказ по лимиту."""
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self.config.latency:
+            time.sleep(self.config.latency)
+
+        method = self.path.rsplit('/', 1)[-1]
+        if method != 'sendMessage':
+            self._reply(HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found',
+            })
+            return
+        try:
+            data = json.loads(raw or b'{}')
+            chat_id, text = data['chat_id'], data['text']
+        except (ValueError, KeyError):
+            self._reply(HTTPStatus.BAD_REQUEST, {
+                'ok': False, 'error_code': 400,
+                'description': 'Bad Request: message text is empty',
+            })
+            return
+
+        # python-telegram-bot передает числовой chat_id строкой
+        if str(chat_id).lstrip('-').isdigit():
+            chat_id = int(chat_id)
+        wait = self.config.admit(chat_id)
+        if wait:
+            retry_after = math.ceil(wait)
+            self._reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {retry_after}',
+                'parameters': {'retry_after': retry_after},
+            })
+            return
+
+        self._reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': self.config.message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        }})
+
+    def log_message(self, *args):
+        """Не пишем каждый запрос в консоль."""
+
+
+def make_server(
+    config: TelegramConfig, host: str = '127.0.0.1', port: int = 0
+) -> ThreadingHTTPServer:
+    """Сервер заглушки, port=0 - любой свободный порт."""
+    handler = type('Handler', (TelegramHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    """Адрес для TELEGRAM_BASE_URL."""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}/bot'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--chat-rate', type=float, default=1.0)
+    parser.add_argument('--global-rate', type=float, default=30.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = TelegramConfig(
+        chat_rate=args.chat_rate,
+        global_rate=args.global_rate,
+        latency=args.latency,
+    )
+    server = make_server(config, args.host, args.port)
+    print(f'TELEGRAM_BASE_URL={base_url(server)}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Неблокирующее логирование через очередь.
+
+Обработчик корневого логгера только кладет запись в очередь, а форматирует
+и пишет в stdout отдельный поток QueueListener. Поля tenant, homework,
+chat_id и latency из extra попадают в JSON-записи (LOG_FORMAT=json).
+Повторяющиеся DEBUG-сообщения можно прореживать (LOG_DEBUG_SAMPLE).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Optional
+
+from settings import LOG_DEBUG_SAMPLE, LOG_FORMAT, LOG_LEVEL
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+EXTRA_FIELDS = ('tenant', 'homework', 'chat_id', 'latency', 'sampled')
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Запись в виде JSON с известными полями из extra."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает одну из rate DEBUG-записей с одинаковым шаблоном.
+
+    Шаблон - record.msg до подстановки аргументов, поэтому сообщения
+    вида 'Отсутствуют новые статусы' для разных студентов считаются вместе.
+    В пропущенную запись добавляется поле sampled - сколько их было.
+    """
+
+    def __init__(self, rate: int = LOG_DEBUG_SAMPLE) -> None:
+        super().__init__()
+        self.rate = max(rate, 1)
+        self._counts: dict = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Решение, пропускать ли запись."""
+        if self.rate == 1 or record.levelno > logging.DEBUG:
+            return True
+        with self._lock:
+            count = self._counts.get(record.msg, 0) + 1
+            if count < self.rate:
+                self._counts[record.msg] = count
+                return False
+            self._counts[record.msg] = 0
+        record.sampled = count
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, не форматирующий запись в вызывающем потоке.
+
+    Стандартный prepare() сразу подставляет аргументы в сообщение;
+    здесь это делает поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    log_format: str = LOG_FORMAT,
+    sample: int = LOG_DEBUG_SAMPLE,
+    stream=None,
+) -> None:
+    """Настройка корневого логгера, повторный вызов перенастраивает."""
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if log_format == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(SamplingFilter(sample))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Дописываем оставшиеся в очереди записи и останавливаем поток."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
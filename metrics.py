@@ -0,0 +1,271 @@
+"""Счетчики, датчики и гистограммы в формате Prometheus.
+
+Запись в метрику - поиск корзины bisect и пара сложений под
+неконкурентной блокировкой. Метрики отдает встроенный HTTP-сервер
+на METRICS_PORT по пути /metrics.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from settings import METRICS_HOST, METRICS_PORT
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30
+)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _escape(value: str) -> str:
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> '_Metric':
+        """Метрика с конкретными значениями меток."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> '_Metric':
+        return type(self)(self.name, self.documentation)
+
+    def _series(self) -> Iterable[Tuple[Tuple[str, ...], '_Metric']]:
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for values, metric in self._series():
+            lines.extend(metric._samples(self.labelnames, values))
+        return lines
+
+    def _samples(self, names, values) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """Увеличение счетчика."""
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, names, values) -> List[str]:
+        return [f'{self.name}{_format_labels(names, values)} {self.value}']
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = 'gauge'
+
+    def set(self, value: float) -> None:
+        """Установка значения."""
+        self.value = value
+
+
+class CallbackGauge(_Metric):
+    """Метрика, значение которой вычисляется при каждом чтении.
+
+    Подходит для счетчиков, которые модули уже ведут сами
+    (http_pool.pool_stats, payload_cache.stats, Delivery.stats).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        func: Callable[[], float],
+        kind: str = 'gauge',
+    ) -> None:
+        super().__init__(name, documentation)
+        self.func = func
+        self.kind = kind
+
+    def _samples(self, names, values) -> List[str]:
+        return [f'{self.name} {float(self.func())}']
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Учет одного наблюдения."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def _samples(self, names, values) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            labels = _format_labels(names + ('le',), values + (str(bound),))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(names, values)
+        lines.append(f'{self.name}_sum{labels} {self.sum}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Добавление метрики, повторная регистрация возвращает старую."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        """Регистрация счетчика."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        """Регистрация датчика."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        """Регистрация гистограммы."""
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def callback(self, name, documentation, func,
+                 kind='gauge') -> CallbackGauge:
+        """Регистрация вычисляемой метрики."""
+        return self.register(CallbackGauge(name, documentation, func, kind))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+API_LATENCY = registry.histogram(
+    'homework_api_request_seconds', 'Время запроса к API Практикума'
+)
+SEND_LATENCY = registry.histogram(
+    'homework_telegram_send_seconds', 'Время отправки сообщения в Telegram'
+)
+LOOP_LAG = registry.gauge(
+    'homework_loop_lag_seconds',
+    'Опоздание очередной итерации цикла относительно плана'
+)
+ERRORS = registry.counter(
+    'homework_errors_total', 'Ошибки по типу исключения', ('type',)
+)
+
+
+def record_error(error: BaseException) -> None:
+    """Учет ошибки по имени класса исключения."""
+    ERRORS.labels(type(error).__name__).inc()
+
+
+def make_server(host: str = METRICS_HOST, port: int = 0):
+    """HTTP-сервер метрик, port=0 - любой свободный порт.
+
+    http.server импортируется здесь: без сервера метрик он не нужен,
+    а его загрузка заметно удлиняет запуск.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдача метрик по GET /metrics."""
+
+        def do_GET(self):
+            """Ответ на GET-запрос."""
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            """Запросы к /metrics не пишем в лог."""
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Запуск HTTP-сервера метрик в фоновом потоке, port=0 - не запускать."""
+    if not port:
+        return None
+    server = make_server(host, port)
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    )
+    thread.start()
+    return server
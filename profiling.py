@@ -0,0 +1,220 @@
+"""Профилирование итераций цикла main() без перезапуска бота.
+
+Профилирование включается переменной PROFILE=1 с запуска или сигналом
+SIGUSR1 у работающего процесса и длится PROFILE_ITERATIONS итераций.
+В это время отдельный поток раз в PROFILE_INTERVAL секунд снимает стеки
+всех потоков, а tracemalloc сравнивает снимки памяти после каждой
+итерации. Отчет пишется в PROFILE_DIR: время и прирост памяти функций
+get_api_answer, check_response, parse_status и отправки сообщений,
+самые затратные функции цикла и строки с наибольшим ростом памяти.
+
+Пока профилирование выключено, итерация обходится одной проверкой
+двух полей: ни поток, ни tracemalloc не запущены.
+"""
+import contextlib
+import dis
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from settings import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_ITERATIONS
+
+# Запросы к API уходят глубоко в requests и urllib3: нужны длинные стеки,
+# чтобы выделение памяти дошло до get_api_answer
+TRACE_FRAMES = 64
+TOP = 15
+
+logger = logging.getLogger(__name__)
+
+_IDLE = contextlib.nullcontext()
+
+
+def _label(code) -> str:
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+class LoopProfiler:
+    """Профиль заданного числа итераций цикла.
+
+    functions - функции, для которых в отчете считаются время (в любом
+    потоке) и выделенная в них память.
+    """
+
+    def __init__(
+        self,
+        functions: Iterable[Callable],
+        iterations: int = PROFILE_ITERATIONS,
+        directory: str = PROFILE_DIR,
+        interval: float = PROFILE_INTERVAL,
+        clock: Callable = time.perf_counter,
+    ) -> None:
+        self.iterations = iterations
+        self.directory = directory
+        self.interval = interval
+        self.clock = clock
+        self.codes = {func.__code__: func.__name__ for func in functions}
+        self.lines = {
+            (code.co_filename, line): name
+            for code, name in self.codes.items()
+            for _, line in dis.findlinestarts(code)
+        }
+        self.report_path: Optional[str] = None
+        self.samples = 0
+        self.thread_samples: Counter = Counter()
+        self.tracked_samples: Counter = Counter()
+        self.durations: list = []
+        self.growth: list = []
+        self._requested = 0
+        self._remaining = 0
+        self._active = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def request(self, iterations: Optional[int] = None) -> None:
+        """Профилировать следующие iterations итераций.
+
+        Можно вызывать из обработчика сигнала: только запоминает запрос.
+        """
+        self._requested = iterations or self.iterations
+
+    def iteration(self):
+        """Контекст одной итерации цикла."""
+        if not self._requested and not self._remaining:
+            return _IDLE
+        return self._profiled_iteration()
+
+    @contextlib.contextmanager
+    def _profiled_iteration(self):
+        if not self._remaining:
+            self._start()
+        start = self.clock()
+        self._active = True
+        try:
+            yield
+        finally:
+            self._active = False
+            self._end_iteration(self.clock() - start)
+
+    def _start(self) -> None:
+        self._remaining, self._requested = self._requested, 0
+        self.samples = 0
+        self.thread_samples = Counter()
+        self.tracked_samples = Counter()
+        self.durations = []
+        self.growth = []
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        self._first = self._previous = self._snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample_forever, name='profiler', daemon=True
+        )
+        self._thread.start()
+        logger.info('Профилирование %s итераций', self._remaining)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+
+    def _sample_forever(self) -> None:
+        main_thread = threading.main_thread().ident
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            self.samples += 1
+            tracked = set()
+            for thread, frame in sys._current_frames().items():
+                if thread == main_thread:
+                    self.thread_samples[frame.f_code] += 1
+                elif thread == own_thread:
+                    continue
+                while frame is not None:
+                    if frame.f_code in self.codes:
+                        tracked.add(frame.f_code)
+                    frame = frame.f_back
+            self.tracked_samples.update(tracked)
+
+    def _end_iteration(self, duration: float) -> None:
+        snapshot = self._snapshot()
+        self.durations.append(duration)
+        self.growth.append(sum(
+            stat.size_diff
+            for stat in snapshot.compare_to(self._previous, 'filename')
+        ))
+        self._previous = snapshot
+        self._remaining -= 1
+        if not self._remaining:
+            self._finish(snapshot)
+
+    def _finish(self, snapshot: tracemalloc.Snapshot) -> None:
+        self._stop.set()
+        self._thread.join()
+        allocated = Counter()
+        for stat in snapshot.compare_to(self._first, 'traceback'):
+            names = {
+                self.lines.get((frame.filename, frame.lineno))
+                for frame in stat.traceback
+            }
+            for name in names - {None}:
+                allocated[name] += stat.size_diff
+        lines = snapshot.compare_to(self._first, 'lineno')[:TOP]
+        if self._started_tracing:
+            tracemalloc.stop()
+        self._first = self._previous = None
+        self.report_path = self._write(allocated, lines)
+        logger.info('Отчет профилирования: %s', self.report_path)
+
+    def _write(self, allocated: Counter, lines: list) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory, time.strftime('profile-%Y%m%d-%H%M%S.txt')
+        )
+        total = sum(self.durations)
+        samples = max(self.samples, 1)
+        report = [
+            f'Итераций: {len(self.durations)}, время: {total:.3f} с, '
+            f'отсчетов: {self.samples} по {self.interval * 1000:g} мс',
+            '',
+            'Итерация: время, с / прирост памяти, КиБ',
+        ]
+        report += [
+            f'  {number}: {duration:.3f} / {growth / 1024:+.1f}'
+            for number, (duration, growth)
+            in enumerate(zip(self.durations, self.growth), 1)
+        ]
+        report += ['', 'Функция: доля времени итераций / прирост памяти, КиБ']
+        for code, name in self.codes.items():
+            share = self.tracked_samples[code] / samples
+            report.append(
+                f'  {name}: {share:.1%} / {allocated[name] / 1024:+.1f}'
+            )
+        report += ['', 'Основной поток: функции в момент отсчета']
+        report += [
+            f'  {count / samples:6.1%} {_label(code)}'
+            for code, count in self.thread_samples.most_common(TOP)
+        ]
+        report += ['', 'Наибольший прирост памяти по строкам']
+        report += [f'  {stat}' for stat in lines]
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(report) + '\n')
+        return path
+
+
+def install_signal(profiler: LoopProfiler) -> bool:
+    """Запуск профилирования по SIGUSR1, если сигнал есть в системе."""
+    signum = getattr(signal, 'SIGUSR1', None)
+    if signum is None:
+        return False
+    signal.signal(signum, lambda signum, frame: profiler.request())
+    return True
@@ -0,0 +1,119 @@
+"""Компактные записи о работах вместо словарей из ответа API.
+
+Из работы храним только поля, которые использует бот. Запись ведет себя
+как словарь только для чтения: homework['status'] и homework.get('id'),
+отсутствующее поле - KeyError, как и у словаря, поэтому parse_status
+работает с записью без изменений.
+
+Проверка работы собирается из схемы один раз при импорте: для каждого
+поля - своя строка кода без циклов и поиска по схеме во время разбора.
+Работа с полем неверного типа пропускается (read_homework), остальные
+работы ответа обрабатываются как обычно.
+"""
+import logging
+from collections.abc import Mapping
+from typing import Callable, Dict, Optional, Tuple
+
+from metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+NoneType = type(None)
+_MISSING = object()
+
+# Поле работы и допустимые типы значения
+HOMEWORK_SCHEMA: Dict[str, Tuple[type, ...]] = {
+    'id': (int,),
+    'homework_name': (str,),
+    'status': (str,),
+    'date_updated': (str,),
+    'reviewer_comment': (str, NoneType),
+}
+
+
+class Homework(Mapping):
+    """Работа из ответа API: слоты вместо словаря.
+
+    Слот отсутствующего в ответе поля не заполняется.
+    """
+
+    __slots__ = tuple(HOMEWORK_SCHEMA)
+    _fields = frozenset(HOMEWORK_SCHEMA)
+
+    def __getitem__(self, key: str):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (name for name in self.__slots__ if hasattr(self, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'Homework({dict(self)!r})'
+
+
+def compile_validator(
+    schema: Dict[str, Tuple[type, ...]], record_class: type
+) -> Callable:
+    """Функция проверки работы и сборки записи по схеме."""
+    # Все, что нужно проверке, передается значениями по умолчанию:
+    # локальные имена быстрее глобальных
+    defaults = {'Record': record_class, 'kind': type, 'missing': _MISSING}
+    lines = []
+    for index, (name, types) in enumerate(schema.items()):
+        if not name.isidentifier():
+            raise ValueError(f'Некорректное имя поля: {name!r}')
+        defaults[f'types_{index}'] = types[0] if len(types) == 1 else types
+        check = 'is not' if len(types) == 1 else 'not in'
+        message = (
+            f'В ответе API поле {name} работы - не '
+            + ' или '.join(kind.__name__ for kind in types)
+        )
+        lines += [
+            f'    value = get({name!r}, missing)',
+            '    if value is not missing:',
+            f'        if kind(value) {check} types_{index}:',
+            '            raise TypeError(',
+            f'                {message!r}',
+            '            )',
+            f'        record.{name} = value',
+        ]
+    signature = ', '.join(f'{name}={name}' for name in defaults)
+    source = '\n'.join([
+        f'def validate(item, {signature}):',
+        '    if kind(item) is not dict:',
+        "        raise TypeError('Работа в ответе API не словарь')",
+        '    get = item.get',
+        '    record = Record()',
+        *lines,
+        '    return record',
+    ])
+    namespace: dict = {}
+    exec(source, defaults, namespace)
+    return namespace['validate']
+
+
+validate_homework = compile_validator(HOMEWORK_SCHEMA, Homework)
+
+
+def read_homework(item) -> Optional[Homework]:
+    """Запись для работы из ответа или None, если работа некорректна.
+
+    Ошибка записывается в лог: одна некорректная работа не должна
+    останавливать опрос и задерживать остальные статусы.
+    """
+    try:
+        return validate_homework(item)
+    except TypeError as error:
+        record_error(error)
+        name = item.get('homework_name') if type(item) is dict else None
+        logger.error(
+            'Пропущена работа: %s', error, extra={'homework': name}
+        )
+        return None
@@ -0,0 +1,109 @@
+"""Выбор времени до следующего опроса API для каждого студента."""
+import functools
+import random
+import time
+from typing import Callable, Dict, Tuple
+
+from settings import (DORMANT_AFTER, DORMANT_RETRY_TIME, ERROR_RETRY_MAX,
+                      ERROR_RETRY_TIME, RETRY_TIME, REVIEWING_RETRY_TIME,
+                      SCHEDULER)
+
+
+class FixedScheduler:
+    """Постоянный интервал, как в исходном main()."""
+
+    def __init__(self, retry_time: float = RETRY_TIME) -> None:
+        self.retry_time = retry_time
+        self.intervals: Dict[str, Tuple[float, str]] = {}
+
+    def _choose(self, tenant: str, interval: float, reason: str) -> float:
+        self.intervals[tenant] = (interval, reason)
+        return interval
+
+    def record_success(self, tenant: str, homeworks: list) -> float:
+        """Интервал после успешного ответа API."""
+        return self._choose(tenant, self.retry_time, 'fixed')
+
+    def record_failure(self, tenant: str, error: Exception) -> float:
+        """Интервал после ошибки запроса или проверки ответа."""
+        return self._choose(tenant, self.retry_time, 'fixed')
+
+    def snapshot(self) -> Dict[str, Tuple[float, str]]:
+        """Последние выбранные интервалы и причины выбора."""
+        return dict(self.intervals)
+
+
+class AdaptiveScheduler(FixedScheduler):
+    """Чаще - пока работа на ревью, реже - после ошибок и для неактивных.
+
+    После n ошибок подряд ждем случайное время из
+    [t/2, t], где t = min(ERROR_RETRY_TIME * 2**n, ERROR_RETRY_MAX).
+    """
+
+    def __init__(
+        self,
+        retry_time: float = RETRY_TIME,
+        reviewing_retry_time: float = REVIEWING_RETRY_TIME,
+        error_retry_time: float = ERROR_RETRY_TIME,
+        error_retry_max: float = ERROR_RETRY_MAX,
+        dormant_after: float = DORMANT_AFTER,
+        dormant_retry_time: float = DORMANT_RETRY_TIME,
+        clock: Callable = time.time,
+        rand: Callable = random.uniform,
+    ) -> None:
+        super().__init__(retry_time)
+        self.reviewing_retry_time = reviewing_retry_time
+        self.error_retry_time = error_retry_time
+        self.error_retry_max = error_retry_max
+        self.dormant_after = dormant_after
+        self.dormant_retry_time = dormant_retry_time
+        self.clock = clock
+        self.rand = rand
+        self.failures: Dict[str, int] = {}
+        self.reviewing: Dict[str, set] = {}
+        self.last_change: Dict[str, float] = {}
+
+    def record_success(self, tenant: str, homeworks: list) -> float:
+        """Интервал по последним известным статусам работ студента."""
+        now = self.clock()
+        self.failures.pop(tenant, None)
+        self.last_change.setdefault(tenant, now)
+        reviewing = self.reviewing.setdefault(tenant, set())
+        for homework in homeworks:
+            self.last_change[tenant] = now
+            name = homework.get('homework_name')
+            if homework.get('status') == 'reviewing':
+                reviewing.add(name)
+            else:
+                reviewing.discard(name)
+
+        if reviewing:
+            return self._choose(
+                tenant, self.reviewing_retry_time, 'reviewing'
+            )
+        if now - self.last_change[tenant] >= self.dormant_after:
+            return self._choose(tenant, self.dormant_retry_time, 'dormant')
+        return self._choose(tenant, self.retry_time, 'idle')
+
+    def record_failure(self, tenant: str, error: Exception) -> float:
+        """Экспоненциальная задержка со случайным разбросом."""
+        failures = self.failures.get(tenant, 0)
+        self.failures[tenant] = failures + 1
+        backoff = self.error_retry_time * 2 ** min(failures, 32)
+        ceiling = min(backoff, self.error_retry_max)
+        delay = self.rand(ceiling / 2, ceiling)
+        return self._choose(tenant, delay, 'error')
+
+
+def create_scheduler(
+    name: str = SCHEDULER, clock: Callable = time.time
+) -> FixedScheduler:
+    """Планировщик по имени из настроек."""
+    schedulers = {
+        'fixed': FixedScheduler,
+        'adaptive': functools.partial(AdaptiveScheduler, clock=clock),
+    }
+    try:
+        return schedulers[name]()
+    except KeyError:
+        raise ValueError(f'Неизвестный планировщик: {name}')
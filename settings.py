@@ -7,10 +7,20 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+# Дополнительные получатели через запятую: чат наставника, канал аудита.
+# Сообщения бота уходят в TELEGRAM_CHAT_ID и во все эти чаты
+TELEGRAM_CHAT_IDS = [
+    chat_id.strip()
+    for chat_id in os.getenv('TELEGRAM_CHAT_IDS', '').split(',')
+    if chat_id.strip()
+]
 
 ENVLIST = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
 
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 ENDPOINT_TIMEOUT = 10
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -20,4 +30,141 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
-RETRY_TIME = 600
+RETRY_TIME = int(os.getenv('RETRY_TIME', 600))
+
+# Многопользовательский режим (engine.py): список студентов в JSON-файле
+# вида [{"practicum_token": "...", "chat_id": 123}, ...]
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+ENGINE_CONCURRENCY = int(os.getenv('ENGINE_CONCURRENCY', 64))
+
+# Пул keep-alive соединений к ENDPOINT (http_pool.py).
+# По умолчанию выключен: запросы идут через requests.get, как раньше.
+HTTP_POOL_ENABLED = os.getenv('HTTP_POOL_ENABLED', '') == '1'
+# Число пулов (по одному на хост) и соединений в пуле одного хоста
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', ENGINE_CONCURRENCY))
+# Ждать свободное соединение вместо открытия сверх HTTP_POOL_MAXSIZE
+HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', '1') == '1'
+HTTP_KEEP_ALIVE = os.getenv('HTTP_KEEP_ALIVE', '1') == '1'
+
+# Ограничения Telegram на отправку (delivery.py): сообщений в секунду
+# в один чат и всего, и запас токенов на короткие всплески
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', 3))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_GLOBAL_BURST = int(os.getenv('TELEGRAM_GLOBAL_BURST', 30))
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Соединений в пуле бота: столько отправок в разные чаты идут одновременно
+TELEGRAM_POOL_SIZE = int(os.getenv('TELEGRAM_POOL_SIZE', 8))
+# Повторы отправки send_message в чаты, где случилась сетевая ошибка
+TELEGRAM_SEND_RETRIES = int(os.getenv('TELEGRAM_SEND_RETRIES', 2))
+# Адрес Bot API, для нагрузочных тестов - локальная заглушка (loadtest/)
+TELEGRAM_BASE_URL = os.getenv(
+    'TELEGRAM_BASE_URL', 'https://api.telegram.org/bot'
+)
+
+# Локальное хранилище состояния (checkpoint.py): последний current_date
+# каждого студента переживает перезапуск воркера
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', 'homework_bot.sqlite3')
+# Не чаще раза в столько секунд сбрасываем накопленные записи на диск
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv('CHECKPOINT_FLUSH_INTERVAL', 5))
+
+# Индекс уже отправленных статусов (dedup.py): размер LRU в памяти
+# и число хранимых на диске отпечатков
+DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', 4096))
+DEDUP_MAX_ROWS = int(os.getenv('DEDUP_MAX_ROWS', 200000))
+
+# Планировщик опроса (scheduler.py): 'adaptive' или 'fixed' (RETRY_TIME)
+SCHEDULER = os.getenv('SCHEDULER', 'adaptive')
+# Пока работа на ревью - опрашиваем чаще
+REVIEWING_RETRY_TIME = int(os.getenv('REVIEWING_RETRY_TIME', 120))
+# Экспоненциальная задержка после ошибок, не дольше ERROR_RETRY_MAX
+ERROR_RETRY_TIME = int(os.getenv('ERROR_RETRY_TIME', 30))
+ERROR_RETRY_MAX = int(os.getenv('ERROR_RETRY_MAX', 1800))
+# Студент без изменений статусов дольше DORMANT_AFTER опрашивается реже
+DORMANT_AFTER = int(os.getenv('DORMANT_AFTER', 7 * 24 * 60 * 60))
+DORMANT_RETRY_TIME = int(os.getenv('DORMANT_RETRY_TIME', 1800))
+
+# Пропуск разбора заведомо пустых ответов API (payloads.py)
+PAYLOAD_CACHE_ENABLED = os.getenv('PAYLOAD_CACHE_ENABLED', '1') == '1'
+PAYLOAD_CACHE_SIZE = int(os.getenv('PAYLOAD_CACHE_SIZE', 256))
+
+# Потоковый разбор больших ответов API (streaming.py)
+STREAM_HOMEWORKS = os.getenv('STREAM_HOMEWORKS', '') == '1'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 16384))
+
+# HTTP-сервер метрик Prometheus (metrics.py), 0 - выключен
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+
+# Журнал исходящих сообщений на диске (spool.py): неотправленные
+# сообщения переживают перезапуск
+SPOOL_PATH = os.getenv('SPOOL_PATH', 'outbox.spool')
+# После стольких подтверждений журнал переписывается без отправленных
+SPOOL_COMPACT_AFTER = int(os.getenv('SPOOL_COMPACT_AFTER', 1000))
+
+# Прием событий об изменении статусов по HTTP (webhook.py), 0 - выключен.
+# При включенном приеме API опрашивается раз в WEBHOOK_RECONCILE_TIME.
+# На внешнем адресе (WEBHOOK_HOST=0.0.0.0) прием работает только
+# с WEBHOOK_SECRET
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 0))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_RECONCILE_TIME = int(os.getenv('WEBHOOK_RECONCILE_TIME', 3600))
+WEBHOOK_MAX_BODY = 1024 * 1024
+
+# Логирование (logs.py): уровень, формат 'text' или 'json' и доля
+# повторяющихся DEBUG-сообщений, которая попадает в лог (1 из N)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DEBUG_SAMPLE = int(os.getenv('LOG_DEBUG_SAMPLE', 1))
+
+# Сводки об ошибках (alerts.py): ошибки копятся по типам и уходят в чат
+# не чаще раза в ALERT_WINDOW секунд
+ALERT_WINDOW = int(os.getenv('ALERT_WINDOW', 600))
+
+# Автоматы отключения (breaker.py): после THRESHOLD ошибок подряд вызовы
+# сразу завершаются ошибкой, через RESET секунд проходит один пробный
+API_BREAKER_THRESHOLD = int(os.getenv('API_BREAKER_THRESHOLD', 5))
+API_BREAKER_RESET = int(os.getenv('API_BREAKER_RESET', 60))
+TELEGRAM_BREAKER_THRESHOLD = int(os.getenv('TELEGRAM_BREAKER_THRESHOLD', 5))
+TELEGRAM_BREAKER_RESET = int(os.getenv('TELEGRAM_BREAKER_RESET', 30))
+
+# Несколько процессов-обработчиков (supervisor.py): 0 - по числу ядер.
+# Студенты делятся между процессами по хеш-кольцу, владение студентом -
+# аренда на LEASE_TTL секунд в базе состояния
+SUPERVISOR_WORKERS = int(os.getenv('SUPERVISOR_WORKERS', 0))
+LEASE_TTL = int(os.getenv('LEASE_TTL', 30))
+SHARD_REPLICAS = 64
+
+# История статусов работ (history.py): новые статусы пишутся пачкой
+# по HISTORY_BATCH_SIZE строк или раз в HISTORY_FLUSH_INTERVAL секунд
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', 'homework_history.sqlite3')
+HISTORY_FLUSH_INTERVAL = int(os.getenv('HISTORY_FLUSH_INTERVAL', 10))
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+
+# Догрузка статусов за прошедший период (backfill.py): размер окна
+# в секундах и число одновременных запросов к API
+BACKFILL_WINDOW = int(os.getenv('BACKFILL_WINDOW', 24 * 60 * 60))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 8))
+# Сколько секунд догрузка ждет отправки всех статусов перед выходом
+BACKFILL_DRAIN_TIMEOUT = int(os.getenv('BACKFILL_DRAIN_TIMEOUT', 60 * 60))
+
+# Профилирование цикла main() (profiling.py): PROFILE=1 - с запуска,
+# иначе по сигналу SIGUSR1. Отчет о PROFILE_ITERATIONS итерациях
+# пишется в PROFILE_DIR, стеки снимаются раз в PROFILE_INTERVAL секунд
+PROFILE = os.getenv('PROFILE', '') == '1'
+PROFILE_ITERATIONS = int(os.getenv('PROFILE_ITERATIONS', 10))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+
+# Повторные запросы к API (hedging.py): если ответа нет дольше p95
+# последних HEDGE_WINDOW ответов, отправляется второй такой же запрос.
+# Повторов не больше HEDGE_BUDGET от всех запросов
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', '') == '1'
+HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', 0.05))
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_WINDOW = int(os.getenv('HEDGE_WINDOW', 200))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))
+# Потоки для запросов с повтором: два на каждый одновременный запрос
+HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', 2 * ENGINE_CONCURRENCY))
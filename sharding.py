@@ -0,0 +1,217 @@
+"""Распределение студентов между процессами supervisor.py.
+
+Каждый процесс раз в LEASE_TTL / 3 секунд отмечается в таблице workers,
+строит хеш-кольцо из живых процессов и берет в аренду своих студентов
+в таблице leases. Опрашивает процесс только студентов, аренда которых у
+него действует. Если процесс упал, его отметка и аренды истекают, и
+студенты переходят к остальным; повторной отправки не дает общий
+индекс отправленных статусов (dedup.py).
+"""
+import bisect
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, FrozenSet, Iterable, List, Optional
+
+from checkpoint import connect
+from settings import LEASE_TTL, SHARD_REPLICAS, STATE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HashRing:
+    """Консистентное хеширование ключей студентов по процессам.
+
+    При смене состава процессов переезжают только студенты ушедшего или
+    пришедшего процесса.
+    """
+
+    def __init__(
+        self, nodes: Iterable[str], replicas: int = SHARD_REPLICAS
+    ) -> None:
+        points = sorted(
+            (_hash(f'{node}#{replica}'), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Процесс, которому принадлежит ключ, None - кольцо пустое."""
+        if not self._nodes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._nodes)
+        return self._nodes[index]
+
+
+class LeaseStore:
+    """Отметки процессов и аренды студентов в базе состояния."""
+
+    def __init__(
+        self, path: str = STATE_DB_PATH, clock: Callable = time.time
+    ) -> None:
+        self.clock = clock
+        self._connection = connect(path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            'worker TEXT PRIMARY KEY, expires REAL NOT NULL)'
+        )
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS leases ('
+            'tenant TEXT PRIMARY KEY, worker TEXT NOT NULL, '
+            'expires REAL NOT NULL)'
+        )
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    def heartbeat(self, worker: str, ttl: float) -> None:
+        """Отметка, что процесс жив еще ttl секунд."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO workers (worker, expires) VALUES (?, ?) '
+                'ON CONFLICT(worker) DO UPDATE SET expires = excluded.expires',
+                (worker, self.clock() + ttl)
+            )
+
+    def live_workers(self) -> List[str]:
+        """Процессы с действующей отметкой."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT worker FROM workers WHERE expires > ?',
+                (self.clock(),)
+            ).fetchall()
+        return [worker for worker, in rows]
+
+    def acquire(
+        self, worker: str, tenants: Iterable[str], ttl: float
+    ) -> FrozenSet[str]:
+        """Аренда свободных и продление своих студентов.
+
+        Возвращает всех студентов, аренда которых у процесса действует.
+        """
+        now = self.clock()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT INTO leases (tenant, worker, expires) '
+                'VALUES (?, ?, ?) ON CONFLICT(tenant) DO UPDATE SET '
+                'worker = excluded.worker, expires = excluded.expires '
+                'WHERE leases.worker = excluded.worker '
+                'OR leases.expires <= ?',
+                ((tenant, worker, now + ttl, now) for tenant in tenants)
+            )
+            rows = self._connection.execute(
+                'SELECT tenant FROM leases WHERE worker = ? AND expires > ?',
+                (worker, now)
+            ).fetchall()
+        return frozenset(tenant for tenant, in rows)
+
+    def release(self, worker: str, tenants: Iterable[str]) -> None:
+        """Досрочный возврат аренды."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'DELETE FROM leases WHERE tenant = ? AND worker = ?',
+                ((tenant, worker) for tenant in tenants)
+            )
+
+    def leave(self, worker: str) -> None:
+        """Процесс завершается: снимаем отметку и все аренды."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (worker,)
+            )
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (worker,)
+            )
+
+    def close(self) -> None:
+        """Закрытие соединения с базой."""
+        self._connection.close()
+
+
+class Ownership:
+    """Студенты, которых опрашивает этот процесс.
+
+    on_release() вызывается перед возвратом аренды, чтобы сохранить
+    current_date для нового владельца.
+    """
+
+    def __init__(
+        self,
+        worker: str,
+        tenants: Iterable[str],
+        store: LeaseStore,
+        ttl: float = LEASE_TTL,
+        on_release: Optional[Callable] = None,
+        clock: Callable = time.time,
+    ) -> None:
+        self.worker = worker
+        self.tenants = list(tenants)
+        self.store = store
+        self.ttl = ttl
+        self.on_release = on_release
+        self.clock = clock
+        self.owned: FrozenSet[str] = frozenset()
+        self.valid_until = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def owns(self, tenant: str) -> bool:
+        """Действует ли аренда студента у этого процесса."""
+        return tenant in self.owned and self.clock() < self.valid_until
+
+    def refresh(self) -> None:
+        """Отметка, пересчет своей доли студентов и продление аренды."""
+        started = self.clock()
+        self.store.heartbeat(self.worker, self.ttl)
+        ring = HashRing(self.store.live_workers())
+        wanted = {
+            tenant for tenant in self.tenants
+            if ring.owner(tenant) == self.worker
+        }
+        surplus = self.owned - wanted
+        if surplus:
+            # Студенты переходят к вернувшемуся или новому процессу
+            self.owned = self.owned & wanted
+            if self.on_release is not None:
+                self.on_release()
+            self.store.release(self.worker, surplus)
+        owned = self.store.acquire(self.worker, wanted, self.ttl)
+        if owned != self.owned:
+            logger.info(
+                'Процесс %s опрашивает студентов: %s', self.worker, len(owned)
+            )
+        self.owned = owned
+        self.valid_until = started + self.ttl
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.ttl / 3):
+            try:
+                self.refresh()
+            except Exception as error:
+                # Аренда истечет сама, если база недоступна дольше ttl
+                logger.error('Не удалось продлить аренду: %s', error)
+
+    def start(self) -> None:
+        """Первое распределение и фоновое продление аренды."""
+        self.refresh()
+        self._thread = threading.Thread(
+            target=self._run, name=f'lease-{self.worker}', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка продления и возврат всех аренд."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.owned = frozenset()
+        if self.on_release is not None:
+            self.on_release()
+        self.store.leave(self.worker)
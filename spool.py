@@ -0,0 +1,140 @@
+"""Журнал исходящих сообщений: только дозапись в файл.
+
+Каждая строка файла - JSON: {"id": 1, "chat_id": 123, "text": "..."} для
+нового сообщения и {"ack": 1} для отправленного. При запуске журнал
+перечитывается, неподтвержденные сообщения возвращаются в очередь.
+Когда подтверждений накапливается SPOOL_COMPACT_AFTER, файл
+переписывается без них.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+from settings import SPOOL_COMPACT_AFTER, SPOOL_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class Spool:
+    """Журнал неотправленных сообщений."""
+
+    def __init__(
+        self,
+        path: str = SPOOL_PATH,
+        compact_after: int = SPOOL_COMPACT_AFTER,
+        fsync: bool = True,
+    ) -> None:
+        self.path = path
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._pending: OrderedDict = OrderedDict()
+        self._next_id = 1
+        self._acked = 0
+        self._replay()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        # Конец последней целой строки: все после него - недописанный при
+        # падении хвост
+        complete = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                complete += len(line)
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError) as error:
+                    # Испорченная строка не должна мешать запуску бота
+                    logger.error(
+                        'Пропущена испорченная строка журнала %s: %s',
+                        self.path, error
+                    )
+        if complete < os.path.getsize(self.path):
+            # Иначе следующая запись склеится с хвостом и потеряется
+            os.truncate(self.path, complete)
+
+    def _apply(self, record: dict) -> None:
+        if 'ack' in record:
+            self._pending.pop(record['ack'], None)
+            self._acked += 1
+            return
+        entry_id, chat_id, text = (
+            record['id'], record['chat_id'], record['text']
+        )
+        if type(entry_id) is not int:
+            raise TypeError(f'номер записи не число: {entry_id!r}')
+        self._pending[entry_id] = (chat_id, text)
+        self._next_id = max(self._next_id, entry_id + 1)
+
+    def _write(self, records: Iterable[dict]) -> None:
+        self._file.write(''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, chat_id, text: str) -> int:
+        """Запись нового сообщения, возвращает его номер в журнале."""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._pending[entry_id] = (chat_id, text)
+            self._write([{'id': entry_id, 'chat_id': chat_id, 'text': text}])
+        return entry_id
+
+    def ack(self, entry_ids: Iterable[int]) -> None:
+        """Отметка сообщений отправленными (или окончательно отброшенными)."""
+        entry_ids = [
+            entry_id for entry_id in entry_ids if entry_id is not None
+        ]
+        if not entry_ids:
+            return
+        with self._lock:
+            for entry_id in entry_ids:
+                self._pending.pop(entry_id, None)
+            self._write({'ack': entry_id} for entry_id in entry_ids)
+            self._acked += len(entry_ids)
+            if self._acked >= self.compact_after:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Переписываем журнал, оставляя только неотправленные."""
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            for entry_id, (chat_id, text) in self._pending.items():
+                file.write(json.dumps(
+                    {'id': entry_id, 'chat_id': chat_id, 'text': text},
+                    ensure_ascii=False
+                ) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._acked = 0
+
+    def pending(self) -> List[Tuple[int, object, str]]:
+        """Неотправленные сообщения в порядке постановки."""
+        with self._lock:
+            return [
+                (entry_id, chat_id, text)
+                for entry_id, (chat_id, text) in self._pending.items()
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self) -> None:
+        """Закрытие файла журнала."""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,138 @@
+"""Потоковый разбор ответа API: работы отдаются по мере получения.
+
+Верхний уровень ответа разбирается вручную, значения - json.raw_decode.
+Массив homeworks не собирается целиком: в памяти одновременно только
+текущая работа и недочитанный хвост буфера.
+"""
+import codecs
+import json
+from typing import Iterable, Iterator
+
+from records import Homework, read_homework
+
+WHITESPACE = ' \t\n\r'
+decoder = json.JSONDecoder()
+
+
+class HomeworkStream:
+    """Итератор по работам (records.Homework) из потока байт ответа API.
+
+    После исчерпания итератора остальные ключи верхнего уровня
+    (current_date) доступны через get(), как у обычного ответа.
+    Ошибки формата - те же, что у check_response.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._fields: dict = {}
+        self._has_homeworks = False
+        self.count = 0
+
+    def get(self, key: str, default=None):
+        """Ключ верхнего уровня ответа."""
+        return self._fields.get(key, default)
+
+    def _read(self) -> bool:
+        """Дочитываем следующий кусок, False - поток кончился."""
+        if self._eof:
+            return False
+        # Отбрасываем уже разобранную часть буфера
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        """Первый непробельный символ, пустая строка - конец потока."""
+        while True:
+            while (
+                self._pos < len(self._buffer)
+                and self._buffer[self._pos] in WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ''
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise json.JSONDecodeError(
+                f'Ожидался символ {char!r}', self._buffer, self._pos
+            )
+        self._pos += 1
+
+    def _value(self):
+        """Следующее JSON-значение целиком."""
+        self._peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # Число в конце буфера может продолжиться в следующем куске
+            if end == len(self._buffer) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def _homeworks(self) -> Iterator[Homework]:
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            self.count += 1
+            record = read_homework(self._value())
+            if record is not None:
+                yield record
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect(']')
+            return
+
+    def __iter__(self) -> Iterator[Homework]:
+        if self._peek() != '{':
+            # Не объект - разбираем целиком, чтобы сообщить об ошибке
+            self._value()
+            raise TypeError('Ответ API не словарь')
+        self._pos += 1
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            yield from self._members()
+
+        if not self._has_homeworks:
+            raise KeyError("В ответе API нет ключа 'homeworks'")
+
+    def _members(self) -> Iterator[Homework]:
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'homeworks':
+                self._has_homeworks = True
+                if self._peek() != '[':
+                    self._value()
+                    raise TypeError(
+                        'В ответе API ключ homeworks - не список!'
+                    )
+                yield from self._homeworks()
+            else:
+                self._fields[key] = self._value()
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect('}')
+            return
@@ -0,0 +1,136 @@
+"""Запуск engine.py в нескольких процессах.
+
+Supervisor запускает SUPERVISOR_WORKERS процессов-обработчиков и
+перезапускает упавшие. Студенты делятся между процессами по хеш-кольцу
+с арендой в базе состояния (sharding.py), у каждого процесса свой журнал
+исходящих сообщений.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, Optional
+
+from logs import setup_logging
+from settings import (SPOOL_PATH, SUPERVISOR_WORKERS, TELEGRAM_TOKEN,
+                      TENANTS_FILE)
+from tenants import load_tenants
+
+RESTART_DELAY = 1
+RESTART_DELAY_MAX = 60
+# Процесс, проработавший дольше, считается запущенным успешно
+STABLE_AFTER = 60
+
+logger = logging.getLogger(__name__)
+
+
+def worker_spool_path(index: int, spool_path: str = SPOOL_PATH) -> str:
+    """Свой журнал для каждого процесса: outbox.spool -> outbox-0.spool."""
+    root, extension = os.path.splitext(spool_path)
+    return f'{root}-{index}{extension}'
+
+
+def _stop(signum, frame) -> None:
+    raise SystemExit(0)
+
+
+def run_worker(index: int, workers: int) -> None:
+    """Процесс-обработчик: engine.run для своей доли студентов."""
+    # engine загружает requests и telegram, в supervisor они не нужны
+    import engine
+
+    signal.signal(signal.SIGTERM, _stop)
+    setup_logging()
+    engine.run(
+        load_tenants(TENANTS_FILE),
+        spool_path=worker_spool_path(index),
+        worker=str(index),
+        workers=workers,
+    )
+
+
+class Supervisor:
+    """Запуск, наблюдение и перезапуск процессов-обработчиков."""
+
+    def __init__(self, workers: int, target=run_worker) -> None:
+        self.workers = workers
+        self.target = target
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.started: Dict[int, float] = {}
+        self.delays: Dict[int, float] = {}
+        self.restart_at: Dict[int, float] = {}
+        self._running = False
+
+    def _start(self, index: int) -> None:
+        # spawn: обработчик не наследует потоки и соединения supervisor
+        process = multiprocessing.get_context('spawn').Process(
+            target=self.target, args=(index, self.workers),
+            name=f'worker-{index}'
+        )
+        process.start()
+        self.processes[index] = process
+        self.started[index] = time.monotonic()
+        logger.info('Запущен процесс %s, pid %s', index, process.pid)
+
+    def check(self) -> None:
+        """Перезапуск упавших процессов с нарастающей задержкой."""
+        now = time.monotonic()
+        for index, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            if index not in self.restart_at:
+                uptime = now - self.started[index]
+                delay = self.delays.get(index, RESTART_DELAY)
+                if uptime >= STABLE_AFTER:
+                    delay = RESTART_DELAY
+                logger.error(
+                    'Процесс %s завершился с кодом %s, перезапуск через %s с',
+                    index, process.exitcode, delay
+                )
+                self.restart_at[index] = now + delay
+                self.delays[index] = min(delay * 2, RESTART_DELAY_MAX)
+            elif now >= self.restart_at[index]:
+                del self.restart_at[index]
+                self._start(index)
+
+    def run(self, interval: float = 1.0) -> None:
+        """Запуск всех процессов и наблюдение до остановки."""
+        self._running = True
+        for index in range(self.workers):
+            self._start(index)
+        try:
+            while self._running:
+                time.sleep(interval)
+                self.check()
+        finally:
+            self.stop()
+
+    def stop(self, timeout: Optional[float] = 30) -> None:
+        """Остановка процессов: SIGTERM и ожидание завершения."""
+        self._running = False
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+
+
+def main() -> None:
+    """Запуск бота в нескольких процессах."""
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        raise SystemExit('Нужно установить переменную TELEGRAM_TOKEN')
+    if not load_tenants(TENANTS_FILE):
+        raise SystemExit(f'Список студентов пуст: {TENANTS_FILE}')
+
+    workers = SUPERVISOR_WORKERS or os.cpu_count() or 1
+    signal.signal(signal.SIGTERM, _stop)
+    logger.info('Запуск %s процессов', workers)
+    Supervisor(workers).run()
+
+
+if __name__ == '__main__':
+    main()
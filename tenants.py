@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+from typing import List
+
+from settings import PRACTICUM_TOKEN, TELEGRAM_CHAT_ID
+
+
+def tenant_key(practicum_token: str) -> str:
+    """Короткий отпечаток токена Практикума."""
+    return hashlib.sha1(str(practicum_token).encode()).hexdigest()[:12]
+
+
+class Tenant:
+    """Студент: токен Практикума и чат, в который уходят уведомления.
+
+    key - короткий отпечаток токена, чтобы не хранить сам токен в логах и
+    служебных таблицах.
+    """
+
+    __slots__ = ('practicum_token', 'chat_id', 'key', 'headers')
+
+    def __init__(self, practicum_token: str, chat_id) -> None:
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.key = tenant_key(practicum_token)
+        self.headers = {'Authorization': f'OAuth {practicum_token}'}
+
+    def __repr__(self) -> str:
+        return f'Tenant({self.key}, chat_id={self.chat_id})'
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """Читаем список студентов из JSON-файла.
+
+    Если файла нет - работаем с единственным студентом из переменных
+    окружения, как и однопользовательский homework.py.
+    """
+    if not os.path.exists(path):
+        if PRACTICUM_TOKEN and TELEGRAM_CHAT_ID:
+            return [Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)]
+        return []
+
+    with open(path, encoding='utf-8') as file:
+        roster = json.load(file)
+
+    try:
+        return [
+            Tenant(item['practicum_token'], item['chat_id'])
+            for item in roster
+        ]
+    except (KeyError, TypeError) as error:
+        raise ValueError(f'Некорректная запись в {path}: {error}')
@@ -0,0 +1,124 @@
+import asyncio
+
+from alerts import ErrorAggregator
+from clock import VirtualClock
+from engine import Engine
+from exceptions import APIResponseError
+from tenants import Tenant
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAlerts:
+
+    def test_first_error_sent_immediately(self):
+        alerts = ErrorAggregator(window=600, clock=FakeClock())
+        assert alerts.record_failure(1, APIResponseError('код 500')) == (
+            'Сбой в работе программы: код 500'
+        ), 'Первая ошибка должна уходить сразу в прежнем виде'
+
+    def test_alternating_errors_summarized(self):
+        clock = FakeClock()
+        alerts = ErrorAggregator(window=600, clock=clock)
+        alerts.record_failure(1, APIResponseError('код 500'))
+        for step in range(1, 10):
+            clock.now = step * 60
+            error = (
+                APIResponseError(f'код {500 + step}') if step % 2
+                else TimeoutError('timeout')
+            )
+            assert alerts.record_failure(1, error) is None, (
+                'Внутри окна ошибки не должны отправляться'
+            )
+
+        clock.now = 600
+        summary = alerts.record_failure(1, TimeoutError('timeout'))
+        assert summary.startswith('Ошибки с последнего уведомления:')
+        assert 'APIResponseError: 5 раз' in summary, (
+            'Ошибки одного типа должны группироваться'
+        )
+        assert 'TimeoutError: 5 раз' in summary
+
+    def test_long_outage_alerted_once(self):
+        clock = VirtualClock()
+        alerts = ErrorAggregator(window=600, clock=clock.time)
+        sent = []
+        # Шесть часов одна и та же ошибка при опросе раз в 10 минут
+        for _ in range(36):
+            sent.append(alerts.record_failure(1, APIResponseError('код 500')))
+            clock.sleep(600)
+        assert [text for text in sent if text] == [
+            'Сбой в работе программы: код 500'
+        ], 'О затянувшемся сбое с той же ошибкой нужно сообщить один раз'
+
+        summary = alerts.record_failure(1, TimeoutError('timeout'))
+        assert 'TimeoutError: 1 раз' in summary, (
+            'Новый тип ошибки должен попасть в сводку'
+        )
+        assert 'APIResponseError: 35 раз' in summary
+        clock.sleep(600)
+        assert alerts.record_failure(1, TimeoutError('timeout')) is None
+
+        notice = alerts.record_success(1)
+        assert notice.startswith('Работа восстановлена, ошибок подряд: 38')
+        assert 'TimeoutError: 1 раз' in notice
+
+        assert alerts.record_failure(1, APIResponseError('код 500')), (
+            'После восстановления о новом сбое нужно сообщить сразу'
+        )
+
+    def test_rate_limit_per_chat(self):
+        alerts = ErrorAggregator(window=600, clock=FakeClock())
+        assert alerts.record_failure(1, Exception('boom'))
+        assert alerts.record_failure(2, Exception('boom')), (
+            'Ограничение должно действовать отдельно для каждого чата'
+        )
+        assert alerts.record_failure(1, Exception('boom')) is None
+
+    def test_recovered_notice(self):
+        clock = FakeClock()
+        alerts = ErrorAggregator(window=600, clock=clock)
+        assert alerts.record_success(1) is None, (
+            'Без сбоя сообщение о восстановлении не нужно'
+        )
+        alerts.record_failure(1, Exception('boom'))
+        clock.now = 60
+        alerts.record_failure(1, Exception('boom'))
+        notice = alerts.record_success(1)
+        assert notice.startswith(
+            'Работа восстановлена, ошибок подряд: 2'
+        )
+        assert 'Exception: 1 раз' in notice, (
+            'Неотправленные ошибки должны попасть в сообщение'
+        )
+        assert alerts.record_success(1) is None
+
+    def test_engine_sends_recovered_notice(self):
+        tenant = Tenant('token-a', 1)
+        responses = [Exception('boom'), {'homeworks': [], 'current_date': 1}]
+        sent = []
+
+        def fetch(current_timestamp, headers):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        engine = Engine(
+            [tenant], send=lambda chat_id, text: sent.append(text),
+            fetch=fetch
+        )
+        asyncio.run(engine.poll_once(tenant))
+        asyncio.run(engine.poll_once(tenant))
+
+        assert sent == [
+            'Сбой в работе программы: boom',
+            'Работа восстановлена, ошибок подряд: 1',
+        ]
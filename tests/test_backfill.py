@@ -0,0 +1,206 @@
+import functools
+import threading
+import time
+
+import pytest
+
+import backfill as backfill_module
+from backfill import Backfill, BackfillProgress, split_windows
+from checkpoint import CheckpointStore
+from dedup import DeliveryIndex
+from delivery import Delivery
+from history import HistoryStore, format_date, parse_date
+from spool import Spool
+from tenants import Tenant
+
+DAY = 24 * 60 * 60
+
+
+class FakeAPI:
+    """API с from_date: все изменения статусов не раньше него."""
+
+    def __init__(self, homeworks, delay=0.0):
+        self.homeworks = homeworks
+        self.delay = delay
+        self.fail = set()
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, current_timestamp, headers):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(current_timestamp)
+        try:
+            time.sleep(self.delay)
+            if current_timestamp in self.fail:
+                raise ConnectionError('Эндпоинт не доступен')
+            # API отдает работы не по порядку
+            return {
+                'homeworks': [
+                    homework for homework in reversed(self.homeworks)
+                    if parse_date(homework['date_updated'], 0)
+                    >= current_timestamp
+                ],
+                'current_date': current_timestamp,
+            }
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def status(name, value, updated):
+    return {
+        'id': 1,
+        'homework_name': name,
+        'status': value,
+        'date_updated': format_date(updated),
+    }
+
+
+class TestBackfill:
+
+    def make_backfill(self, tmp_path, api, sent, tenants=None, **kwargs):
+        path = str(tmp_path / 'state.sqlite3')
+        return Backfill(
+            tenants or [Tenant('token-a', 1)],
+            send=lambda chat_id, message: sent.append(message),
+            fetch=api,
+            window=DAY,
+            progress=BackfillProgress(path),
+            delivered=DeliveryIndex(path),
+            **kwargs
+        )
+
+    def test_split_windows(self):
+        assert split_windows(0, 25, 10) == [(0, 10), (10, 20), (20, 25)], (
+            'Последнее окно должно заканчиваться концом периода'
+        )
+        with pytest.raises(ValueError):
+            split_windows(0, 10, 0)
+
+    def test_one_request_per_tenant_under_cap(self, tmp_path):
+        homeworks = [
+            status(f'hw{day}', 'approved', day * DAY + 100)
+            for day in range(12)
+        ]
+        api = FakeAPI(homeworks, delay=0.05)
+        sent = []
+        tenants = [Tenant(f'token-{number}', number) for number in range(8)]
+        backfill = self.make_backfill(
+            tmp_path, api, sent, tenants=tenants, concurrency=4
+        )
+
+        summary = backfill.run(0, 12 * DAY)
+
+        assert api.calls == [0] * 8, (
+            'Для студента нужен один запрос с начала периода, а не '
+            'запрос на каждое окно'
+        )
+        assert api.peak == 4, (
+            'Студенты должны загружаться параллельно, но не больше '
+            'concurrency запросов одновременно'
+        )
+        assert summary['windows'] == 8 * 12 and summary['sent'] == 8 * 12
+        assert sent[:12] == [
+            f'Изменился статус проверки работы "hw{day}". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!'
+            for day in range(12)
+        ], 'Статусы должны отправляться по порядку date_updated'
+
+    def test_resume_from_first_pending_window(self, tmp_path):
+        homeworks = [
+            status('hw1', 'reviewing', 100),
+            status('hw1', 'rejected', DAY + 100),
+            status('hw1', 'reviewing', 2 * DAY + 100),
+            status('hw1', 'approved', 3 * DAY + 100),
+            status('hw1', 'approved', 5 * DAY),
+        ]
+        api = FakeAPI(homeworks)
+        api.fail.add(0)
+        sent = []
+        checkpoints = CheckpointStore(str(tmp_path / 'state.sqlite3'))
+        backfill = self.make_backfill(
+            tmp_path, api, sent, checkpoints=checkpoints
+        )
+
+        summary = backfill.run(0, 4 * DAY)
+        assert summary['windows'] == 0 and summary['pending'] == 4, (
+            'При ошибке запроса окна должны остаться на следующий запуск'
+        )
+        assert sent == []
+        assert checkpoints.load(backfill.tenants[0].key) is None, (
+            'current_date не должен сдвигаться, пока период не загружен'
+        )
+
+        api.fail.clear()
+        assert backfill.run(0, 2 * DAY)['sent'] == 2
+
+        api.calls.clear()
+        summary = backfill.run(0, 4 * DAY)
+        assert api.calls == [2 * DAY], (
+            'Повторный запуск должен запрашивать статусы с первого '
+            'незагруженного окна'
+        )
+        assert summary['skipped'] == 2 and summary['sent'] == 2, (
+            'Статусы после конца периода отправляться не должны'
+        )
+        assert [message.split('". ')[-1] for message in sent] == [
+            'Работа взята на проверку ревьюером.',
+            'Работа проверена: у ревьюера есть замечания.',
+            'Работа взята на проверку ревьюером.',
+            'Работа проверена: ревьюеру всё понравилось. Ура!',
+        ]
+        assert checkpoints.load(backfill.tenants[0].key) == 4 * DAY, (
+            'После загрузки периода опрос должен продолжиться с его конца'
+        )
+
+    def test_main_sends_everything_before_exit(self, tmp_path, monkeypatch):
+        homeworks = [
+            status(f'hw{day}', 'approved', day * DAY + 100)
+            for day in range(5)
+        ]
+        tenants = [Tenant(f'token-{number}', number) for number in range(60)]
+        sent = []
+
+        def deliver(bot, chat_id, text):
+            time.sleep(0.001)
+            sent.extend(text.split('\n'))
+
+        path = str(tmp_path / 'state.sqlite3')
+        spool_path = str(tmp_path / 'outbox.spool')
+        monkeypatch.setattr(backfill_module, 'TELEGRAM_TOKEN', '1234:abc')
+        monkeypatch.setattr(backfill_module, 'SPOOL_PATH', spool_path)
+        monkeypatch.setattr(backfill_module, 'setup_logging', lambda: None)
+        monkeypatch.setattr(backfill_module, 'load_tenants',
+                            lambda path: tenants)
+        monkeypatch.setattr(backfill_module, 'create_bot', lambda: None)
+        monkeypatch.setattr(backfill_module, 'deliver', deliver)
+        api = FakeAPI(homeworks)
+        monkeypatch.setattr(backfill_module, 'Backfill',
+                            functools.partial(Backfill, fetch=api))
+        monkeypatch.setattr(backfill_module, 'Delivery',
+                            functools.partial(Delivery, global_rate=1000,
+                                              global_burst=1000))
+        for name, factory in (
+            ('CheckpointStore', CheckpointStore),
+            ('BackfillProgress', BackfillProgress),
+            ('DeliveryIndex', DeliveryIndex),
+        ):
+            monkeypatch.setattr(backfill_module, name,
+                                functools.partial(factory, path))
+        monkeypatch.setattr(backfill_module, 'HistoryStore',
+                            functools.partial(HistoryStore, path + '.h'))
+
+        backfill_module.main(['--since', '0', '--until', str(5 * DAY)])
+
+        assert len(sent) == 300, (
+            'Все статусы должны быть отправлены до выхода из main'
+        )
+        spool = Spool(str(tmp_path / 'outbox-backfill.spool'))
+        assert spool.pending() == [], (
+            'В журнале догрузки не должно остаться неотправленного'
+        )
+        spool.close()
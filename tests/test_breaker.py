@@ -0,0 +1,132 @@
+import pytest
+import telegram
+
+from breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, api_failure,
+                     telegram_failure)
+from delivery import Delivery
+from exceptions import APIResponseError, CircuitOpenError
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise ConnectionError('down')
+
+
+class TestBreaker:
+
+    def make_breaker(self, clock):
+        return CircuitBreaker('test', threshold=3, reset_timeout=10,
+                              clock=clock)
+
+    def test_opens_after_threshold(self):
+        breaker = self.make_breaker(FakeClock())
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        assert breaker.state == OPEN
+
+        calls = []
+        with pytest.raises(CircuitOpenError):
+            breaker.call(calls.append, 1)
+        assert calls == [], (
+            'Разомкнутый автомат не должен выполнять вызов'
+        )
+        assert breaker.snapshot()['retry_in'] == 10
+        assert breaker.snapshot()['rejected'] == 1
+
+    def test_single_probe_closes(self):
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        clock.now = 10
+
+        def probe():
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.call(lambda: None)
+            return 'ok'
+
+        assert breaker.call(probe) == 'ok', (
+            'Во время пробного вызова остальные вызовы отклоняются'
+        )
+        assert breaker.state == CLOSED
+        assert breaker.failures == 0
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        clock.now = 10
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+        assert breaker.state == OPEN
+        assert breaker.snapshot()['retry_in'] == 10, (
+            'После неудачной пробы ожидание начинается заново'
+        )
+
+    def test_interrupted_probe_is_released(self):
+        clock = FakeClock()
+        breaker = self.make_breaker(clock)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+        clock.now = 10
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            breaker.call(interrupted)
+        assert breaker.state != HALF_OPEN, (
+            'Прерванный пробный вызов не должен занимать автомат'
+        )
+        assert breaker.call(lambda: 'ok') == 'ok', (
+            'Следующий вызов должен стать пробным'
+        )
+        assert breaker.state == CLOSED
+
+    def test_failure_classification(self):
+        assert api_failure(APIResponseError('', 503))
+        assert not api_failure(APIResponseError('', 401)), (
+            'Ошибка токена студента не говорит о недоступности API'
+        )
+        assert api_failure(Exception('Эндпоинт не доступен'))
+        assert telegram_failure(telegram.error.TimedOut())
+        assert not telegram_failure(telegram.error.BadRequest('bad'))
+
+    def test_delivery_requeues_while_open(self):
+        clock = FakeClock()
+        calls = []
+
+        def send(chat_id, text):
+            calls.append(text)
+            raise telegram.error.NetworkError('down')
+
+        breaker = CircuitBreaker('telegram', threshold=1, reset_timeout=30,
+                                 is_failure=telegram_failure, clock=clock)
+        delivery = Delivery(send=send, clock=clock, breaker=breaker)
+        delivery.submit(1, 'текст')
+        delivery.flush_once()
+        clock.now = 5
+        delivery.flush_once()
+        clock.now = 10
+        delivery.flush_once()
+
+        assert calls == ['текст'], (
+            'Пока автомат разомкнут, Telegram не должен вызываться'
+        )
+        assert delivery.stats()['queued_lines'] == 1, (
+            'Сообщение должно остаться в очереди'
+        )
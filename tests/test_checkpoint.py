@@ -0,0 +1,45 @@
+from checkpoint import CheckpointStore
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCheckpoint:
+
+    def test_resume_after_restart(self, tmp_path, random_timestamp):
+        path = str(tmp_path / 'state.sqlite3')
+        store = CheckpointStore(path, flush_interval=0)
+        store.save('tenant', random_timestamp)
+        store.close()
+
+        store = CheckpointStore(path)
+        assert store.load('tenant') == random_timestamp, (
+            'После перезапуска должен восстанавливаться current_date'
+        )
+        assert store.load('unknown') is None
+        store.close()
+
+    def test_saves_are_batched(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        clock = FakeClock()
+        store = CheckpointStore(path, flush_interval=5, clock=clock)
+        store.save('a', 1)
+        store.save('b', 2)
+
+        reader = CheckpointStore(path)
+        assert reader.load_all() == {}, (
+            'До истечения интервала записи должны копиться в памяти'
+        )
+        assert store.load('a') == 1
+
+        clock.now = 5
+        store.save('a', 3)
+        assert reader.load_all() == {'a': 3, 'b': 2}
+        reader.close()
+        store.close()
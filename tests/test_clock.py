@@ -0,0 +1,143 @@
+import functools
+import json
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+import telegram
+
+import homework
+from checkpoint import CheckpointStore
+from clock import VirtualClock
+from dedup import DeliveryIndex
+from history import HistoryStore
+from spool import Spool
+
+
+class StopLoop(Exception):
+    pass
+
+
+class LimitedClock(VirtualClock):
+
+    def __init__(self, iterations):
+        super().__init__()
+        self.iterations = iterations
+        self.delays = []
+
+    def sleep(self, seconds):
+        self.delays.append(seconds)
+        if len(self.delays) >= self.iterations:
+            raise StopLoop
+        super().sleep(seconds)
+
+
+class FakeResponse:
+    status_code = HTTPStatus.OK
+
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeBot:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        pass
+
+
+class TestVirtualClock:
+
+    def test_sleep_moves_time(self):
+        clock = VirtualClock(1000)
+        clock.sleep(600)
+        clock.sleep(-5)
+        assert clock.time() == clock.monotonic() == 1600, (
+            'sleep должен мгновенно сдвигать время вперед'
+        )
+
+    def test_main_runs_on_virtual_clock(self, tmp_path, monkeypatch):
+        clock = LimitedClock(iterations=5)
+        from_dates, current_dates = [], []
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            from_dates.append(params['from_date'])
+            current_dates.append(int(clock.time()))
+            return FakeResponse(
+                {'homeworks': [], 'current_date': current_dates[-1]}
+            )
+
+        path = str(tmp_path / 'state.sqlite3')
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 1)
+        monkeypatch.setattr(homework, 'setup_logging', lambda: None)
+        monkeypatch.setattr(homework, 'CheckpointStore',
+                            functools.partial(CheckpointStore, path))
+        monkeypatch.setattr(homework, 'DeliveryIndex',
+                            functools.partial(DeliveryIndex, path))
+        monkeypatch.setattr(homework, 'HistoryStore',
+                            functools.partial(HistoryStore, path + '.h'))
+        monkeypatch.setattr(homework, 'Spool',
+                            functools.partial(Spool, path + '.spool'))
+        monkeypatch.setattr(telegram, 'Bot', FakeBot)
+        monkeypatch.setattr(requests, 'get', fake_get)
+
+        start = time.monotonic()
+        with pytest.raises(StopLoop):
+            homework.main(clock)
+
+        assert time.monotonic() - start < 5, (
+            'С виртуальными часами main() не должен ждать'
+        )
+        assert from_dates == [1600000000] + current_dates[:-1], (
+            'from_date каждого запроса должен быть current_date '
+            'предыдущего ответа'
+        )
+        assert clock.time() == 1600000000 + sum(clock.delays[:-1]), (
+            'Время между запросами должно идти через clock.sleep'
+        )
+
+    def test_main_alerts_long_outage_once(self, tmp_path, monkeypatch):
+        clock = LimitedClock(iterations=100)
+        alerts = []
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            response = FakeResponse({})
+            response.status_code = HTTPStatus.INTERNAL_SERVER_ERROR
+            return response
+
+        path = str(tmp_path / 'state.sqlite3')
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 1)
+        monkeypatch.setattr(homework, 'setup_logging', lambda: None)
+        monkeypatch.setattr(homework, 'CheckpointStore',
+                            functools.partial(CheckpointStore, path))
+        monkeypatch.setattr(homework, 'DeliveryIndex',
+                            functools.partial(DeliveryIndex, path))
+        monkeypatch.setattr(homework, 'HistoryStore',
+                            functools.partial(HistoryStore, path + '.h'))
+        monkeypatch.setattr(homework, 'Spool',
+                            functools.partial(Spool, path + '.spool'))
+        monkeypatch.setattr(homework, 'broadcast',
+                            lambda delivery, text: alerts.append(text))
+        monkeypatch.setattr(telegram, 'Bot', FakeBot)
+        monkeypatch.setattr(requests, 'get', fake_get)
+
+        with pytest.raises(StopLoop):
+            homework.main(clock)
+
+        assert clock.time() - 1600000000 > 6 * 60 * 60, (
+            'Сбой должен длиться несколько часов виртуального времени'
+        )
+        assert len(alerts) <= 2, (
+            'О затянувшемся сбое не нужно напоминать каждый цикл: '
+            f'{alerts}'
+        )
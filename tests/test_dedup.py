@@ -0,0 +1,43 @@
+import dedup
+from dedup import DeliveryIndex
+
+
+class TestDeliveryIndex:
+    HOMEWORK = {
+        'id': 123,
+        'homework_name': 'hw123',
+        'status': 'approved',
+        'date_updated': '2020-02-13T14:40:57Z',
+    }
+
+    def test_same_status_marked_once(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        index = DeliveryIndex(path, cache_size=2)
+        assert index.check_and_mark('tenant', self.HOMEWORK)
+        assert not index.check_and_mark('tenant', self.HOMEWORK), (
+            'Повторный статус не должен отправляться'
+        )
+        assert index.check_and_mark('other', self.HOMEWORK), (
+            'Одинаковые работы разных студентов не должны совпадать'
+        )
+        index.close()
+
+        index = DeliveryIndex(path, cache_size=2)
+        assert index.seen('tenant', self.HOMEWORK), (
+            'Индекс должен переживать перезапуск'
+        )
+        changed = dict(self.HOMEWORK, status='rejected')
+        assert index.check_and_mark('tenant', changed)
+        index.close()
+
+    def test_rows_are_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dedup, 'PRUNE_EVERY', 10)
+        index = DeliveryIndex(
+            str(tmp_path / 'state.sqlite3'), cache_size=5, max_rows=20
+        )
+        for number in range(100):
+            index.check_and_mark('tenant', dict(self.HOMEWORK, id=number))
+
+        assert len(index) <= 20
+        assert len(index._cache) == 5
+        index.close()
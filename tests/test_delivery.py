@@ -0,0 +1,86 @@
+import telegram
+
+from delivery import Delivery, TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDelivery:
+
+    def test_token_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        for _ in range(2):
+            assert bucket.wait_time() == 0
+            bucket.take()
+        assert bucket.wait_time() == 1, (
+            'После исчерпания токенов нужно ждать пополнения'
+        )
+        clock.now = 1
+        assert bucket.wait_time() == 0
+
+    def test_lines_for_one_chat_are_merged(self):
+        sent = []
+        delivery = Delivery(
+            send=lambda chat_id, text: sent.append((chat_id, text)),
+            clock=FakeClock()
+        )
+        for line in ('first', 'second', 'third'):
+            delivery.submit(1, line)
+        delivery.submit(2, 'other')
+
+        delivery.flush_once()
+
+        assert sent == [(1, 'first\nsecond\nthird'), (2, 'other')], (
+            'Строки для одного чата должны уйти одним сообщением'
+        )
+        assert delivery.stats()['queued_lines'] == 0
+        assert delivery.stats()['sent_lines'] == 4
+
+    def test_chat_rate_limit(self):
+        clock = FakeClock()
+        sent = []
+        delivery = Delivery(
+            send=lambda chat_id, text: sent.append(text),
+            chat_rate=1, chat_burst=1, max_length=5, clock=clock
+        )
+        delivery.submit(1, 'one')
+        delivery.submit(1, 'two')
+
+        delivery.flush_once()
+        wait = delivery.flush_once()
+
+        assert sent == ['one'] and wait == 1
+        assert delivery.stats()['queued_lines'] == 1
+        clock.now = 1
+        delivery.flush_once()
+        assert sent == ['one', 'two']
+
+    def test_retry_after_requeues(self):
+        clock = FakeClock()
+        calls = []
+
+        def send(chat_id, text):
+            calls.append(text)
+            if len(calls) == 1:
+                raise telegram.error.RetryAfter(5)
+
+        delivery = Delivery(send=send, clock=clock)
+        delivery.submit(1, 'status')
+        delivery.flush_once()
+
+        assert delivery.stats()['queued_lines'] == 1, (
+            'При RetryAfter сообщение не должно теряться'
+        )
+        assert delivery.flush_once() > 5
+        clock.now = 10
+        delivery.flush_once()
+        assert calls == ['status', 'status']
+        assert delivery.stats()['queued_lines'] == 0
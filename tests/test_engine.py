@@ -0,0 +1,57 @@
+import asyncio
+
+from engine import Engine
+from tenants import Tenant
+
+
+class TestEngine:
+
+    def make_engine(self, tenants, responses, sent):
+        def fetch(current_timestamp, headers):
+            response = responses[headers['Authorization']]
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        def send(chat_id, message):
+            sent.append((chat_id, message))
+
+        return Engine(tenants, send=send, fetch=fetch, concurrency=2)
+
+    def test_poll_once_sends_to_tenant_chat(self, random_timestamp):
+        tenants = [Tenant('token-a', 1), Tenant('token-b', 2)]
+        responses = {
+            'OAuth token-a': {
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            },
+            'OAuth token-b': {'homeworks': [], 'current_date': 1},
+        }
+        sent = []
+        engine = self.make_engine(tenants, responses, sent)
+
+        async def poll_all():
+            await asyncio.gather(*(engine.poll_once(t) for t in tenants))
+
+        asyncio.run(poll_all())
+
+        assert len(sent) == 1 and sent[0][0] == 1, (
+            'Сообщение должно уйти только в чат студента с новым статусом'
+        )
+        assert engine.timestamps[tenants[0].key] == random_timestamp, (
+            'Проверьте, что движок сохраняет current_date каждого студента'
+        )
+        assert engine.timestamps[tenants[1].key] == 1
+
+    def test_poll_once_error_sent_once(self):
+        tenant = Tenant('token-a', 1)
+        responses = {'OAuth token-a': Exception('boom')}
+        sent = []
+        engine = self.make_engine([tenant], responses, sent)
+
+        asyncio.run(engine.poll_once(tenant))
+        asyncio.run(engine.poll_once(tenant))
+
+        assert len(sent) == 1, (
+            'Одинаковая ошибка не должна отправляться повторно'
+        )
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+import homework
+from hedging import Hedger
+
+
+class ScriptedCall:
+    """Запрос, время ответа которого задано по номеру вызова."""
+
+    def __init__(self, delays, error_on=()):
+        self.delays = delays
+        self.error_on = error_on
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            number = self.calls
+            self.calls += 1
+        time.sleep(self.delays.get(number, 0.001))
+        if number in self.error_on:
+            raise ConnectionError(f'Сбой запроса {number}')
+        return (value, number)
+
+
+class TestHedger:
+
+    def warm_up(self, hedger, call, count=20):
+        for _ in range(count):
+            hedger.call(call, 'warm-up')
+
+    def test_no_hedge_without_samples(self):
+        hedger = Hedger(budget=1, min_samples=20)
+        call = ScriptedCall({0: 0.05})
+        assert hedger.call(call, 'x') == ('x', 0)
+        assert call.calls == 1 and hedger.delay() is None, (
+            'Без накопленных времен ответа повтор не отправляется'
+        )
+
+    def test_slow_request_is_hedged(self):
+        hedger = Hedger(budget=0.5, min_samples=20)
+        call = ScriptedCall({20: 1.0})
+        self.warm_up(hedger, call)
+
+        start = time.perf_counter()
+        result = hedger.call(call, 'x')
+        elapsed = time.perf_counter() - start
+
+        assert result == ('x', 21), (
+            'Должен использоваться ответ на повторный запрос'
+        )
+        assert elapsed < 0.5, 'Медленный ответ не должен задерживать вызов'
+        assert hedger.stats() == {'requests': 21, 'hedges': 1, 'won': 1}
+
+    def test_hedges_limited_by_budget(self):
+        hedger = Hedger(budget=0.1, min_samples=20)
+        call = ScriptedCall({number: 0.05 for number in range(20, 100)})
+        self.warm_up(hedger, call)
+        for _ in range(20):
+            hedger.call(call, 'x')
+        stats = hedger.stats()
+        assert 1 <= stats['hedges'] <= stats['requests'] * 0.1, (
+            'Повторов должно быть не больше бюджета от всех запросов'
+        )
+
+    def test_fast_error_not_hedged(self):
+        hedger = Hedger(budget=1, min_samples=20)
+        call = ScriptedCall({}, error_on={20})
+        self.warm_up(hedger, call)
+        with pytest.raises(ConnectionError):
+            hedger.call(call, 'x')
+        assert call.calls == 21 and hedger.stats()['hedges'] == 0, (
+            'Ошибка до истечения p95 не должна приводить к повтору'
+        )
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        hedger = Hedger(budget=1, min_samples=20)
+        call = ScriptedCall({20: 0.1}, error_on={21})
+        self.warm_up(hedger, call)
+        assert hedger.call(call, 'x') == ('x', 20), (
+            'При ошибке повтора должен использоваться первый ответ'
+        )
+        assert hedger.stats()['won'] == 0
+
+    def test_loser_is_discarded(self):
+        hedger = Hedger(budget=1, min_samples=20)
+        call = ScriptedCall({20: 0.2})
+        self.warm_up(hedger, call)
+        discarded = []
+
+        assert hedger.call(call, 'x', discard=discarded.append) == ('x', 21)
+        time.sleep(0.3)
+        assert discarded == [('x', 20)], (
+            'Опоздавший ответ должен передаваться в discard'
+        )
+
+    def test_streaming_request_is_hedged(self, monkeypatch):
+        calls = []
+
+        class Response:
+            def iter_content(self, size):
+                return iter([b'{"homeworks": [], "current_date": 1}'])
+
+        class SpyHedger:
+            def call(self, func, *args, discard=None):
+                calls.append((func, args, discard))
+                return Response()
+
+        monkeypatch.setattr(homework, 'HEDGE_ENABLED', True)
+        monkeypatch.setattr(homework, 'hedger', SpyHedger())
+
+        stream = homework.stream_api_answer(0, {})
+
+        assert list(stream) == [] and stream.get('current_date') == 1
+        assert calls and calls[0][1][-1] is True, (
+            'С HEDGE_ENABLED потоковый запрос тоже должен дублироваться'
+        )
+        assert calls[0][2] is not None, (
+            'Опоздавший потоковый ответ нужно закрывать'
+        )
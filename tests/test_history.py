@@ -0,0 +1,100 @@
+import csv
+import json
+
+import history
+from history import HistoryStore, format_date
+
+
+def status(name, value, updated, homework_id=1):
+    return {
+        'id': homework_id,
+        'homework_name': name,
+        'status': value,
+        'date_updated': format_date(updated),
+    }
+
+
+class TestHistory:
+
+    def make_store(self, tmp_path):
+        return HistoryStore(str(tmp_path / 'history.sqlite3'),
+                            flush_interval=3600, batch_size=1000)
+
+    def test_writes_are_batched(self, tmp_path):
+        store = self.make_store(tmp_path)
+        store.record('t', status('hw1', 'reviewing', 1000))
+        assert list(store.query()) == [], (
+            'Статусы должны копиться в памяти до записи пачкой'
+        )
+        store.record('t', status('hw1', 'reviewing', 1000))
+        store.flush()
+        rows = list(store.query(tenant='t'))
+        assert len(rows) == 1, 'Повторный статус не должен дублироваться'
+        assert rows[0]['updated'] == 1000
+        assert rows[0]['status'] == 'reviewing'
+
+    def test_range_query(self, tmp_path):
+        store = self.make_store(tmp_path)
+        for updated in (100, 200, 300):
+            store.record('t', status('hw1', 'reviewing', updated))
+        store.record('other', status('hw1', 'reviewing', 200))
+        store.flush()
+        rows = list(store.query(tenant='t', since=150, until=300))
+        assert [row['updated'] for row in rows] == [200], (
+            'Период должен включать since и не включать until'
+        )
+
+    def test_review_durations(self, tmp_path):
+        store = self.make_store(tmp_path)
+        store.record('t', status('hw1', 'reviewing', 0))
+        store.record('t', status('hw1', 'rejected', 3600))
+        store.record('t', status('hw1', 'reviewing', 4000))
+        store.flush()
+        # Вердикт пришел отдельной пачкой, ревью hw2 - не по порядку
+        store.record('t', status('hw1', 'approved', 4000 + 7200))
+        store.record('t', status('hw2', 'approved', 20000, 2))
+        store.flush()
+        store.record('t', status('hw2', 'reviewing', 19000, 2))
+        store.flush()
+
+        stats = {item['verdict']: item for item in store.review_stats()}
+        assert stats['rejected']['reviews'] == 1
+        assert stats['rejected']['average'] == 3600
+        assert stats['approved']['reviews'] == 2, (
+            'Ревью должно находиться и при записи не по порядку'
+        )
+        assert stats['approved']['fastest'] == 1000
+        assert stats['approved']['slowest'] == 7200
+        only_hw1 = store.review_stats(homework='hw1')
+        assert sum(item['reviews'] for item in only_hw1) == 2
+
+    def test_rejected_twice(self, tmp_path):
+        store = self.make_store(tmp_path)
+        for updated in (100, 300):
+            store.record('t', status('hw1', 'rejected', updated))
+        store.record('t', status('hw2', 'rejected', 100, 2))
+        store.flush()
+        assert store.rejected(min_count=2) == [
+            {'tenant': 't', 'homework_name': 'hw1', 'rejected': 2}
+        ]
+
+    def test_cli_export(self, tmp_path, capsys):
+        path = str(tmp_path / 'history.sqlite3')
+        store = HistoryStore(path)
+        store.record('t', status('hw1', 'reviewing', 100))
+        store.record('t', status('hw1', 'approved', 200))
+        store.close()
+
+        history.main(['--db', path, 'export', '--status', 'approved'])
+        rows = [json.loads(line) for line in
+                capsys.readouterr().out.splitlines()]
+        assert [row['status'] for row in rows] == ['approved']
+
+        output = tmp_path / 'history.csv'
+        history.main(['--db', path, 'export', '--format', 'csv',
+                      '--output', str(output), '--since', '1970-01-01'])
+        with open(output, encoding='utf-8') as file:
+            assert len(list(csv.DictReader(file))) == 2
+
+        history.main(['--db', path, 'reviews'])
+        assert capsys.readouterr().out.startswith('approved: 1 ревью')
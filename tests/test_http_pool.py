@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_pool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+def delta(before, after):
+    return {key: after[key] - before[key] for key in before}
+
+
+class TestHttpPool:
+
+    def test_connections_reused(self, local_server):
+        before = http_pool.pool_stats()
+        session = http_pool.create_session(pool_maxsize=2)
+        for _ in range(3):
+            session.get(local_server, timeout=5).json()
+        session.close()
+
+        stats = delta(before, http_pool.pool_stats())
+        assert stats['requests'] == 3
+        assert stats['new_connections'] == 1, (
+            'Сессия должна открыть одно соединение и переиспользовать его'
+        )
+
+    def test_connection_close_disables_reuse(self, local_server):
+        before = http_pool.pool_stats()
+        session = http_pool.create_session(keep_alive=False)
+        for _ in range(2):
+            session.get(local_server, timeout=5).json()
+        session.close()
+
+        stats = delta(before, http_pool.pool_stats())
+        assert stats['new_connections'] == 2
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+import requests
+import telegram
+
+from loadtest import practicum_server, telegram_server
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestStandInServers:
+
+    def test_from_date_semantics(self):
+        config = practicum_server.PracticumConfig(
+            event_interval=10, homeworks=3, started=0
+        )
+        everything = practicum_server.build_response(config, 't', 0, 100)
+        assert everything['current_date'] == 100
+        assert len(everything['homeworks']) == 3
+
+        recent = practicum_server.build_response(config, 't', 95, 100)
+        assert len(recent['homeworks']) <= 1, (
+            'Заглушка должна возвращать только изменения после from_date'
+        )
+        assert practicum_server.build_response(
+            config, 't', 100, 100
+        )['homeworks'] == []
+
+    def test_practicum_errors(self, serve):
+        config = practicum_server.PracticumConfig(error_rate=1)
+        server = serve(practicum_server.make_server(config))
+        response = requests.get(
+            practicum_server.endpoint(server),
+            headers={'Authorization': 'OAuth token'},
+            params={'from_date': 0},
+            timeout=5,
+        )
+        assert response.status_code == 500
+
+    def test_telegram_flood_limit(self, serve):
+        config = telegram_server.TelegramConfig(chat_rate=1, chat_burst=1)
+        server = serve(telegram_server.make_server(config))
+        bot = telegram.Bot(
+            token='1234:abcdefg', base_url=telegram_server.base_url(server)
+        )
+        message = bot.send_message(chat_id=1, text='first')
+        assert message.text == 'first'
+        with pytest.raises(telegram.error.RetryAfter):
+            bot.send_message(chat_id=1, text='second')
+        assert config.delivered[1] == 1 and config.throttled == 1
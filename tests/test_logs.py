@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import threading
+
+import homework
+import logs
+from dedup import DeliveryIndex
+
+
+class Recorder:
+    """Аргумент сообщения, запоминающий поток, в котором его форматировали."""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return 'значение'
+
+
+class FakeDelivery:
+
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, chat_id, message):
+        self.sent.append((chat_id, message))
+
+
+class TestLogs:
+
+    def teardown_method(self):
+        logs.stop_logging()
+        for handler in list(logging.getLogger().handlers):
+            logging.getLogger().removeHandler(handler)
+
+    def test_json_fields(self):
+        stream = io.StringIO()
+        logs.setup_logging('DEBUG', 'json', 1, stream)
+        logging.getLogger('bot').info(
+            'Бот отправил сообщение: %s', 'текст',
+            extra={'tenant': 'abc', 'chat_id': 42, 'latency': 0.5}
+        )
+        logs.stop_logging()
+
+        record = json.loads(stream.getvalue())
+        assert record['message'] == 'Бот отправил сообщение: текст'
+        assert record['level'] == 'INFO'
+        assert record['tenant'] == 'abc', 'В записи нет поля tenant'
+        assert record['chat_id'] == 42
+        assert record['latency'] == 0.5
+        assert 'homework' not in record, (
+            'Неизвестные поля не должны попадать в запись'
+        )
+
+    def test_debug_sampling(self):
+        stream = io.StringIO()
+        logs.setup_logging('DEBUG', 'json', 5, stream)
+        logger = logging.getLogger('bot')
+        for tenant in range(10):
+            logger.debug('%s: Отсутствуют новые статусы', tenant)
+        logger.error('Сбой')
+        logs.stop_logging()
+
+        records = [json.loads(line) for line in stream.getvalue().split('\n')
+                   if line]
+        debug = [record for record in records if record['level'] == 'DEBUG']
+        assert len(debug) == 2, 'Должна остаться каждая пятая DEBUG-запись'
+        assert debug[0]['sampled'] == 5
+        assert records[-1]['message'] == 'Сбой', (
+            'Ошибки не должны прореживаться'
+        )
+
+    def test_formatting_in_listener_thread(self):
+        stream = io.StringIO()
+        logs.setup_logging('DEBUG', 'text', 1, stream)
+        argument = Recorder()
+        logging.getLogger('bot').info('Значение: %s', argument)
+        logs.stop_logging()
+
+        assert 'Значение: значение' in stream.getvalue()
+        assert argument.threads, 'Сообщение не было отформатировано'
+        assert threading.current_thread() not in argument.threads, (
+            'Сообщение должно форматироваться в потоке QueueListener'
+        )
+
+    def test_skipped_homework_logged_with_name(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 1)
+        stream = io.StringIO()
+        logs.setup_logging('DEBUG', 'json', 1, stream)
+        delivery = FakeDelivery()
+        good = {'homework_name': 'hw1', 'status': 'approved'}
+        bad = {'homework_name': 'hw2', 'status': 'unknown'}
+
+        statuses = homework.notify_homeworks(
+            [bad, good], 'abc', delivery,
+            DeliveryIndex(str(tmp_path / 'state.sqlite3'))
+        )
+        logs.stop_logging()
+
+        assert statuses == [good] and len(delivery.sent) == 1, (
+            'Работа с неизвестным статусом не должна задерживать остальные'
+        )
+        records = [json.loads(line) for line in stream.getvalue().split('\n')
+                   if line]
+        skipped = [
+            record for record in records
+            if record['message'].startswith('Пропущена работа')
+        ]
+        assert skipped and skipped[0]['homework'] == 'hw2', (
+            'В записи о пропущенной работе должно быть поле homework'
+        )
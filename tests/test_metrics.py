@@ -0,0 +1,40 @@
+import threading
+import urllib.request
+
+from metrics import Registry, make_server, serve
+
+
+class TestMetrics:
+
+    def test_render_prometheus_text(self):
+        registry = Registry()
+        errors = registry.counter('errors_total', 'Ошибки', ('type',))
+        latency = registry.histogram('latency_seconds', 'Время', buckets=(1, 5))
+        errors.labels('TelegramError').inc()
+        errors.labels('TelegramError').inc()
+        latency.observe(0.5)
+        latency.observe(3)
+        latency.observe(30)
+
+        text = registry.render()
+        assert 'errors_total{type="TelegramError"} 2.0' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="5"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'latency_seconds_count 3' in text
+        assert '# TYPE latency_seconds histogram' in text
+
+    def test_disabled_by_default(self):
+        assert serve(port=0) is None, (
+            'Порт 0 означает, что сервер метрик не запускается'
+        )
+
+    def test_http_endpoint(self):
+        server = make_server('127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode()
+        server.shutdown()
+        server.server_close()
+        assert 'homework_api_request_seconds_count' in body
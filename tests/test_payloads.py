@@ -0,0 +1,36 @@
+import json
+
+from payloads import PayloadCache
+
+
+def body(data):
+    return json.dumps(data).encode()
+
+
+class TestPayloadCache:
+
+    def test_empty_payload_short_circuit(self):
+        cache = PayloadCache()
+        first = body({'homeworks': [], 'current_date': 100})
+        assert cache.lookup(first) is None
+        cache.learn(first, json.loads(first))
+
+        result = cache.lookup(body({'homeworks': [], 'current_date': 200}))
+        assert result == {'homeworks': [], 'current_date': 200}, (
+            'Пустой ответ с новым current_date должен узнаваться по отпечатку'
+        )
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_payload_with_homeworks_not_cached(self):
+        cache = PayloadCache()
+        data = {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 100,
+        }
+        cache.learn(body(data), data)
+        empty = body({'homeworks': [], 'current_date': 100})
+        cache.learn(empty, json.loads(empty))
+
+        assert cache.lookup(body(dict(data, current_date=200))) is None, (
+            'Ответ со статусами нельзя пропускать без разбора'
+        )
@@ -0,0 +1,58 @@
+import threading
+import time
+import tracemalloc
+
+from profiling import LoopProfiler
+
+retained = []
+
+
+def slow_call():
+    time.sleep(0.05)
+
+
+def leaky_call():
+    retained.append(bytearray(256 * 1024))
+
+
+class TestProfiling:
+
+    def test_idle_profiler_does_nothing(self, tmp_path):
+        profiler = LoopProfiler((slow_call,), directory=str(tmp_path))
+        threads = threading.active_count()
+        with profiler.iteration():
+            slow_call()
+        assert not tracemalloc.is_tracing(), (
+            'Без запроса профилирования tracemalloc не должен запускаться'
+        )
+        assert threading.active_count() == threads
+        assert profiler.report_path is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_report_attributes_time_and_memory(self, tmp_path):
+        profiler = LoopProfiler(
+            (slow_call, leaky_call), iterations=2, directory=str(tmp_path),
+            interval=0.001
+        )
+        profiler.request()
+        for _ in range(3):
+            with profiler.iteration():
+                slow_call()
+                leaky_call()
+
+        assert len(profiler.durations) == 2, (
+            'Профилироваться должно заданное число итераций'
+        )
+        assert not tracemalloc.is_tracing(), (
+            'После отчета tracemalloc должен быть остановлен'
+        )
+        report = open(profiler.report_path, encoding='utf-8').read()
+        lines = {
+            line.split(':')[0].strip(): line for line in report.splitlines()
+        }
+        share = float(lines['slow_call'].split(': ')[1].split('%')[0])
+        assert share > 50, 'Время sleep должно приходиться на slow_call'
+        growth = float(lines['leaky_call'].split('/ ')[1])
+        assert growth >= 256, (
+            'Удержанная память должна приходиться на leaky_call'
+        )
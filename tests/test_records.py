@@ -0,0 +1,88 @@
+import json
+import sys
+
+import pytest
+
+import homework
+from records import Homework, validate_homework
+from streaming import HomeworkStream
+
+HOMEWORK = {
+    'id': 123,
+    'status': 'approved',
+    'homework_name': 'hw123',
+    'reviewer_comment': 'Всё нравится',
+    'date_updated': '2020-02-13T14:40:57Z',
+    'lesson_name': 'Итоговый проект',
+}
+
+
+class TestRecords:
+
+    def test_record_keeps_used_fields(self):
+        record = validate_homework(HOMEWORK)
+        assert isinstance(record, Homework)
+        assert record['status'] == 'approved'
+        assert record.get('id') == 123
+        assert 'lesson_name' not in record, (
+            'Неиспользуемые поля не должны храниться в записи'
+        )
+        assert record == {
+            key: value for key, value in HOMEWORK.items()
+            if key != 'lesson_name'
+        }
+        assert not hasattr(record, '__dict__'), (
+            'Запись должна хранить поля в слотах'
+        )
+        assert sys.getsizeof(record) < sys.getsizeof(HOMEWORK)
+
+    def test_missing_field_is_key_error(self):
+        record = validate_homework({'status': 'approved'})
+        assert record.get('homework_name') is None
+        with pytest.raises(KeyError):
+            record['homework_name']
+        with pytest.raises(KeyError, match='нет ключа'):
+            homework.parse_status(record)
+
+    def test_parse_status_same_message(self):
+        assert homework.parse_status(validate_homework(HOMEWORK)) == (
+            homework.parse_status(HOMEWORK)
+        ), 'Сообщение для записи и словаря должно совпадать'
+
+    @pytest.mark.parametrize('item', [
+        ['hw123', 'approved'],
+        dict(HOMEWORK, id='123'),
+        dict(HOMEWORK, status=None),
+    ])
+    def test_invalid_homework(self, item):
+        with pytest.raises(TypeError):
+            validate_homework(item)
+
+    def test_reviewer_comment_may_be_null(self):
+        record = validate_homework(dict(HOMEWORK, reviewer_comment=None))
+        assert record['reviewer_comment'] is None
+
+    def test_check_response_returns_records(self):
+        homeworks = homework.check_response(
+            {'homeworks': [HOMEWORK], 'current_date': 1}
+        )
+        assert [type(record) for record in homeworks] == [Homework]
+
+    def test_bad_homework_does_not_block_others(self):
+        response = {
+            'homeworks': [
+                dict(HOMEWORK, id='123', homework_name='bad'),
+                dict(HOMEWORK, id=True, homework_name='flag'),
+                dict(HOMEWORK, reviewer_comment=5, homework_name='comment'),
+                HOMEWORK,
+            ],
+            'current_date': 1,
+        }
+        homeworks = homework.check_response(response)
+        assert [record['homework_name'] for record in homeworks] == [
+            'hw123'
+        ], 'Некорректная работа должна пропускаться, а не ронять ответ'
+
+        stream = HomeworkStream([json.dumps(response).encode()])
+        assert [record['homework_name'] for record in stream] == ['hw123']
+        assert stream.get('current_date') == 1
@@ -0,0 +1,65 @@
+from scheduler import AdaptiveScheduler, FixedScheduler, create_scheduler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def upper_bound(low, high):
+    return high
+
+
+class TestScheduler:
+
+    def make_scheduler(self, clock):
+        return AdaptiveScheduler(
+            retry_time=600, reviewing_retry_time=60, error_retry_time=10,
+            error_retry_max=100, dormant_after=1000, dormant_retry_time=1800,
+            clock=clock, rand=upper_bound
+        )
+
+    def test_fixed(self):
+        scheduler = FixedScheduler(600)
+        assert scheduler.record_success('t', []) == 600
+        assert scheduler.record_failure('t', Exception()) == 600
+
+    def test_reviewing_polls_faster(self):
+        scheduler = self.make_scheduler(FakeClock())
+        reviewing = {'homework_name': 'hw', 'status': 'reviewing'}
+        assert scheduler.record_success('t', [reviewing]) == 60
+        assert scheduler.record_success('t', []) == 60, (
+            'Пока работа на ревью, опрос должен оставаться частым'
+        )
+        approved = dict(reviewing, status='approved')
+        assert scheduler.record_success('t', [approved]) == 600
+        assert scheduler.snapshot()['t'] == (600, 'idle')
+
+    def test_failures_back_off(self):
+        scheduler = self.make_scheduler(FakeClock())
+        delays = [scheduler.record_failure('t', Exception()) for _ in range(6)]
+        assert delays == [10, 20, 40, 80, 100, 100], (
+            'После ошибок задержка должна расти экспоненциально до предела'
+        )
+        assert scheduler.record_success('t', []) == 600
+        assert scheduler.record_failure('t', Exception()) == 10
+
+    def test_jitter(self):
+        scheduler = AdaptiveScheduler(error_retry_time=10)
+        delay = scheduler.record_failure('t', Exception())
+        assert 5 <= delay <= 10
+
+    def test_dormant(self):
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+        assert scheduler.record_success('t', []) == 600
+        clock.now = 1000
+        assert scheduler.record_success('t', []) == 1800
+
+    def test_create_scheduler(self):
+        assert isinstance(create_scheduler('fixed'), FixedScheduler)
+        assert isinstance(create_scheduler('adaptive'), AdaptiveScheduler)
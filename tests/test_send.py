@@ -0,0 +1,131 @@
+import subprocess
+import sys
+import threading
+import time
+
+import telegram
+
+import homework
+from delivery import Delivery
+from metrics import registry
+
+
+class FlakyBot:
+    """Бот, который один раз не может отправить в чат 2 из-за сети."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        with self._lock:
+            self.calls.append(chat_id)
+            failed = chat_id == 2 and self.calls.count(2) == 1
+        if failed:
+            raise telegram.error.NetworkError('Сеть недоступна')
+        if chat_id == 3:
+            raise telegram.error.BadRequest('Chat not found')
+
+
+class TestSendMessage:
+
+    def test_recipients_without_duplicates(self, monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 1)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_IDS', [2, 1, 3])
+        assert homework.recipients() == [1, 2, 3], (
+            'Каждый чат должен получать сообщение один раз'
+        )
+
+    def test_only_network_failures_are_retried(self, monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 1)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_IDS', [2, 3])
+        bot = FlakyBot()
+
+        results = homework.send_message(bot, 'Изменился статус')
+
+        assert results == {1: True, 2: True, 3: False}, (
+            'send_message должен вернуть результат по каждому чату'
+        )
+        assert sorted(bot.calls) == [1, 2, 2, 3], (
+            'Повторять нужно только отправки, упавшие из-за сети'
+        )
+
+    def test_delivery_sends_chats_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+        sent = []
+
+        def send(chat_id, text):
+            barrier.wait()
+            sent.append(chat_id)
+
+        delivery = Delivery(send=send, clock=time.monotonic, workers=3)
+        for chat_id in (1, 2, 3):
+            delivery.submit(chat_id, 'text')
+
+        delivery.flush_once()
+
+        assert delivery.drain(timeout=5)
+        assert sorted(sent) == [1, 2, 3], (
+            'С workers > 1 сообщения в разные чаты должны уходить '
+            'одновременно'
+        )
+
+    def test_hung_chat_does_not_block_others(self):
+        release = threading.Event()
+        sent = []
+
+        def send(chat_id, text):
+            if chat_id == 1:
+                release.wait(5)
+            sent.append((chat_id, text))
+
+        delivery = Delivery(send=send, clock=time.monotonic, workers=2)
+        delivery.start()
+        try:
+            delivery.submit(1, 'hung')
+            time.sleep(0.05)
+            for number in range(3):
+                delivery.submit(2, str(number))
+                time.sleep(0.05)
+            deadline = time.monotonic() + 2
+            while len(sent) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert [text for chat_id, text in sent if chat_id == 2] == [
+                '0', '1', '2'
+            ], 'Зависшая отправка в один чат не должна задерживать другие'
+            release.set()
+            assert delivery.drain(timeout=5)
+            assert (1, 'hung') in sent
+        finally:
+            release.set()
+            delivery.stop(timeout=5)
+
+    def test_delivery_tracks_each_chat(self):
+        def send(chat_id, text):
+            if chat_id == 2:
+                raise telegram.error.BadRequest('Chat not found')
+
+        delivery = Delivery(send=send, clock=time.monotonic)
+        for chat_id in (1, 2, 1):
+            delivery.submit(chat_id, 'text')
+        delivery.flush_once()
+
+        assert delivery.stats()['chats'] == {
+            1: {'sent': 2, 'failed': 0},
+            2: {'sent': 0, 'failed': 1},
+        }, 'Результат отправки должен учитываться для каждого чата'
+        assert (
+            'homework_delivery_lines_total{chat_id="2",result="failed"}'
+            in registry.render()
+        )
+
+    def test_import_does_not_create_executor(self):
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import homework; print(homework._send_executor)'],
+            capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == 'None', (
+            'Пул send_message не должен создаваться при импорте homework'
+        )
@@ -0,0 +1,134 @@
+import asyncio
+
+import supervisor
+from checkpoint import CheckpointStore
+from engine import Engine
+from sharding import HashRing, LeaseStore, Ownership
+from tenants import Tenant
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+
+    def __init__(self, exitcode=None):
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return self.exitcode is None
+
+
+KEYS = [f'tenant-{number}' for number in range(1000)]
+
+
+class TestSharding:
+
+    def test_ring_moves_only_departed_keys(self):
+        ring = HashRing(['0', '1', '2', '3'])
+        before = {key: ring.owner(key) for key in KEYS}
+        counts = [list(before.values()).count(node) for node in '0123']
+        assert min(counts) > 150, 'Студенты должны делиться примерно поровну'
+
+        after = HashRing(['0', '1', '3'])
+        moved = [key for key in KEYS if after.owner(key) != before[key]]
+        assert all(before[key] == '2' for key in moved), (
+            'Переезжать должны только студенты ушедшего процесса'
+        )
+        assert HashRing([]).owner('tenant') is None
+
+    def test_lease_is_exclusive_until_expired(self, tmp_path):
+        clock = FakeClock()
+        store = LeaseStore(str(tmp_path / 'state.sqlite3'), clock=clock)
+        assert store.acquire('0', ['a', 'b'], ttl=30) == {'a', 'b'}
+        assert store.acquire('1', ['b', 'c'], ttl=30) == {'c'}, (
+            'Чужая действующая аренда не должна перехватываться'
+        )
+        clock.now += 31
+        assert store.acquire('1', ['b'], ttl=30) == {'b'}
+
+    def test_crashed_worker_tenants_move(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / 'state.sqlite3')
+        first = Ownership('0', KEYS, LeaseStore(path, clock=clock),
+                          ttl=30, clock=clock)
+        second = Ownership('1', KEYS, LeaseStore(path, clock=clock),
+                           ttl=30, clock=clock)
+        first.refresh()
+        second.refresh()
+        # Первый процесс отдает лишних студентов, второй их забирает
+        first.refresh()
+        second.refresh()
+        assert not first.owned & second.owned, (
+            'Студента не должны опрашивать два процесса'
+        )
+        assert first.owned | second.owned == set(KEYS)
+
+        # Второй процесс упал и перестал продлевать аренду
+        clock.now += 31
+        first.refresh()
+        assert first.owned == set(KEYS), (
+            'Студенты упавшего процесса должны перейти к остальным'
+        )
+        assert not any(second.owns(key) for key in KEYS)
+
+        # После перезапуска процесс получает свою долю обратно
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        assert not first.owned & second.owned
+        assert len(second.owned) > 300
+
+    def test_engine_skips_foreign_tenants(self, tmp_path):
+        tenants = [Tenant('token-a', 1), Tenant('token-b', 2)]
+        checkpoints = CheckpointStore(str(tmp_path / 'state.sqlite3'))
+        checkpoints.save(tenants[1].key, 42)
+        checkpoints.flush()
+        requested = []
+
+        def fetch(current_timestamp, headers):
+            requested.append((headers['Authorization'], current_timestamp))
+            return {'homeworks': [], 'current_date': current_timestamp}
+
+        engine = Engine(tenants, send=lambda *args: None, fetch=fetch,
+                        checkpoints=checkpoints,
+                        owns=lambda key: key == tenants[1].key)
+
+        async def poll_all():
+            await asyncio.wait(
+                [asyncio.ensure_future(engine._poll_forever(tenant))
+                 for tenant in tenants], timeout=0.1
+            )
+
+        engine.retry_time = 0
+        asyncio.run(poll_all())
+        assert requested and all(
+            request == ('OAuth token-b', 42) for request in requested
+        ), 'Процесс должен опрашивать только своих студентов'
+
+    def test_supervisor_restarts_with_backoff(self, monkeypatch):
+        started = []
+        clock = FakeClock()
+        monkeypatch.setattr(supervisor.time, 'monotonic', clock)
+        manager = supervisor.Supervisor(2)
+        monkeypatch.setattr(manager, '_start', started.append)
+        manager.processes = {0: FakeProcess(), 1: FakeProcess(exitcode=1)}
+        manager.started = {0: clock.now, 1: clock.now}
+
+        manager.check()
+        assert started == []
+        clock.now += supervisor.RESTART_DELAY
+        manager.check()
+        assert started == [1], 'Упавший процесс должен быть перезапущен'
+        assert manager.delays[1] == 2 * supervisor.RESTART_DELAY
+
+    def test_worker_spool_path(self):
+        assert supervisor.worker_spool_path(3, 'outbox.spool') == (
+            'outbox-3.spool'
+        )
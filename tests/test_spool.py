@@ -0,0 +1,103 @@
+import telegram
+
+from delivery import Delivery
+from spool import Spool
+
+
+class TestSpool:
+
+    def test_pending_survive_restart(self, tmp_path):
+        path = str(tmp_path / 'outbox.spool')
+        spool = Spool(path)
+        first = spool.append(1, 'первое')
+        spool.append(2, 'второе')
+        spool.ack([first])
+        spool.close()
+
+        spool = Spool(path)
+        assert [(chat, text) for _, chat, text in spool.pending()] == [
+            (2, 'второе')
+        ], 'После перезапуска должны остаться только неотправленные'
+        assert spool.append(3, 'третье') > first
+        spool.close()
+
+    def test_torn_last_line_ignored(self, tmp_path):
+        path = tmp_path / 'outbox.spool'
+        spool = Spool(str(path))
+        spool.append(1, 'целое')
+        spool.close()
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('{"id": 2, "chat_')
+
+        assert len(Spool(str(path))) == 1
+
+    def test_append_after_torn_line_survives(self, tmp_path):
+        path = tmp_path / 'outbox.spool'
+        spool = Spool(str(path))
+        spool.append(1, 'a')
+        spool.close()
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('{"ack": 1')
+
+        spool = Spool(str(path))
+        spool.append(2, 'after-crash')
+        spool.close()
+        spool = Spool(str(path))
+        spool.close()
+
+        assert [(chat, text) for _, chat, text in Spool(str(path)).pending()] \
+            == [(1, 'a'), (2, 'after-crash')], (
+                'Запись после недописанной строки не должна теряться'
+            )
+
+    def test_corrupt_records_skipped(self, tmp_path):
+        path = tmp_path / 'outbox.spool'
+        spool = Spool(str(path))
+        spool.append(1, 'первое')
+        spool.close()
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('{"id": 2, "text": "без чата"}\n')
+            file.write('{"chat_id": 3}\n')
+            file.write('{"id": "4", "chat_id": 4, "text": "x"}\n')
+            file.write('[1, 2]\n')
+            file.write('{"id": 5, "chat_id": 5, "text": "последнее"}\n')
+
+        spool = Spool(str(path))
+        assert [(chat, text) for _, chat, text in spool.pending()] == [
+            (1, 'первое'), (5, 'последнее')
+        ], 'Испорченные записи должны пропускаться без остановки запуска'
+        assert spool.append(6, 'новое') == 6
+        spool.close()
+
+    def test_compaction(self, tmp_path):
+        path = tmp_path / 'outbox.spool'
+        spool = Spool(str(path), compact_after=10)
+        for number in range(10):
+            spool.ack([spool.append(1, str(number))])
+        spool.append(1, 'last')
+        spool.close()
+
+        assert len(path.read_text(encoding='utf-8').splitlines()) == 1
+        assert len(Spool(str(path))) == 1
+
+    def test_delivery_resends_after_restart(self, tmp_path):
+        path = str(tmp_path / 'outbox.spool')
+
+        def broken(chat_id, text):
+            raise telegram.error.NetworkError('down')
+
+        delivery = Delivery(send=broken, spool=Spool(path))
+        delivery.submit(1, 'статус')
+        delivery.flush_once()
+        delivery.spool.close()
+
+        sent = []
+        delivery = Delivery(
+            send=lambda chat_id, text: sent.append((chat_id, text)),
+            spool=Spool(path)
+        )
+        delivery.flush_once()
+        assert sent == [(1, 'статус')], (
+            'Неотправленное сообщение должно уйти после перезапуска'
+        )
+        assert len(delivery.spool) == 0
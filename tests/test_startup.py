@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+# Бюджет на import homework, мс. Сейчас импорт занимает ~50 мс,
+# запас - на шум медленных машин
+STARTUP_BUDGET_MS = 150
+HEAVY_MODULES = ('telegram', 'requests', 'urllib3')
+
+
+def run_with_importtime(*args, env=None):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+        env=dict(os.environ, **(env or {})),
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(cumulative) / 1000
+    return result, imported
+
+
+class TestStartup:
+
+    def test_heavy_dependencies_are_lazy(self):
+        _, imported = run_with_importtime('-c', 'import homework')
+        for module in HEAVY_MODULES:
+            assert module not in imported, (
+                f'import homework не должен загружать {module}'
+            )
+
+    def test_import_within_budget(self):
+        timings = [
+            run_with_importtime('-c', 'import homework')[1]['homework']
+            for _ in range(3)
+        ]
+        assert min(timings) < STARTUP_BUDGET_MS, (
+            f'import homework занимает {min(timings):.0f} мс, '
+            f'бюджет {STARTUP_BUDGET_MS} мс'
+        )
+
+    def test_check_mode(self):
+        tokens = {
+            'PRACTICUM_TOKEN': 'token',
+            'TELEGRAM_TOKEN': '1234:abcdefg',
+            'TELEGRAM_CHAT_ID': '1',
+        }
+        result, imported = run_with_importtime(
+            'homework.py', '--check', env=tokens
+        )
+        assert result.returncode == 0
+        assert 'telegram' not in imported, (
+            'Режим --check не должен загружать python-telegram-bot'
+        )
+
+        result, _ = run_with_importtime(
+            'homework.py', '--check', env=dict(tokens, TELEGRAM_TOKEN='')
+        )
+        assert result.returncode == 1
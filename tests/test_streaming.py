@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from streaming import HomeworkStream
+
+
+def chunked(data, size):
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+class TestHomeworkStream:
+    DATA = {
+        'current_date': 1000198991,
+        'homeworks': [
+            {'homework_name': 'проект', 'status': 'approved', 'id': 1},
+            {'homework_name': 'hw2', 'status': 'rejected', 'id': 22},
+        ],
+    }
+
+    @pytest.mark.parametrize('size', [1, 3, 16, 4096])
+    def test_homeworks_streamed(self, size):
+        stream = HomeworkStream(chunked(self.DATA, size))
+        assert list(stream) == self.DATA['homeworks'], (
+            'Потоковый разбор должен вернуть те же работы, что и json()'
+        )
+        assert stream.get('current_date') == self.DATA['current_date']
+
+    def test_first_homework_before_end_of_body(self):
+        chunks = chunked(self.DATA, 8)
+        consumed = []
+
+        def source():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        next(iter(HomeworkStream(source())))
+        assert len(consumed) < len(chunks), (
+            'Первая работа должна отдаваться до получения всего ответа'
+        )
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {'homework_name': 'hw'}}, TypeError),
+    ])
+    def test_errors_match_check_response(self, data, error):
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(data, 4)))
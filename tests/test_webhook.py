@@ -0,0 +1,122 @@
+import http.client
+import threading
+
+import pytest
+import requests
+
+import homework
+from dedup import DeliveryIndex
+from tenants import Tenant
+from webhook import WebhookReceiver, is_loopback, make_server, serve
+
+
+class FakeDelivery:
+
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, chat_id, message):
+        self.sent.append((chat_id, message))
+
+
+@pytest.fixture
+def webhook(tmp_path):
+    delivery = FakeDelivery()
+    receiver = WebhookReceiver(
+        [Tenant('token', 42)], delivery,
+        DeliveryIndex(str(tmp_path / 'state.sqlite3')), secret='s3cret'
+    )
+    server = make_server(receiver, '127.0.0.1')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/events'
+    yield url, delivery
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, data, token='token', secret='s3cret'):
+    return requests.post(url, json=data, timeout=5, headers={
+        'Authorization': f'OAuth {token}', 'X-Webhook-Secret': secret,
+    })
+
+
+class TestWebhook:
+    EVENT = {
+        'homeworks': [{
+            'id': 1,
+            'homework_name': 'hw123',
+            'status': 'approved',
+            'date_updated': '2020-02-13T14:40:57Z',
+        }],
+        'current_date': 1000198991,
+    }
+
+    def test_event_delivered_once(self, webhook):
+        url, delivery = webhook
+        assert post(url, self.EVENT).status_code == 202
+        assert post(url, self.EVENT).json() == {'accepted': 0}
+        assert len(delivery.sent) == 1 and delivery.sent[0][0] == 42, (
+            'Событие должно сразу уходить в чат студента, без дублей'
+        )
+        assert delivery.sent[0][1].startswith(
+            'Изменился статус проверки работы "hw123"'
+        )
+
+    def test_rejects_invalid(self, webhook):
+        url, delivery = webhook
+        assert post(url, self.EVENT, token='other').status_code == 401
+        assert post(url, self.EVENT, secret='wrong').status_code == 401
+        assert post(url, {'current_date': 1}).status_code == 400
+        unknown = {'homeworks': [{'homework_name': 'hw', 'status': 'x'}]}
+        assert post(url, unknown).status_code == 400
+        assert delivery.sent == []
+
+    @pytest.mark.parametrize('length', ['abc', '-1'])
+    def test_rejects_bad_content_length(self, webhook, length):
+        url, delivery = webhook
+        host, port = url.split('/')[2].split(':')
+        connection = http.client.HTTPConnection(host, int(port), timeout=5)
+        connection.putrequest('POST', '/events')
+        connection.putheader('Content-Length', length)
+        connection.putheader('Authorization', 'OAuth token')
+        connection.putheader('X-Webhook-Secret', 's3cret')
+        connection.endheaders()
+        assert connection.getresponse().status == 400, (
+            'Некорректный Content-Length должен отклоняться до чтения тела'
+        )
+        connection.close()
+
+    def test_public_host_requires_secret(self):
+        receiver = WebhookReceiver([Tenant('token', 42)], FakeDelivery())
+        assert serve(receiver, port=8080, host='0.0.0.0') is None, (
+            'Без секрета прием не должен открываться на внешнем адресе'
+        )
+        assert is_loopback('127.0.0.1') and is_loopback('::1')
+        assert not is_loopback('0.0.0.0')
+
+    def test_bad_homework_does_not_block_event(self, webhook):
+        url, delivery = webhook
+        event = {'homeworks': [
+            {'homework_name': 'hw', 'status': 'x'}, *self.EVENT['homeworks']
+        ]}
+        assert post(url, event).status_code == 400
+        assert len(delivery.sent) == 1, (
+            'Корректные работы события должны быть отправлены'
+        )
+
+    def test_event_fanned_out_to_recipients(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 42)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_IDS', [7, 8])
+        delivery = FakeDelivery()
+        tenant = Tenant('token', 42)
+        receiver = WebhookReceiver(
+            [tenant], delivery,
+            DeliveryIndex(str(tmp_path / 'state.sqlite3')),
+            recipients=lambda tenant: homework.recipients()
+        )
+
+        assert receiver.handle(tenant, self.EVENT) == 1
+        assert receiver.handle(tenant, self.EVENT) == 0
+        assert [chat_id for chat_id, _ in delivery.sent] == [42, 7, 8], (
+            'Событие должно один раз уйти во все чаты получателей'
+        )
@@ -0,0 +1,213 @@
+"""Прием событий об изменении статусов вместо ожидания опроса.
+
+POST /events с заголовком Authorization: OAuth <токен Практикума> и телом
+того же вида, что ответ API: {"homeworks": [...], "current_date": ...}.
+Работы проходят check_response и parse_status и сразу уходят в очередь
+отправки; опрос API остается редкой сверкой на случай потерянных событий.
+"""
+import hmac
+import ipaddress
+import json
+import logging
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional
+
+from dedup import DeliveryIndex
+from delivery import Delivery
+from history import HistoryStore
+from homework import check_response, parse_status
+from metrics import record_error, registry
+from settings import (WEBHOOK_HOST, WEBHOOK_MAX_BODY, WEBHOOK_PORT,
+                      WEBHOOK_SECRET)
+from tenants import Tenant, tenant_key
+
+logger = logging.getLogger(__name__)
+
+EVENTS = registry.counter(
+    'homework_webhook_events_total', 'Принятые события по результату',
+    ('result',)
+)
+
+
+def _tenant_chat(tenant: Tenant) -> list:
+    return [tenant.chat_id]
+
+
+class WebhookReceiver:
+    """Обработка событий: проверка, отсев дублей, постановка в очередь.
+
+    recipients(tenant) -> чаты, в которые уходят статусы студента,
+    по умолчанию только tenant.chat_id.
+    """
+
+    def __init__(
+        self,
+        tenants: Iterable[Tenant],
+        delivery: Delivery,
+        delivered: Optional[DeliveryIndex] = None,
+        secret: str = WEBHOOK_SECRET,
+        history: Optional[HistoryStore] = None,
+        recipients: Optional[Callable] = None,
+    ) -> None:
+        self.tenants: Dict[str, Tenant] = {
+            tenant.key: tenant for tenant in tenants
+        }
+        self.delivery = delivery
+        self.delivered = delivered
+        self.secret = secret
+        self.history = history
+        self.recipients = recipients or _tenant_chat
+
+    def authorize(self, authorization: str, secret: str) -> Optional[Tenant]:
+        """Студент по токену из заголовка или None."""
+        if self.secret and not hmac.compare_digest(secret, self.secret):
+            return None
+        if not authorization.startswith('OAuth '):
+            return None
+        return self.tenants.get(tenant_key(authorization[len('OAuth '):]))
+
+    def handle(self, tenant: Tenant, event) -> int:
+        """Отправка статусов из события, возвращает число новых.
+
+        Работы с неизвестным статусом пропускаются, остальные
+        отправляются; после этого событие отклоняется KeyError.
+        """
+        accepted, skipped = 0, 0
+        for homework in check_response(event):
+            try:
+                message = parse_status(homework)
+            except KeyError as error:
+                skipped += 1
+                logger.error(
+                    '%s: Пропущена работа: %s', tenant.key, error, extra={
+                        'tenant': tenant.key,
+                        'homework': homework.get('homework_name'),
+                    }
+                )
+                continue
+            if (
+                self.delivered is None
+                or self.delivered.check_and_mark(tenant.key, homework)
+            ):
+                for chat_id in self.recipients(tenant):
+                    self.delivery.submit(chat_id, message)
+                if self.history is not None:
+                    self.history.record(tenant.key, homework)
+                accepted += 1
+        if skipped:
+            raise KeyError(f'Пропущено работ: {skipped}')
+        return accepted
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """POST /events."""
+
+    receiver: WebhookReceiver
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """Прием события."""
+        if self.path.split('?')[0] != '/events':
+            self._reply(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reply(HTTPStatus.BAD_REQUEST, {
+                'error': 'некорректный Content-Length'
+            })
+            return
+        if length > WEBHOOK_MAX_BODY:
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+                'error': 'слишком большое событие'
+            })
+            return
+        raw = self.rfile.read(length)
+
+        tenant = self.receiver.authorize(
+            self.headers.get('Authorization', ''),
+            self.headers.get('X-Webhook-Secret', ''),
+        )
+        if tenant is None:
+            EVENTS.labels('unauthorized').inc()
+            self._reply(HTTPStatus.UNAUTHORIZED, {'error': 'unauthorized'})
+            return
+
+        try:
+            accepted = self.receiver.handle(tenant, json.loads(raw))
+        except (ValueError, KeyError, TypeError) as error:
+            EVENTS.labels('invalid').inc()
+            record_error(error)
+            logger.error(
+                '%s: Некорректное событие: %s', tenant.key, error,
+                extra={'tenant': tenant.key}
+            )
+            self._reply(HTTPStatus.BAD_REQUEST, {'error': str(error)})
+            return
+
+        EVENTS.labels('accepted').inc()
+        logger.debug(
+            '%s: Событие принято, новых: %s', tenant.key, accepted,
+            extra={'tenant': tenant.key}
+        )
+        self._reply(HTTPStatus.ACCEPTED, {'accepted': accepted})
+
+    def log_message(self, *args):
+        """Запросы не пишем в лог, их учитывает счетчик событий."""
+
+
+def make_server(
+    receiver: WebhookReceiver, host: str = WEBHOOK_HOST, port: int = 0
+) -> ThreadingHTTPServer:
+    """HTTP-сервер приемника, port=0 - любой свободный порт."""
+    handler = type('Handler', (WebhookHandler,), {'receiver': receiver})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def is_loopback(host: str) -> bool:
+    """Адрес доступен только с этой машины."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(
+    receiver: WebhookReceiver,
+    port: int = WEBHOOK_PORT,
+    host: str = WEBHOOK_HOST,
+) -> Optional[ThreadingHTTPServer]:
+    """Запуск приемника событий в фоновом потоке, port=0 - не запускать.
+
+    Без WEBHOOK_SECRET прием открывается только на локальном адресе:
+    иначе события защищал бы один токен студента.
+    """
+    if not port:
+        return None
+    if not receiver.secret and not is_loopback(host):
+        logger.error(
+            'Прием событий на %s не запущен: задайте WEBHOOK_SECRET', host
+        )
+        return None
+    server = make_server(receiver, host, port)
+    thread = threading.Thread(
+        target=server.serve_forever, name='webhook', daemon=True
+    )
+    thread.start()
+    logger.info('Прием событий на %s:%s', host, port)
+    return server